@@ -1,6 +1,9 @@
 import random
-from parser import parse
+from console import read_action
+import console
 import items
+import metrics
+import overlay
 
 # contains the NPC (non player character) classes used in the game
 # the only class in use in the current version of the game is the ShopKeeper,
@@ -17,18 +20,51 @@ class NPC():
         raise NotImplementedError()
 
 class ShopKeeper(NPC):
-    def __init__(self, stock=[], bought_items=set(),
-                store_items= [items.Cup(), items.Bottle(), items.Jug(), items.Case(), items.Pack()]):
+    # the store's own items are made once and shared by every session. What
+    # a session changes by buying and selling is kept in its overlay (see
+    # overlay.py), as sets and tuples that are replaced (never changed in
+    # place), so a session that doesn't trade stores nothing
+    bought_items = overlay.SessionField()
+    sold_items = overlay.SessionField()
+
+    # the ids (in resources/items.json) of the items the shop starts with
+    for_sale = ("cup", "bottle", "jug", "case", "pack")
+
+    def __init__(self, store_items=None):
+        """Args:
+            store_items: the items the store sells. If None, the items in
+                for_sale are made the first time the shop restocks."""
         super().__init__(name="Shopkeeper")
-        self.stock = stock
-        self.bought_items = bought_items
-        self.store_items = store_items
+        self.store_items = None if store_items is None else tuple(store_items)
+        self.bought_items = frozenset() # the items the player has bought
+        self.sold_items = () # the items the player has sold to the store
+
+    @property
+    def stock(self):
+        """The items in stock: the store's items and the ones the player sold
+        to it, less the ones the player has bought."""
+        return [i for i in self.store_items + self.sold_items if i not in self.bought_items]
+
+    def restock(self):
+        """Makes the store's items, the first time the shop is opened."""
+        if self.store_items is None:
+            self.store_items = tuple(items.catalog.make(item_id) for item_id in self.for_sale)
+
+    def buy(self, item):
+        """Records that the player bought an item from the store."""
+        self.bought_items = self.bought_items | {item}
+
+    def sell(self, item):
+        """Records that the player sold an item to the store. (An item that
+        was bought here stays out of stock, as it always has.)"""
+        self.sold_items = self.sold_items + (item,)
 
     def print_stock(self, player):
         print("""
         *****    IN STOCK   *****""")
-        if len(self.stock) > 0:
-            for i in self.stock:
+        stock = self.stock
+        if len(stock) > 0:
+            for i in stock:
                 print(i)
         else:
             print("     Sorry, we're all out of stock!")
@@ -40,6 +76,68 @@ class ShopKeeper(NPC):
         print("What would you like to do?")
         print("TYPE: buy [item], sell [item], or leave store")
 
+    def menu(self, player, tile):
+        """Builds the shop's menu: the things the player can buy and sell, and
+        the ways to leave the shop.
+
+        Args:
+            player: an instance of the Player class
+            tile: the TownShop tile the shop is in
+
+        Returns:
+            moves: dictionary mapping nouns to the verbs that can be applied to them
+            avail_actions: the list of actions from the TownShop tile
+            cannot_sell: the names of the items the player is not allowed to sell
+        """
+        # get moves from the TownShop tile
+        moves, avail_actions, descriptors = tile.available_actions(player)
+
+        cannot_sell = {"gold"} # a list of things that cannot be sold
+
+        if len(player.available_weapons()) == 1:
+            # if the player only has one weapon, they should
+            # not be able to sell it
+            cannot_sell.add(player.available_weapons()[0].name)
+
+        if len(player.available_bags()) == 1:
+            # players should not be able to sell their only orb container
+            cannot_sell.add(player.available_bags()[0].name)
+
+        for item in self.stock:
+            # add the things the player can buy to moves
+            if item.name in moves:
+                moves[item.name] = moves[item.name] + ["buy"]
+            else:
+                moves[item.name] = ["buy"]
+        for item in player.inventory:
+            # add all items in the player's inventory into moves
+            # items that cannot be sold are dealt with later
+            if item.name in moves:
+                moves[item.name] = moves[item.name] + ["sell"]
+            else:
+                moves[item.name] = ["sell"]
+
+        # allow the player to leave the shop
+        moves["store"] = ["leave"]
+        moves["shop"] = ["leave"]
+        moves[None] = ["leave", "stop"]
+
+        # prevent the player from leaving the shop in other ways
+        # they must stop shopping first
+        for direction in ["east", "west", "north", "south"]:
+            if direction in moves:
+                moves.pop(direction)
+
+        # that includes travelling somewhere else
+        for action in avail_actions:
+            if action.method.__name__ == "travel" and action.noun in moves:
+                moves[action.noun] = [v for v in moves[action.noun] if v not in action.verbs]
+                if len(moves[action.noun]) == 0:
+                    moves.pop(action.noun)
+        avail_actions = [a for a in avail_actions if a.method.__name__ != "travel"]
+
+        return moves, avail_actions, cannot_sell
+
     def shop(self, player, tile):
 
         # print random intro text for the shopkeeper
@@ -54,63 +152,22 @@ class ShopKeeper(NPC):
         valid_adj = []
 
         while True:
-            self.stock = []
-
-            # add items to the stock only if they have not been bought by the player
-            for i in self.store_items:
-                if i not in self.bought_items:
-                    self.stock.append(i)
+            self.restock()
 
             # print the stock for the player
             self.print_stock(player)
 
-            # get moves from the TownShop tile
-            moves, avail_actions, descriptors = tile.available_actions(player)
-
-            cannot_sell = {"gold"} # a list of things that cannot be sold
-
-
-            if len(player.available_weapons()) == 1:
-                # if the player only has one weapon, they should
-                # not be able to sell it
-                cannot_sell.add(player.available_weapons()[0].name)
-
-            if len(player.available_bags()) == 1:
-                # players should not be able to sell their only orb container
-                cannot_sell.add(player.available_bags()[0].name)
-
-            for item in self.stock:
-                # add the things the player can buy to moves
-                if item.name in moves:
-                    moves[item.name] = moves[item.name] + ["buy"]
-                else:
-                    moves[item.name] = ["buy"]
-            for item in player.inventory:
-                # add all items in the player's inventory into moves
-                # items that cannot be sold are dealt with later
-                if item.name in moves:
-                    moves[item.name] = moves[item.name] + ["sell"]
-                else:
-                    moves[item.name] = ["sell"]
-
-            # allow the player to leave the shop
-            moves["store"] = ["leave"]
-            moves["shop"] = ["leave"]
-            moves[None] = ["leave", "stop"]
+            moves, avail_actions, cannot_sell = self.menu(player, tile)
 
-            # prevent the player from leaving the shop in other ways
-            # they must stop shopping first
-            for direction in ["east", "west", "north", "south"]:
-                if direction in moves:
-                    moves.pop(direction)
+            console.offer_completions((moves, avail_actions, valid_adj))
 
             if leftover_input == None:
                 # need new input - feed a new line of input to the parser
-                act, leftover_input = parse(input(), moves, valid_adj)
+                act, leftover_input = read_action(input(), moves, valid_adj)
 
             else:
                 # use leftover input as the new input for the parser
-                act, leftover_input = parse(leftover_input, moves, valid_adj)
+                act, leftover_input = read_action(leftover_input, moves, valid_adj)
 
             if act != 0: # act = 0 if the parser returned invalid input
                 if act[0] == "buy":
@@ -127,10 +184,11 @@ class ShopKeeper(NPC):
                                     # add the item to the player's inventory
                                     player.inventory.append(i)
                                     # add the item to bought items
-                                    self.bought_items.add(i)
+                                    self.buy(i)
 
                                     # update the player's gold
                                     player.available_gold().value = player.available_gold().value - i.value
+                                    metrics.shop_transactions.inc("buy", i.name)
 
                                 elif ans == "no":
                                     print("Transaction cancelled.")
@@ -157,7 +215,8 @@ class ShopKeeper(NPC):
                                     # update the player's gold
                                     player.available_gold().value = player.available_gold().value + i.value//2
 
-                                    self.store_items.append(i)
+                                    self.sell(i)
+                                    metrics.shop_transactions.inc("sell", i.name)
 
                                 elif ans == "no":
                                     print("Transaction cancelled.")
@@ -174,7 +233,7 @@ class ShopKeeper(NPC):
 
                         if act[0] in action.verbs and act[1] == action.noun:
                             # implement the action in the player class
-                            player.do_action(action, **action.kwargs)
+                            player.do_action(action)
 
                 input("Type any key to continue shopping.")
 
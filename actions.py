@@ -1,5 +1,9 @@
+from types import MappingProxyType
+
+import player
 from player import Player
 import tiles
+import world
 
 # Implements wrapper actions for all possible actions in the form of classes.
 # The parent class is Action(), and all other actions are based off of this
@@ -17,18 +21,64 @@ import tiles
 # Note: if an action is changed, it must also be changed in player.py
 # and in tiles.py in any rooms that call that action.
 
+# Actions can't be changed once they are made, so the same action can be
+# offered every turn instead of making a new one each time. The rooms get
+# them from template(), which keeps one of each for as long as the map
+# doesn't change. Anything that depends on the player's command (like the
+# weapon in "attack goblin with sword") is passed when the action is called,
+# not stored in the action.
+
+_templates = dict() # (action class, arguments): action
+_templates_version = None # the world.version the templates were made for
+# the arguments include items (each potion, each item bought in the shop...),
+# which would be kept alive for as long as the world is, so the pool is
+# emptied when it gets this big, the same way as the parser's grammar cache
+max_templates = 4096
+
+def template(action_class, *args, **kwargs):
+    """Returns the shared action of the given class with the given
+    arguments, making it the first time it is asked for. The arguments must
+    be hashable (rooms, enemies and items are compared by identity), and
+    given in the same order each time."""
+    global _templates_version
+    if _templates_version != world.version:
+        # the rooms the actions refer to have been replaced
+        _templates.clear()
+        _templates_version = world.version
+
+    key = (action_class, args, tuple(kwargs.items()))
+    action = _templates.get(key)
+    if action is None:
+        if len(_templates) >= max_templates:
+            _templates.clear()
+        action = _templates[key] = action_class(*args, **kwargs)
+    return action
+
 class Action():
     """The basic or parent class for all actions.
     All actions have:
         method: an associated method in player.py
         noun: the object or thing to which the action is applied
         verbs: a list of the acceptable verbs to call this action
-        kwargs: the keyword arguments needed to call the method in player.py"""
+        kwargs: the keyword arguments needed to call the method in player.py
+        args: the same arguments, in the order the method takes them
+    Actions are shared (see template), so none of these can be changed."""
+    __slots__ = ("method", "noun", "verbs", "kwargs", "args")
+
     def __init__(self, method, verbs, noun, **kwargs):
-        self.method = method
-        self.noun = noun # the noun to apply the action to
-        self.verbs = verbs
-        self.kwargs = kwargs
+        set_attribute = super().__setattr__
+        set_attribute("method", method)
+        set_attribute("noun", noun) # the noun to apply the action to
+        set_attribute("verbs", tuple(verbs))
+        set_attribute("kwargs", MappingProxyType(kwargs))
+        # checks the arguments against the method, and adds the class to
+        # Player.do_action's dispatch table
+        names = player.register(type(self), method, kwargs)
+        set_attribute("args", tuple(kwargs[name] for name in names))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("actions are shared and can't be changed; pass "
+                             "arguments for one call to player.do_action instead")
 
     def __str__(self):
         """Allow printing of the verb and noun pairs, for convenience.
@@ -39,11 +89,13 @@ class Action():
     def add_actions(self):
         """Used to add an action to the dictionary of moves that is passed
         to the parser. The dictionary requires both a noun and a list of
-        verbs."""
-        return self.noun, self.verbs
+        verbs. The list is a copy, so it can be changed."""
+        return self.noun, list(self.verbs)
 
 class MoveNorth(Action):
     """Allows the player to move to an adjacent tile to the north."""
+    __slots__ = ()
+
     def __init__(self):
         super().__init__(method=Player.move_north,
                         verbs=["move", "go", "travel"],
@@ -52,6 +104,8 @@ class MoveNorth(Action):
 
 class MoveSouth(Action):
     """Allows the player to move to an adjacent tile to the south."""
+    __slots__ = ()
+
     def __init__(self):
         super().__init__(method=Player.move_south,
                         verbs=["move", "go", "travel"],
@@ -60,6 +114,8 @@ class MoveSouth(Action):
 
 class MoveEast(Action):
     """Allows the player to move to an adjacent tile to the east."""
+    __slots__ = ()
+
     def __init__(self):
         super().__init__(method=Player.move_east,
                         verbs=["move", "go", "travel"],
@@ -68,21 +124,56 @@ class MoveEast(Action):
 
 class MoveWest(Action):
     """Allows the player to move to an adjacent tile to the west."""
+    __slots__ = ()
+
     def __init__(self):
         super().__init__(method=Player.move_west,
                         verbs=["move", "go", "travel"],
                         noun="west")
 
 
+class Travel(Action):
+    """Moves the player along the shortest route to the nearest landmark of a
+    kind (for example, "travel to shop"), in one go. Only landmarks the
+    player has been to are offered. The intro text of the rooms passed
+    through isn't shown, only that of the room the player stops in.
+
+    Attributes:
+        landmark: the name of the landmark, which is also the noun"""
+    __slots__ = ()
+
+    def __init__(self, landmark):
+        super().__init__(method=Player.travel,
+                        verbs=["travel", "go", "move"],
+                        noun=landmark,
+                        landmark=landmark)
+
+
 class ViewInventory(Action):
     """Prints the player's inventory."""
+    __slots__ = ()
+
     def __init__(self):
         super().__init__(method=Player.print_inventory,
                         verbs=["view", "look"],
                         noun="inventory")
 
+class ViewMap(Action):
+    """Prints the map of the area around the player ("map" or "view map").
+
+    Attributes:
+        noun: "map", or None for the verb on its own"""
+    __slots__ = ()
+
+    def __init__(self, noun="map"):
+        super().__init__(method=Player.show_map,
+                        verbs=["view", "look", "check"] if noun else ["map"],
+                        noun=noun)
+
 class ViewOrbs(Action):
     """Prints the player's orb list in battle."""
+    __slots__ = ()
+
     def __init__(self):
         super().__init__(method=Player.print_orbs,
                         verbs=["view", "look"],
@@ -96,6 +187,8 @@ class PickUp(Action):
         tile: the room in which the item exists (which must be modified when the
             item is taken)
         """
+    __slots__ = ()
+
     def __init__(self, item, tile):
         super().__init__(method=Player.add_loot,
                         verbs=["pick", "take", "grab"],
@@ -112,6 +205,8 @@ class Attack(Action):
         tile: the room in which the enemy exists
         weapon: The weapon to use when attacking the enemy.
                 The weapon can be set to None if no weapon is specified."""
+    __slots__ = ()
+
     def __init__(self, enemy, tile, weapon):
         super().__init__(method=Player.attack,
                         noun=enemy.name,
@@ -124,6 +219,8 @@ class Cast(Action):
     """Used to cast an orb in battle. Orbs can only be cast on the player.
     Attributes:
         orb: the orb to be cast"""
+    __slots__ = ()
+
     def __init__(self, orb):
         super().__init__(method=Player.cast_orb,
                         verbs=["cast", "put"],
@@ -136,6 +233,8 @@ class ChangeWeapon(Action):
 
     Attributes:
         weapon: the weapon to be equipped."""
+    __slots__ = ()
+
     def __init__(self):
         super().__init__(method=Player.choose_weapon,
                         verbs=["change", "choose", "switch"],
@@ -147,6 +246,8 @@ class Look(Action):
 
     Attributes:
         tile: the room to look around in"""
+    __slots__ = ()
+
     def __init__(self, tile, noun):
         super().__init__(tile=tile,
                         method=Player.look,
@@ -159,6 +260,8 @@ class Shop(Action):
 
     Attributes:
         tile: any tile in which a shop exists, in this case TownShop"""
+    __slots__ = ()
+
     def __init__(self, tile):
         super().__init__(method=Player.shop,
                         verbs=["shop"],
@@ -171,6 +274,8 @@ class UsePotion(Action):
     Attributes:
         tile: the current room
         enemy: an enemy being fought"""
+    __slots__ = ()
+
     def __init__(self, potion, tile, enemy):
         super().__init__(method=Player.use_potion,
                         verbs=["use"],
@@ -186,6 +291,8 @@ class Flee(Action):
     Attributes:
         direction: an optional direction in which to flee
         enemy: the enemy to flee from"""
+    __slots__ = ()
+
     def __init__(self, noun, enemy, direction):
         super().__init__(method=Player.flee,
                         verbs=["flee", "run", "escape"],
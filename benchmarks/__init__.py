@@ -0,0 +1,12 @@
+"""Microbenchmarks for the hot paths of the game.
+
+Run them from the top folder of the game:
+    python3 -m benchmarks run -o before.json       run every benchmark
+    python3 -m benchmarks run -k parse             run the ones matching "parse"
+    python3 -m benchmarks list                     list the benchmarks
+    python3 -m benchmarks compare before.json after.json --threshold 10
+    python3 -m benchmarks memory --size 256        measure memory (see memory.py)
+
+The benchmarks are in the bench_*.py files, grouped by what they measure. See
+harness.py for how they are registered and timed.
+"""
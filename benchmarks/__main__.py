@@ -0,0 +1,62 @@
+"""The command line for the benchmarks. See __init__.py for how to use it."""
+
+import argparse
+import os
+import sys
+
+# the game's modules import each other by name, so the top folder of the game
+# has to be on the path however the benchmarks are started
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks import harness, memory
+from benchmarks import bench_parser, bench_world, bench_tiles, bench_player, bench_shop, bench_travel, bench_grid, bench_minimap, bench_timers
+
+arg_parser = argparse.ArgumentParser(prog="python3 -m benchmarks",
+                                     description="Microbenchmarks for the game's hot paths.")
+commands = arg_parser.add_subparsers(dest="command")
+
+run_parser = commands.add_parser("run", help="run the benchmarks")
+run_parser.add_argument("-k", dest="patterns", action="append", metavar="PATTERN",
+                        help="only run the benchmarks whose names contain PATTERN (can be repeated)")
+run_parser.add_argument("-o", "--output", metavar="FILE", help="save the results as JSON to FILE")
+run_parser.add_argument("--repeat", type=int, default=5, help="the number of samples for each benchmark")
+run_parser.add_argument("--min-time", type=float, default=0.05,
+                        help="the shortest time (in seconds) each sample should take")
+
+list_parser = commands.add_parser("list", help="list the benchmarks")
+list_parser.add_argument("-k", dest="patterns", action="append", metavar="PATTERN")
+
+compare_parser = commands.add_parser("compare", help="compare two sets of results")
+compare_parser.add_argument("base", help="the results to compare against")
+compare_parser.add_argument("new", help="the results of the change")
+compare_parser.add_argument("--threshold", type=float, default=10.0,
+                            help="flag benchmarks that got slower by more than this percentage (default 10)")
+
+memory_parser = commands.add_parser("memory", help="measure the memory taken by the game's objects")
+memory_parser.add_argument("--size", type=int, default=256, help="the width and height of the generated map (default 256)")
+memory_parser.add_argument("-o", "--output", metavar="FILE", help="save the results as JSON to FILE")
+
+args = arg_parser.parse_args()
+
+if args.command == "run":
+    results = harness.run(harness.selected(args.patterns), args.repeat, args.min_time)
+    if args.output:
+        harness.save(results, args.output)
+
+elif args.command == "list":
+    for bench in harness.selected(args.patterns):
+        print(bench.name)
+
+elif args.command == "compare":
+    regressions = harness.compare(harness.load(args.base), harness.load(args.new), args.threshold)
+    if regressions:
+        print("\n{} benchmark(s) got more than {}% slower.".format(len(regressions), args.threshold))
+        sys.exit(1)
+
+elif args.command == "memory":
+    results = {"environment": harness.environment(), "memory": memory.run(args.size)}
+    if args.output:
+        harness.save(results, args.output)
+
+else:
+    arg_parser.print_help()
@@ -0,0 +1,41 @@
+"""Benchmarks for the bulk map queries in tilegrid.py, next to the loops over
+world._world they replace. They are only registered if numpy is installed."""
+
+import tilegrid
+import world
+from benchmarks.bench_world import write_map
+from benchmarks.harness import benchmark
+
+size = 256
+
+def load(size):
+    world._world.clear()
+    world.load_tiles(write_map(size))
+
+def enemy_cells_loop():
+    tiles = __import__('tiles')
+    return [p for p, tile in world._world.items() if isinstance(tile, tiles.EnemyRoom)]
+
+def enemy_cells_grid():
+    tiles = __import__('tiles')
+    return tilegrid.cells_of(tilegrid.kinds(tiles.EnemyRoom))
+
+def counts_loop():
+    found = dict()
+    for tile in world._world.values():
+        name = type(tile).__name__
+        found[name] = found.get(name, 0) + 1
+    return found
+
+def setup_case(func):
+    def setup():
+        load(size)
+        return func
+    return setup
+
+if tilegrid.available:
+    benchmark("map queries", "enemy cells, loop, {0}x{0}".format(size))(setup_case(enemy_cells_loop))
+    benchmark("map queries", "enemy cells, grid, {0}x{0}".format(size))(setup_case(enemy_cells_grid))
+    benchmark("map queries", "room counts, loop, {0}x{0}".format(size))(setup_case(counts_loop))
+    benchmark("map queries", "room counts, grid, {0}x{0}".format(size))(setup_case(tilegrid.counts))
+    benchmark("map queries", "neighbour masks, grid, {0}x{0}".format(size))(setup_case(tilegrid.neighbour_masks))
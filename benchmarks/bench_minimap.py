@@ -0,0 +1,43 @@
+"""Benchmarks for drawing the player's map: showing it again when nothing
+has changed, and after the player has visited a new room. Neither should get
+slower as the map gets bigger."""
+
+import minimap
+import world
+from benchmarks.bench_travel import loaded
+from benchmarks.harness import benchmark
+from player import Player
+
+sizes = [16, 256]
+
+def explored_player(size):
+    """Returns a player at the middle of a generated map who has visited
+    every room around them."""
+    loaded(size)
+    player = Player()
+    player.location_x, player.location_y = size // 2, size // 2
+    for y in range(size // 2 - minimap.radius_y, size // 2 + minimap.radius_y + 1):
+        for x in range(size // 2 - minimap.radius_x, size // 2 + minimap.radius_x + 1):
+            if world.tile_exists(x, y):
+                player.visit(x, y)
+    return player
+
+def cached_case(size):
+    def setup():
+        player = explored_player(size)
+        return lambda: player.minimap.render(player.location_x, player.location_y)
+    return setup
+
+def changed_case(size):
+    def setup():
+        player = explored_player(size)
+        x, y = player.location_x, player.location_y
+        def render():
+            world.tile_changed(x, y) # as if an enemy in this row was killed
+            player.minimap.render(x, y)
+        return render
+    return setup
+
+for size in sizes:
+    benchmark("minimap.render", "unchanged, {}x{} map".format(size, size))(cached_case(size))
+    benchmark("minimap.render", "one row changed, {}x{} map".format(size, size))(changed_case(size))
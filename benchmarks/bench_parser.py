@@ -0,0 +1,48 @@
+"""Benchmarks for parser.parse across the shapes of input players type."""
+
+import grammar
+import parser
+import tiles
+from benchmarks.fixtures import load_standard_map, tile_of, equipped_player, standing_in
+from benchmarks.harness import benchmark
+
+# (case, input), parsed against the salamander's room mid battle, which has
+# the most nouns and verbs of any room
+shapes = [
+    ("verb only", "look"),
+    ("verb and noun", "attack salamander"),
+    ("verb, noun and preposition", "attack salamander with sword"),
+    ("adjectives", "look at the small red salamander"),
+    ("typos", "atack salamnder wiht swrod"),
+    ("chained with and", "look and view inventory and cast firorb and attack salamander"),
+    ("unknown verb", "dance wildly"),
+    ("flavour text", "thank you"),
+    ("long nonsense", " ".join(["salamander sword with at the"] * 10)),
+]
+
+def salamander_room():
+    """Returns the moves and descriptors of the salamander's room."""
+    load_standard_map()
+    tile = tile_of(tiles.SalamanderRoom)
+    player = standing_in(equipped_player(), tile)
+    moves, avail_actions, descriptors = tile.available_actions(player)
+    return moves, descriptors
+
+def parse_case(line):
+    def setup():
+        moves, descriptors = salamander_room()
+        return lambda: parser.parse(line, moves, descriptors)
+    return setup
+
+for case, line in shapes:
+    benchmark("parser.parse", case)(parse_case(line))
+
+@benchmark("parser.parse", "verb and noun, grammar not cached")
+def parse_cold():
+    # the first command typed after the room changes pays for compiling the
+    # room's grammar
+    moves, descriptors = salamander_room()
+    def parse():
+        grammar._grammars.clear()
+        parser.parse("attack salamander", moves, descriptors)
+    return parse
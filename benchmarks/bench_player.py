@@ -0,0 +1,105 @@
+"""Benchmarks for battles: a round of Player.attack and Player.enemy_cast,
+and a round of battle run through Player.do_action, as the game loop does."""
+
+import random
+
+import actions
+import enemies
+import metrics
+import items
+import tiles
+from benchmarks.fixtures import load_standard_map, tile_of, equipped_player, standing_in
+from benchmarks.harness import benchmark
+
+def battle(tile_class, enemy_id):
+    """Returns a player with a sword and an orb cast on it, standing in a
+    room with a fresh enemy that can't be killed."""
+    random.seed(0) # so that every run fights the same battle
+    load_standard_map()
+    tile = tile_of(tile_class)
+    tile.enemy = enemies.spawn(enemy_id)
+    tile.enemy.orb_list = []
+    player = standing_in(equipped_player(), tile)
+    player.choose_best_bag()
+    player.weapon = player.available_weapons()[-1]
+    player.weapon.orb = items.catalog.shared("firorb")
+    return player, tile
+
+def attack_case(tile_class, enemy_id):
+    def setup():
+        player, tile = battle(tile_class, enemy_id)
+        enemy = tile.enemy
+
+        def attack():
+            # neither side ever dies, so every call is a middle round of a battle
+            player.hp = 100
+            enemy.hp = 10 ** 9
+            player.attack(enemy, tile)
+        return attack
+    return setup
+
+def enemy_cast_case(tile_class, enemy_id):
+    def setup():
+        player, tile = battle(tile_class, enemy_id)
+        enemy = tile.enemy
+        # a full bag, with one of each kind of orb in turn
+        orbs = [items.Orb.num_to_orb(i % 4 + 1) for i in range(enemy.capacity)]
+
+        def cast():
+            # the enemy casts one of its orbs, so its bag is filled again
+            # each time (this is a small part of the time measured)
+            enemy.orb_list = list(orbs)
+            player.enemy_cast(enemy)
+        return cast
+    return setup
+
+def getattr_do_action(player, action, **kwargs):
+    """Player.do_action as it was before the dispatch table, to compare
+    against: the method is looked up by name and called with **kwargs."""
+    action_method = getattr(player, action.method.__name__)
+    metrics.actions.inc(action.method.__name__)
+    if action_method:
+        action_method(**kwargs)
+
+def dispatch_case(use_table, with_weapon):
+    def setup():
+        player, tile = battle(tiles.SalamanderRoom, "salamander")
+        enemy = tile.enemy
+        action = actions.template(actions.Attack, enemy=enemy, tile=tile, weapon=None)
+        # "attack salamander with sword" passes the weapon for the one call
+        arguments = dict(action.kwargs, weapon="sword") if with_weapon else None
+
+        def attack():
+            player.hp = 100
+            enemy.hp = 10 ** 9
+            if use_table:
+                player.do_action(action, arguments)
+            else:
+                getattr_do_action(player, action, **(arguments or action.kwargs))
+        return attack
+    return setup
+
+def look_case(use_table):
+    # looking around is cheap, so this shows the cost of the dispatch itself
+    def setup():
+        load_standard_map()
+        tile = tile_of(tiles.Road)
+        player = standing_in(equipped_player(), tile)
+        action = actions.template(actions.Look, noun=None, tile=tile)
+        if use_table:
+            return lambda: player.do_action(action)
+        return lambda: getattr_do_action(player, action, **action.kwargs)
+    return setup
+
+benchmark("Player.do_action", "look, dispatch table")(look_case(True))
+benchmark("Player.do_action", "look, getattr and **kwargs")(look_case(False))
+benchmark("Player.do_action", "attack round, dispatch table")(dispatch_case(True, False))
+benchmark("Player.do_action", "attack round, getattr and **kwargs")(dispatch_case(False, False))
+benchmark("Player.do_action", "attack round with weapon, dispatch table")(dispatch_case(True, True))
+benchmark("Player.do_action", "attack round with weapon, getattr and **kwargs")(dispatch_case(False, True))
+
+for tile_class, enemy_id in [(tiles.SalamanderRoom, "salamander"),
+                             (tiles.GoblinRoom, "goblin"),
+                             (tiles.DragonRoom, "dragon")]:
+    benchmark("Player.attack", "round against " + enemy_id)(attack_case(tile_class, enemy_id))
+    benchmark("Player.enemy_cast", enemy_id)(enemy_cast_case(tile_class, enemy_id))
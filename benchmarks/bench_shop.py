@@ -0,0 +1,30 @@
+"""Benchmarks for the shop: rebuilding the ShopKeeper's menu, which happens
+after every command typed in the shop."""
+
+import items
+import tiles
+from NPCs import ShopKeeper
+from benchmarks.fixtures import load_standard_map, tile_of, equipped_player, standing_in
+from benchmarks.harness import benchmark
+
+def shop_case(extra_items):
+    def setup():
+        load_standard_map()
+        tile = tile_of(tiles.TownShop)
+        # a new shopkeeper with a store of its own, so that nothing bought
+        # or sold elsewhere changes the menu
+        tile.NPC = ShopKeeper()
+        player = standing_in(equipped_player(), tile)
+        player.inventory.extend(extra_items())
+        shopkeeper = tile.NPC
+
+        def rebuild():
+            shopkeeper.restock()
+            shopkeeper.menu(player, tile)
+        return rebuild
+    return setup
+
+benchmark("ShopKeeper.menu", "equipped player")(shop_case(lambda: []))
+benchmark("ShopKeeper.menu", "full inventory")(shop_case(
+    lambda: [items.catalog.make("cup") for i in range(20)] + [items.catalog.make("armour"),
+                                                              items.catalog.make("case")]))
@@ -0,0 +1,23 @@
+"""Benchmarks for MapTile.available_actions, for each class of room on the
+standard map. The player stands in the room, part way through the game, so
+that rooms with enemies offer the whole battle menu."""
+
+import tiles
+from benchmarks.fixtures import load_standard_map, tile_of, equipped_player, standing_in
+from benchmarks.harness import benchmark
+
+tile_classes = [tiles.StartingLocation, tiles.PouchRoom, tiles.SalamanderRoom,
+                tiles.Road, tiles.TownSquare, tiles.TownShop, tiles.PlayersHouse,
+                tiles.FindSwordRoom, tiles.GoblinRoom, tiles.ThresholdRoom,
+                tiles.DragonRoom]
+
+def available_actions_case(tile_class):
+    def setup():
+        load_standard_map()
+        tile = tile_of(tile_class)
+        player = standing_in(equipped_player(), tile)
+        return lambda: tile.available_actions(player)
+    return setup
+
+for tile_class in tile_classes:
+    benchmark("MapTile.available_actions", tile_class.__name__)(available_actions_case(tile_class))
@@ -0,0 +1,71 @@
+"""Benchmarks for the timer wheel in timers.py: scheduling events,
+advancing the wheel while thousands of events are waiting, and a tick of the
+real-time mode (see realtime.py) with many battles going on at once."""
+
+import random
+
+import items
+import overlay
+import realtime
+import tiles
+import timers
+from benchmarks.bench_player import battle
+from benchmarks.fixtures import equipped_player, standing_in
+from benchmarks.harness import benchmark
+
+waiting = 10000 # the number of events waiting in the wheel
+
+def nothing():
+    pass
+
+def full_wheel():
+    """A wheel with events spread over the next few thousand ticks."""
+    rng = random.Random(0)
+    wheel = timers.TimerWheel()
+    for i in range(waiting):
+        wheel.schedule(rng.randint(1, 5000), nothing)
+    return wheel
+
+@benchmark("timers", "schedule and cancel an event")
+def schedule_cancel():
+    wheel = full_wheel()
+    def run():
+        wheel.schedule(300, nothing).cancel()
+    return run
+
+@benchmark("timers", "advance one tick, {} events waiting".format(waiting))
+def advance():
+    wheel = full_wheel()
+    def run():
+        # keep the wheel full: put back the events that ran
+        for i in range(wheel.advance()):
+            wheel.schedule(5000, nothing)
+    return run
+
+battles = 1000 # the number of sessions fighting at once
+
+@benchmark("timers", "a round of idle enemy turns, {} sessions".format(battles))
+def idle_battles():
+    wheel = timers.TimerWheel()
+    player, tile = battle(tiles.SalamanderRoom, "salamander")
+    fighting = []
+    for i in range(battles):
+        # each battle is in a session of its own, like on a server, so they
+        # all share the one salamander room
+        overlay.activate(overlay.Overlay())
+        player = standing_in(equipped_player(), tile)
+        player.choose_best_bag()
+        player.weapon = player.available_weapons()[-1]
+        player.weapon.orb = items.catalog.shared("firorb")
+        player.hp = tile.enemy.hp = 10 ** 9 # nobody dies
+        tile.enemy.orb = items.catalog.shared("watorb")
+        idle_enemy = realtime.IdleEnemy(player, wheel)
+        idle_enemy.player_acted()
+        fighting.append(idle_enemy)
+    overlay.activate(None)
+    ticks = realtime.idle_turns * timers.ticks_per_turn
+
+    def run():
+        # every enemy attacks once, in the same tick
+        wheel.advance(ticks)
+    return run
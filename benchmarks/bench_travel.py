@@ -0,0 +1,36 @@
+"""Benchmarks for finding the way with "travel to <landmark>": building a
+distance field, and following one from a room."""
+
+import pathfinding
+import world
+from benchmarks.bench_world import write_map
+from benchmarks.harness import benchmark
+
+sizes = [64, 256]
+
+def loaded(size):
+    """Loads a generated size by size map and returns the position of its
+    StartingLocation."""
+    world._world.clear()
+    world.load_tiles(write_map(size))
+    return world.starting_position
+
+def field_case(size):
+    def setup():
+        loaded(size)
+        def build():
+            pathfinding.invalidate()
+            pathfinding.distance_field("castle")
+        return build
+    return setup
+
+def route_case(size):
+    def setup():
+        x, y = loaded(size)
+        pathfinding.distance_field("castle")
+        return lambda: pathfinding.route("castle", x, y)
+    return setup
+
+for size in sizes:
+    benchmark("pathfinding.distance_field", "{}x{} map".format(size, size))(field_case(size))
+    benchmark("pathfinding.route", "start to castle, {}x{} map".format(size, size))(route_case(size))
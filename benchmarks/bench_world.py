@@ -0,0 +1,40 @@
+"""Benchmarks for world.load_tiles at several map sizes. The larger maps are
+made by mapgen.py."""
+
+import os
+import tempfile
+
+import mapgen
+import world
+from benchmarks.fixtures import map_path
+from benchmarks.harness import benchmark
+
+sizes = [16, 64, 256]
+
+# the generated maps are written here, and removed when the benchmarks finish
+map_dir = tempfile.TemporaryDirectory(prefix="benchmark-maps-")
+
+def write_map(size):
+    """Generates a size by size map in a temporary file and returns its path."""
+    path = os.path.join(map_dir.name, "map{}.txt".format(size))
+    with open(path, "w") as f:
+        mapgen.write_map(f, size, size, seed=size)
+    return path
+
+def load_map(path):
+    def load():
+        world._world.clear()
+        world.load_tiles(path)
+    return load
+
+@benchmark("world.load_tiles", "standard map")
+def load_standard():
+    return load_map(map_path)
+
+def load_case(size):
+    def setup():
+        return load_map(write_map(size))
+    return setup
+
+for size in sizes:
+    benchmark("world.load_tiles", "{}x{} map".format(size, size))(load_case(size))
@@ -0,0 +1,43 @@
+"""Things the benchmarks share: the standard map, players and rooms."""
+
+import os
+
+import items
+import tiles
+import world
+from player import Player
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+map_path = os.path.join(root, "resources", "map.txt")
+
+def load_standard_map():
+    """Loads resources/map.txt into the world, replacing whatever was there."""
+    world._world.clear()
+    world.load_tiles(map_path)
+
+def tile_of(tile_class, player=None):
+    """Returns the first room of the given class on the map that is loaded.
+    The room's intro text is built first (for the player, or a new player),
+    since that is where some rooms decide what the player can look at."""
+    if player is None:
+        player = Player()
+    for tile in world._world.values():
+        if type(tile) == tile_class:
+            tile.intro_text(player)
+            return tile
+    raise LookupError("there is no {} on the map".format(tile_class.__name__))
+
+def equipped_player():
+    """Returns a player part way through the game: with a pouch, a sword,
+    the rock, and a potion of each size."""
+    player = Player()
+    player.inventory.extend([items.catalog.make(item_id) for item_id in
+                             ("pouch", "sword", "cup", "bottle", "jug")])
+    return player
+
+def standing_in(player, tile):
+    """Moves a player into a room (without printing anything) as if they had
+    come from the east."""
+    player.location_x, player.location_y = tile.x, tile.y
+    player.prev_tile = "east"
+    return player
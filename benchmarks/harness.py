@@ -0,0 +1,209 @@
+"""The benchmark harness: registering benchmarks, timing them, saving the
+results as JSON and comparing two sets of results.
+
+A benchmark is a setup function, registered with the benchmark decorator,
+that prepares whatever it needs and returns the function to be timed:
+
+    @benchmark("parse", "simple verb")
+    def parse_look():
+        moves, adj = ...
+        return lambda: parser.parse("look", moves, adj)
+
+The setup isn't timed. The returned function is called in a loop, the number
+of calls per loop being chosen so that each loop takes at least min_time
+seconds, and the loop is repeated to get several samples. As with timeit, the
+garbage collector is turned off while a loop runs, so one benchmark doesn't
+pay for the garbage of another.
+"""
+
+import gc
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import time
+from contextlib import redirect_stdout
+from statistics import mean, median, stdev
+
+# every registered benchmark, in the order they were registered
+registry = []
+
+class Benchmark():
+    """A registered benchmark.
+
+    Attributes:
+        group: what is being measured, eg, "parse"
+        case: which case of it, eg, "simple verb"
+        setup: the function that returns the function to time"""
+    def __init__(self, group, case, setup):
+        self.group = group
+        self.case = case
+        self.setup = setup
+
+    @property
+    def name(self):
+        return "{}: {}".format(self.group, self.case)
+
+def benchmark(group, case):
+    """Registers a setup function as a benchmark."""
+    def register(setup):
+        registry.append(Benchmark(group, case, setup))
+        return setup
+    return register
+
+def selected(patterns):
+    """Returns the registered benchmarks whose names contain any of the
+    patterns, or all of them if there are no patterns."""
+    if not patterns:
+        return list(registry)
+    return [b for b in registry if any(p in b.name for p in patterns)]
+
+def time_loop(func, loops):
+    """Calls func loops times and returns the time taken, in seconds."""
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        started = time.perf_counter()
+        for i in range(loops):
+            func()
+        return time.perf_counter() - started
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+def calibrate(func, min_time):
+    """Returns the number of calls needed for a loop to take at least
+    min_time seconds (1, 2, 5, 10, 20, 50, ...)."""
+    loops = 1
+    while True:
+        for factor in (1, 2, 5):
+            n = loops * factor
+            if time_loop(func, n) >= min_time:
+                return n
+        loops *= 10
+
+def measure(bench, repeat=5, min_time=0.05):
+    """Runs a benchmark. Anything the game prints while it runs is thrown away.
+
+    Returns: a dictionary with the number of calls per loop, the time per call
+        of each loop and the min, median, mean and standard deviation of them,
+        in seconds"""
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        func = bench.setup()
+        gc.collect()
+        loops = calibrate(func, min_time)
+        times = [time_loop(func, loops) / loops for i in range(repeat)]
+
+    return {"group": bench.group,
+            "case": bench.case,
+            "loops": loops,
+            "times": times,
+            "min": min(times),
+            "median": median(times),
+            "mean": mean(times),
+            "stdev": stdev(times) if len(times) > 1 else 0.0}
+
+def git_commit():
+    """Returns the commit the tree is at, or None if git isn't available."""
+    here = os.path.dirname(os.path.abspath(__file__))
+    try:
+        found = subprocess.run(["git", "rev-parse", "HEAD"], cwd=here,
+                               stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    except OSError:
+        return None
+    if found.returncode != 0:
+        return None
+    return found.stdout.decode("utf-8").strip()
+
+def environment():
+    """Returns a description of the machine and the interpreter the
+    benchmarks ran on, saved with the results so that results from different
+    machines aren't mistaken for a regression."""
+    return {"python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "executable": sys.executable,
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "processor": platform.processor(),
+            "cpu_count": os.cpu_count(),
+            "hostname": socket.gethostname(),
+            "commit": git_commit(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S%z")}
+
+def run(benches, repeat=5, min_time=0.05, stream=None):
+    """Runs the benchmarks, printing each result as it comes in.
+
+    Returns: the results, as saved by save"""
+    if stream is None:
+        stream = sys.stdout
+
+    results = {"environment": environment(), "benchmarks": dict()}
+    for bench in benches:
+        found = measure(bench, repeat, min_time)
+        results["benchmarks"][bench.name] = found
+        stream.write("{:<52} {:>12} {:>10} {:>8}\n".format(bench.name, format_time(found["median"]),
+                     "+-{:.1f}%".format(100 * found["stdev"] / found["mean"] if found["mean"] else 0.0),
+                     found["loops"]))
+        stream.flush()
+    return results
+
+def format_time(seconds):
+    """Formats a time per call, eg, "12.3 us"."""
+    if seconds < 1e-3:
+        return "{:.2f} us".format(seconds * 1e6)
+    if seconds < 1:
+        return "{:.2f} ms".format(seconds * 1e3)
+    return "{:.2f} s".format(seconds)
+
+def save(results, path):
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+def load(path):
+    with open(path) as f:
+        return json.load(f)
+
+def compare(base, new, threshold=10.0, stream=None):
+    """Compares the median time of each benchmark in two sets of results.
+
+    Args:
+        base: the results to compare against (eg, from the main branch)
+        new: the results of the change being measured
+        threshold: how much slower (in percent) a benchmark has to get to be
+            flagged as a regression
+
+    Returns: the names of the benchmarks that regressed"""
+    if stream is None:
+        stream = sys.stdout
+
+    for key in ("python", "implementation", "machine", "hostname"):
+        if base["environment"].get(key) != new["environment"].get(key):
+            stream.write("warning: the results are from different environments ({}: {} and {})\n".format(
+                key, base["environment"].get(key), new["environment"].get(key)))
+
+    regressions = []
+    stream.write("{:<52} {:>12} {:>12} {:>9}\n".format("benchmark", "base", "new", "change"))
+    for name in sorted(set(base["benchmarks"]) | set(new["benchmarks"])):
+        if name not in base["benchmarks"] or name not in new["benchmarks"]:
+            which = "base" if name not in base["benchmarks"] else "new"
+            stream.write("{:<52} (not in the {} results)\n".format(name, which))
+            continue
+
+        before = base["benchmarks"][name]["median"]
+        after = new["benchmarks"][name]["median"]
+        change = 100 * (after - before) / before if before else 0.0
+
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        elif change < -threshold:
+            flag = "  faster"
+
+        stream.write("{:<52} {:>12} {:>12} {:>+8.1f}%{}\n".format(name, format_time(before),
+                     format_time(after), change, flag))
+
+    return regressions
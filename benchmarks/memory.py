@@ -0,0 +1,103 @@
+"""Memory benchmarks: how much memory the game's objects take, measured with
+tracemalloc.
+
+    -a large generated world: the memory held by the tiles (and the enemies
+     and items in them) after world.load_tiles
+    -a long battle session: the peak memory while the long_battle transcript
+     is played
+    -actions: the memory taken by each action object; several dozen are made
+     every turn
+
+Run them with "python3 -m benchmarks memory". Save the results with -o and
+run the same command on another commit to compare before and after.
+"""
+
+import gc
+import io
+import os
+import random
+import sys
+import tracemalloc
+
+import actions
+import world
+from benchmarks.bench_world import write_map
+from benchmarks.fixtures import root
+
+def traced(func):
+    """Calls func and returns (the memory still allocated by it, the peak
+    memory while it ran), in bytes."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        result = func()
+        gc.collect()
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del result
+    return current - before, peak - before
+
+def world_memory(size):
+    """Returns the bytes held by a loaded size by size generated map."""
+    path = write_map(size)
+    world._world.clear()
+    gc.collect()
+    held, peak = traced(lambda: world.load_tiles(path))
+    return held
+
+def battle_memory():
+    """Returns the peak bytes while the long_battle transcript is played."""
+    import game
+    import replay
+
+    seed, commands = replay.read_transcript(os.path.join(root, "transcripts", "long_battle.txt"))
+    real_stdin, real_stdout = sys.stdin, sys.stdout
+    here = os.getcwd()
+
+    def play():
+        random.seed(seed)
+        sys.stdin = replay.EchoingInput(commands)
+        sys.stdout = io.StringIO()
+        try:
+            game.play()
+        except EOFError:
+            pass
+
+    os.chdir(root) # world.py opens the map relative to the working directory
+    try:
+        held, peak = traced(play)
+    finally:
+        sys.stdin, sys.stdout = real_stdin, real_stdout
+        os.chdir(here)
+    return peak
+
+def action_memory(n=10000):
+    """Returns the bytes taken by each action, on average over n of them."""
+    held, peak = traced(lambda: [actions.MoveNorth() for i in range(n)])
+    return held / n
+
+def run(size=256, stream=None):
+    """Runs the memory benchmarks, printing each result.
+
+    Returns: a dictionary mapping each benchmark's name to bytes"""
+    if stream is None:
+        stream = sys.stdout
+
+    results = dict()
+    for name, func in (("world: {0}x{0} map".format(size), lambda: world_memory(size)),
+                       ("session: long_battle peak", battle_memory),
+                       ("actions: bytes per action", action_memory)):
+        results[name] = func()
+        stream.write("{:<52} {:>14}\n".format(name, format_bytes(results[name])))
+        stream.flush()
+    return results
+
+def format_bytes(n):
+    """Formats a number of bytes, eg, "1.5 MiB"."""
+    if n < 1024:
+        return "{:.0f} B".format(n)
+    if n < 1024 * 1024:
+        return "{:.1f} KiB".format(n / 1024)
+    return "{:.1f} MiB".format(n / 1024 / 1024)
@@ -0,0 +1,126 @@
+"""Tab-completion for commands.
+
+Given a partially typed command and what the current room has to offer (the
+output of the room's available_actions method), returns the commands the
+player is most likely trying to type. This is used by the readline front end
+in console.py, and can be used by anything else that wants to answer on every
+keystroke, like a network server.
+
+All of the work that depends only on the room (sorting the words, ranking
+them) is done once per room state, by a Completer that is cached on the
+room's compiled grammar. Each keystroke after that is a binary search.
+"""
+
+from bisect import bisect_left
+from grammar import compile_grammar
+from parser import verb_to_prep
+
+class PrefixIndex():
+    """A sorted list of words that can find every word starting with a given
+    prefix with a binary search.
+
+    Attributes:
+        words: the words, sorted alphabetically
+        rank: a dictionary mapping each word to its rank (lower is better)"""
+    def __init__(self, ranked_words):
+        """Args:
+            ranked_words: the words, best first"""
+        self.rank = dict()
+        for w in ranked_words:
+            if w not in self.rank:
+                self.rank[w] = len(self.rank)
+        self.words = sorted(self.rank)
+
+    def search(self, prefix):
+        """Returns the words that start with the prefix, best first."""
+        start = bisect_left(self.words, prefix)
+        found = []
+        for i in range(start, len(self.words)):
+            if not self.words[i].startswith(prefix):
+                break
+            found.append(self.words[i])
+
+        found.sort(key=self.rank.get)
+        return found
+
+class Completer():
+    """The completions for one room state.
+
+    Attributes:
+        grammar: the RoomGrammar of the room
+        verbs: a PrefixIndex of the verbs, with the verbs that can be applied
+            to the most things ranked first
+        objects: a dictionary mapping each verb to a PrefixIndex of the words
+            that can follow it (built the first time the verb is completed)"""
+    def __init__(self, grammar):
+        self.grammar = grammar
+        verbs = sorted(grammar.verbs, key=lambda v: (-len(grammar.nouns_for(v)), v))
+        self.verbs = PrefixIndex(verbs)
+        self.objects = dict()
+
+    def following(self, verb):
+        """Returns the PrefixIndex of the words that can follow a verb: the
+        nouns it applies to (in the order the room lists them), then the
+        prepositions that go with it, then the adjectives of its nouns."""
+        if verb not in self.objects:
+            nouns = self.grammar.nouns_for(verb)
+            words = list(nouns)
+            words.extend(sorted(verb_to_prep.get(verb, [])))
+            descriptors = self.grammar.valid_adj or dict()
+            for n in nouns:
+                for a in descriptors.get(n, []):
+                    if a is not None:
+                        words.append(a)
+
+            self.objects[verb] = PrefixIndex(words)
+        return self.objects[verb]
+
+    def complete(self, partial, limit=10):
+        """Returns up to limit complete commands that start with the partial
+        command, best first."""
+        words = partial.lower().split()
+        if partial == "" or partial[-1].isspace():
+            # the last word is finished, so start a new one
+            words.append("")
+
+        if len(words) == 1:
+            return self.verbs.search(words[0])[:limit]
+
+        verb = words[0]
+        typed = set(words[1:-1])
+        start = partial[:len(partial) - len(words[-1])]
+        prepositions = verb_to_prep.get(verb, [])
+        # only one preposition is allowed in a sentence
+        has_prep = len(typed.intersection(prepositions)) > 0
+
+        completions = []
+        for w in self.following(verb).search(words[-1]):
+            if w in typed or (has_prep and w in prepositions):
+                continue
+            completions.append(start + w)
+            if len(completions) == limit:
+                break
+
+        return completions
+
+def completer(avail_nouns, valid_adj):
+    """Returns the Completer for a room state. It is cached on the room's
+    compiled grammar, so it is only built once for each state."""
+    grammar = compile_grammar(avail_nouns, valid_adj)
+    if grammar.completer is None:
+        grammar.completer = Completer(grammar)
+    return grammar.completer
+
+def complete(partial, room_actions, limit=10):
+    """Returns the most likely complete commands for a partially typed one.
+
+    Args:
+        partial: the command typed so far, eg, "att" or "attack gob"
+        room_actions: the (moves, avail_actions, descriptors) returned by the
+            room's available_actions method
+        limit: the maximum number of completions to return
+
+    Returns: a list of complete commands, best first. For example,
+        complete("attack g", ...) -> ["attack goblin"]"""
+    moves, avail_actions, descriptors = room_actions
+    return completer(moves, descriptors).complete(partial, limit)
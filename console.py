@@ -0,0 +1,95 @@
+"""The console front end.
+Reads commands typed by the player, hands them to the parser, and prints
+whatever the parser had to say about them. The parser itself never prints
+(see diagnostics.py), so a different front end, like a server or a bot, can
+deal with the same results in its own way.
+"""
+
+from parser import parse
+import diagnostics
+import completion
+
+try:
+    import readline
+except ImportError:
+    # readline isn't available on every platform. The game works without it,
+    # there just won't be any tab-completion.
+    readline = None
+
+# the available_actions of the room the player is in, for tab-completion
+_room_actions = (dict(), [], dict())
+
+def offer_completions(room_actions):
+    """Sets the room whose commands are offered when the player presses tab.
+
+    Args:
+        room_actions: the (moves, avail_actions, descriptors) returned by the
+            room's available_actions method"""
+    global _room_actions
+    _room_actions = room_actions
+
+def complete_word(text, state):
+    """The readline completer. Returns the state-th completion of the word
+    being typed, or None when there are no more."""
+    line = readline.get_line_buffer()[:readline.get_endidx()]
+    options = completion.complete(line, _room_actions)
+    if state < len(options):
+        # readline only replaces the word being typed
+        return options[state][len(line) - len(text):]
+    return None
+
+def install_completion():
+    """Turns on tab-completion of commands, if readline is available."""
+    if readline is None:
+        return
+    readline.set_completer_delims(" ")
+    readline.set_completer(complete_word)
+    readline.parse_and_bind("tab: complete")
+
+def show(found):
+    """Prints the text of each of the given diagnostics."""
+    for d in found:
+        text = d.render()
+        if text is not None:
+            print(text)
+
+def read_action(line, avail_nouns, valid_adj):
+    """Parses a line of input for the game loop, printing any diagnostics and
+    asking the player for a direction if one is missing.
+
+    Args:
+        line: a single line of user-generated input
+        avail_nouns, valid_adj: see parser.parse
+
+    Returns:
+        0, None: if the input is invalid
+        or
+        (verb, noun), leftover_input: A tuple of the verb and the noun to apply it to, along with any
+        leftover input (which will be fed back into the parser once it has been determined that the first
+        action is valid)
+    """
+    result = parse(line, avail_nouns, valid_adj)
+    question = None # the question asking for a missing direction, if any
+    for d in result.diagnostics:
+        if isinstance(d, diagnostics.MissingDirection):
+            question = d
+
+    if question is not None:
+        show([d for d in result.diagnostics if d is not question])
+
+        # prompt the user to choose a direction
+        direction = input(question.render()).split()
+        if len(direction) == 1 and direction[0] in avail_nouns:
+            return (result.action[0], direction[0]), result.leftover
+
+        print("You can't go '{}'.".format(" ".join(direction)))
+        return 0, result.leftover
+
+    show(result.diagnostics)
+
+    # help, flavour text and blank lines are not errors, but there is no
+    # action to run for them either
+    if result.action is None or result.error is not None:
+        return 0, result.leftover
+
+    return result.action, result.leftover
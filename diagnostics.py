@@ -0,0 +1,371 @@
+"""Contains the diagnostic classes returned by the parser.
+
+The parser never prints anything. Instead, it describes what it found wrong
+with a line of input (or what it has to say about it) with instances of the
+classes below, and leaves it to the front end to decide what to do with them.
+The console front end (console.py) prints them; a server might count them by
+code and send the text to the player; a bot can ignore the text altogether.
+
+Every diagnostic has:
+    code: a short string naming the kind of diagnostic, eg, "unknown_verb"
+    is_error: True if the command was rejected. Help, flavour text, blank
+        lines and the question asking for a direction don't make an action
+        either, but they aren't errors
+    render(): the text to show the player, or None if there is nothing to show
+"""
+
+from abc import ABC, abstractmethod
+
+class Diagnostic(ABC):
+    """The base class for all diagnostics."""
+    code = None
+    is_error = True
+
+    @abstractmethod
+    def render(self):
+        """Returns the text to show the player."""
+
+    def __str__(self):
+        return self.render() or ""
+
+    def __repr__(self):
+        return "<{} {}>".format(type(self).__name__, self.code)
+
+    def __eq__(self, other):
+        return type(self) == type(other) and self.__dict__ == other.__dict__
+
+    def __hash__(self):
+        return hash(self.code)
+
+class Empty(Diagnostic):
+    """There was no input."""
+    code = "empty"
+    is_error = False
+
+    def render(self):
+        return None
+
+class Corrected(Diagnostic):
+    """Some typos in the input were fixed. The action still goes ahead.
+
+    Attributes:
+        sentence: the corrected sentence"""
+    code = "corrected"
+    is_error = False
+
+    def __init__(self, sentence):
+        self.sentence = sentence
+
+    def render(self):
+        return '(You mean "{}".)'.format(self.sentence)
+
+class Confusing(Diagnostic):
+    """The sentence had a stray word in it, but an action could still be found."""
+    code = "confusing"
+    is_error = False
+
+    def render(self):
+        return "Your sentence doesn't make sense."
+
+class AmbiguousWord(Diagnostic):
+    """A typo could have been meant as more than one word.
+
+    Attributes:
+        sentence: the sentence as it was typed
+        options: the words the typo could have been"""
+    code = "ambiguous_word"
+
+    def __init__(self, sentence, options):
+        self.sentence = sentence
+        self.options = options
+
+    def render(self):
+        return "You can't {}! Did you mean {}?".format(self.sentence, " or ".join(self.options))
+
+class BadPreposition(Diagnostic):
+    """The preposition doesn't go with the verb, eg, "use at"."""
+    code = "bad_preposition"
+
+    def __init__(self, verb, preposition):
+        self.verb = verb
+        self.preposition = preposition
+
+    def render(self):
+        return "You can't {} {}!".format(self.verb, self.preposition)
+
+class Nonsense(Diagnostic):
+    """The words are in an order that doesn't make sense, eg, two prepositions.
+
+    Attributes:
+        sentence: the sentence, if it should be repeated back to the player"""
+    code = "nonsense"
+
+    def __init__(self, sentence=None):
+        self.sentence = sentence
+
+    def render(self):
+        if self.sentence is None:
+            return "Your sentence doesn't make sense."
+        return "It's not possible to {}!".format(self.sentence)
+
+class WrongVerb(Diagnostic):
+    """The noun exists, but the verb can't be applied to it.
+
+    Attributes:
+        sentence: the sentence as it was typed
+        noun: the noun
+        verbs: the verbs that can be applied to the noun, or None if the
+            player shouldn't be told"""
+    code = "wrong_verb"
+
+    def __init__(self, sentence, noun, verbs=None):
+        self.sentence = sentence
+        self.noun = noun
+        self.verbs = verbs
+
+    def render(self):
+        if self.verbs is None:
+            return "That action doesn't work with that object."
+
+        # tell the player what they can do with the given noun
+        if len(self.verbs) < 3:
+            return "You can't {}! You can only {} {}.".format(self.sentence,
+                    " or ".join(self.verbs), self.noun)
+        else:
+            return "You can't {}! You can only {} or {} {}.".format(self.sentence,
+                    ", ".join(self.verbs[0:-1]), self.verbs[-1], self.noun)
+
+class BadAdjective(Diagnostic):
+    """The adjectives don't describe the noun.
+
+    Attributes:
+        adjectives: the list of adjectives
+        noun: the noun they were applied to
+        second: True if the noun was the second object of the sentence"""
+    code = "bad_adjective"
+
+    def __init__(self, adjectives, noun, second=False):
+        self.adjectives = adjectives
+        self.noun = noun
+        self.second = second
+
+    def render(self):
+        if self.second:
+            return "There is no {} {}!".format(" ".join(self.adjectives), self.noun)
+        return "The {} is not {}!".format(" ".join(self.adjectives), self.noun)
+
+class BadArticle(Diagnostic):
+    """Two articles in a row, eg, "the a dragon"."""
+    code = "bad_article"
+
+    def __init__(self, first, second):
+        self.first = first
+        self.second = second
+
+    def render(self):
+        return "I don't understand '{} {}'".format(self.first, self.second)
+
+class NotSeen(Diagnostic):
+    """The player tried to look at something that isn't in the room."""
+    code = "not_seen"
+
+    def render(self):
+        return "I don't see anything like that."
+
+class Flavour(Diagnostic):
+    """A response to something like "thanks" that isn't an action.
+
+    Attributes:
+        response: the response"""
+    code = "flavour"
+    is_error = False
+
+    def __init__(self, response):
+        self.response = response
+
+    def render(self):
+        return self.response
+
+class NotHere(Diagnostic):
+    """The action isn't possible in this room."""
+    code = "not_here"
+
+    def __init__(self, sentence):
+        self.sentence = sentence
+
+    def render(self):
+        return "You try to {}, but you can't do that here.".format(self.sentence)
+
+class UnknownVerb(Diagnostic):
+    """The verb isn't recognized at all."""
+    code = "unknown_verb"
+
+    def render(self):
+        return "That is not a valid action."
+
+class NoTile(Diagnostic):
+    """There is no room in the direction the player tried to go."""
+    code = "no_tile"
+
+    def __init__(self, direction):
+        self.direction = direction
+
+    def render(self):
+        return "There is nothing to the {}.".format(self.direction)
+
+class BadDirection(Diagnostic):
+    """The player tried to go somewhere that isn't a direction."""
+    code = "bad_direction"
+
+    def __init__(self, place):
+        self.place = place
+
+    def render(self):
+        return "You can't go to the {}. Try going north, south, east, or west instead.".format(self.place)
+
+def suggestion(verb, nouns):
+    """Returns a sentence telling the player what they can apply a verb to,
+    eg, "You can attack: goblin, dagger." or an empty string if there is
+    nothing."""
+    if not nouns:
+        return ""
+    return " You can {}: {}.".format(verb, ", ".join(nouns))
+
+class NotPossible(Diagnostic):
+    """Any other noun that doesn't make sense with the verb.
+
+    Attributes:
+        verb: the verb, if it can be applied to something else in the room
+        options: the nouns that the verb can be applied to"""
+    code = "not_possible"
+
+    def __init__(self, verb=None, options=None):
+        self.verb = verb
+        self.options = options
+
+    def render(self):
+        return "You can't do that." + suggestion(self.verb, self.options)
+
+class MissingTarget(Diagnostic):
+    """A composite action with no nouns at all, eg, "attack"."""
+    code = "missing_target"
+
+    def __init__(self, verb):
+        self.verb = verb
+
+    def render(self):
+        return "You need a target for your '{}' action!".format(self.verb)
+
+class MissingObject(Diagnostic):
+    """A composite action with only one noun, eg, "use dragon on"."""
+    code = "missing_object"
+
+    def __init__(self, verb, noun, preposition):
+        self.verb = verb
+        self.noun = noun
+        self.preposition = preposition
+
+    def render(self):
+        return "What do you want to {} {} {}?".format(self.verb, self.noun, self.preposition)
+
+class SameObject(Diagnostic):
+    """A composite action applied to one noun twice, eg, "use dragon on dragon"."""
+    code = "same_object"
+
+    def __init__(self, verb, noun, preposition):
+        self.verb = verb
+        self.noun = noun
+        self.preposition = preposition
+
+    def render(self):
+        return "You cannot {} {} {} {}!".format(self.verb, self.noun, self.preposition, self.noun)
+
+class MissingNoun(Diagnostic):
+    """A verb that is valid in the room, but with nothing to apply it to.
+
+    Attributes:
+        verb: the verb
+        options: the nouns that the verb can be applied to"""
+    code = "missing_noun"
+
+    def __init__(self, verb, options=None):
+        self.verb = verb
+        self.options = options
+
+    def render(self):
+        return ("I don't understand. You need to specify something to {}.".format(self.verb)
+                + suggestion(self.verb, self.options))
+
+class MissingDirection(Diagnostic):
+    """A movement verb with no direction, eg, "go". The front end should ask
+    the player for one; render() returns the question."""
+    code = "missing_direction"
+    is_error = False
+
+    def __init__(self, verb):
+        self.verb = verb
+
+    def render(self):
+        return "Where do you want to {}? Please choose a direction: ".format(self.verb)
+
+class Help(Diagnostic):
+    """The help text was asked for."""
+    code = "help"
+    is_error = False
+
+    def render(self):
+        return help_text
+
+class Info(Diagnostic):
+    """The information about the game was asked for."""
+    code = "info"
+    is_error = False
+
+    def render(self):
+        return information_text
+
+help_text = """
+        These commands are accepted in any location and at any time:
+        HELP, HELP ME - prints this list
+        INFO - for information about the game itself
+        LOOK, LOOK AT ___ - to look around the area or at an object
+        VIEW/LOOK (AT) INVENTORY - prints a list of the items you have
+            on your person
+        CHOOSE WEAPON - lets you choose or change your current weapon
+        MAP, VIEW MAP - shows a map of the places around you that you have
+            been to
+        TRAVEL TO ___ - travels the whole way to a place you know about: the
+            shop, the town, the house, the castle or the clearing
+
+        In addition to the above commands, the following commands can also
+        be used in battle:
+
+        ATTACK ENEMY: initiates combat or begins a new round of combat
+            Note: you can also specify a weapon by typing "attack enemy with
+                weapon", where "weapon" is the weapon you wish to use.
+
+        VIEW ORBS: Lets you view a list of the orbs you have summoned up to the
+            current point.
+
+        CAST ORBNAME: Lets you cast a specific orb on your chosen weapon.
+
+        FLEE: Allowing you to flee from battle. A direction (east, west, north,
+            or south) can also be specified.
+
+        If you have purchased healing potions (cup, jug, bottle) from the shop:
+        USE POTIONNAME: For example, "use bottle". Lets you use a potion to heal
+            yourself.
+        USE POTIONNAME ON ENEMY: For example, "use bottle on dragon". Lets you
+            heal the enemy, if you decide for some reason that you want to do
+            that.
+        """
+
+information_text = """
+        *** WELCOME TO OUR TEXT BASED ADVENTURE GAME ***
+        This is a simple text based adventure game with a
+        reasonably intelligent parser.
+
+        Creators: Logan McDonald and Veronica Salm
+
+        Type "help" or "help me" to view a list of basic commands.
+    """
@@ -1,91 +1,107 @@
 # adapted from http://letstalkdata.com/2014/08/how-to-write-a-text-adventure-in-python/
+import json
+import os
+import overlay
 
-class Enemy:
-    """The base enemy class.
+# The kinds of enemies (the dragon, the goblin...) are defined in
+# resources/enemies.json. Each kind is loaded once into an EnemyTemplate, and
+# every enemy of that kind is spawned from it: the enemy only keeps what
+# changes in battle, and reads everything else from its template.
+
+class EnemyTemplate():
+    """A kind of enemy, as defined in resources/enemies.json. Templates are
+    shared by every enemy of their kind, and never change.
     Attributes:
+        -id: the name of the template in the data file
         -name: a string denoting the name of the enemy.
-        -hp: enemy's hitpoints. The enemy dies when these fall to 0.
+        -hp: the hitpoints an enemy of this kind is spawned with.
+        -max_hp: the hitpoints it respawns with, and can be healed up to.
+            The same as hp unless the data file says otherwise.
         -damagemax: maximum damage the enemy can do.
         -damagemin: minimum damage the enemy can do.
         -capacity: amount of orbs the enemy can hold at one time.
         -gold_dropped: amount of gold the enemy drops when killed
         -intelligence: affects which orbs the enemy will choose to cast
-        -orb: current type of the enemy, initialized to None
-        -orb_list: list of orbs the enemy holds, initialized to empty
     """
-    def __init__(self, name, hp, damagemax, damagemin, capacity, gold_dropped,
-                    intelligence, orb=None, orb_list=[]):
+    __slots__ = ("id", "name", "hp", "max_hp", "damagemax", "damagemin", "capacity",
+                 "gold_dropped", "intelligence")
+
+    def __init__(self, id, name, hp, damagemax, damagemin, capacity, gold_dropped,
+                    intelligence, max_hp=None):
+        self.id = id
         self.name = name
         self.hp = hp
+        self.max_hp = hp if max_hp is None else max_hp
         self.damagemax = damagemax
         self.damagemin = damagemin
         self.capacity = capacity
-        self.orb = orb
-        self.orb_list = orb_list
         self.gold_dropped = gold_dropped
         self.intelligence = intelligence
 
-    def is_alive(self):
-        """Returns whether or not the enemy is alive."""
-        return self.hp > 0
+class Enemy:
+    """The enemy class. Enemies are made with spawn().
+    Attributes:
+        -template: the EnemyTemplate of the enemy's kind. name, max_hp,
+            damagemax, damagemin, capacity, gold_dropped and intelligence
+            are read from it.
+        -hp: enemy's hitpoints. The enemy dies when these fall to 0.
+        -orb: current type of the enemy, initialized to None
+        -orb_list: list of orbs the enemy holds, initialized to empty
+    hp, orb and orb_list change in battle, so every session has its own
+    values for them (see overlay.py).
+    """
+    __slots__ = ("template", "_hp", "_orb", "_orb_list")
 
-    def enemy_hp(self, name):
-        """Allows to determine the original hp for an enemy. Used to respawn an
-           enemy and also in healing an enemy."""
-        hp = {"goblin":30, "salamander":12, "dragon":100}
-        if name in hp:
-            return hp[name]
+    hp = overlay.SessionField()
+    orb = overlay.SessionField()
+    orb_list = overlay.SessionField(copy=True)
 
-"""The following are enemy subclasses."""
-class Dragon(Enemy):
-    def __init__(self):
-        super().__init__(name="dragon",
-                         hp=100,
-                         damagemax=25,
-                         damagemin=5,
-                         capacity=5,
-                         intelligence = 7,
-                         gold_dropped = 1000)
+    def __init__(self, template):
+        self.template = template
+        self.hp = template.hp
+        self.orb = None
+        self.orb_list = []
 
-class Goblin(Enemy):
-    def __init__(self):
-        super().__init__(name="goblin",
-                         hp=30,
-                         damagemax=7,
-                         damagemin=3,
-                         capacity=1,
-                         intelligence = 4,
-                         gold_dropped = 10)
+    name = property(lambda self: self.template.name)
+    max_hp = property(lambda self: self.template.max_hp)
+    damagemax = property(lambda self: self.template.damagemax)
+    damagemin = property(lambda self: self.template.damagemin)
+    capacity = property(lambda self: self.template.capacity)
+    gold_dropped = property(lambda self: self.template.gold_dropped)
+    intelligence = property(lambda self: self.template.intelligence)
+
+    def is_alive(self):
+        """Returns whether or not the enemy is alive."""
+        return self.hp > 0
 
-class Salamander(Enemy):
-    def __init__(self):
-        super().__init__(name="salamander",
-                         hp=9,
-                         damagemax=2,
-                         damagemin=1,
-                         capacity=1,
-                         intelligence = 2,
-                         gold_dropped = 5)
+    def respawn(self):
+        """Brings the enemy back at full health, as its template describes."""
+        self.hp = self.template.max_hp
+        self.orb = None
+        self.orb_list = []
 
+templates_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "resources", "enemies.json")
+_templates = None # id: EnemyTemplate, once the data file has been read
 
-"""These two enemy classes are not in use in our version of the game, but could
-easily be added in without modification."""
-class Spider(Enemy):
-    def __init__(self):
-        super().__init__(name="spider",
-                        hp=10,
-                        damagemax=5,
-                        damagemin=1,
-                        capacity=1,
-                        intelligence=3,
-                        gold_dropped=12)
+def templates():
+    """Returns a dictionary mapping id to the template of every kind of
+    enemy, reading resources/enemies.json the first time."""
+    global _templates
+    if _templates is None:
+        with open(templates_path) as f:
+            entries = json.load(f)
+        found = dict()
+        for entry in entries:
+            if entry["id"] in found:
+                raise ValueError("{}: there are two enemies with the id '{}'".format(templates_path, entry["id"]))
+            found[entry["id"]] = EnemyTemplate(**entry)
+        _templates = found
+    return _templates
 
-class Ogre(Enemy):
-    def __init__(self):
-        super().__init__(name="ogre",
-                        hp=50,
-                        damagemax=15,
-                        damagemin=10,
-                        capacity=2,
-                        intelligence=2,
-                        gold_dropped=20)
+def spawn(enemy_id):
+    """Returns a new enemy of the kind with the given id, eg, spawn("goblin")."""
+    try:
+        template = templates()[enemy_id]
+    except KeyError:
+        raise KeyError("there is no enemy with the id '{}' in {}".format(enemy_id, templates_path)) from None
+    return Enemy(template)
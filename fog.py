@@ -0,0 +1,64 @@
+"""Remembers which rooms a player has visited (their fog of war).
+
+Every player has their own VisitedTiles: one bit for each cell of the map, in
+a bytearray. The tiles are shared by every player in the world, so whether a
+player has been somewhere can't be kept on the tile. Setting and testing a
+bit is O(1), and a player on a map with a million cells needs 125 KiB, however
+many rooms they visit.
+
+A cell's id is y * width + x; its bit is bit (id % 8) of byte (id // 8).
+"""
+
+class VisitedTiles():
+    """The set of cells a player has visited.
+
+    Attributes:
+        width, height: the size of the map
+        bits: a bytearray with one bit for each cell, 1 if it was visited"""
+    def __init__(self, width, height, bits=None):
+        self.width = width
+        self.height = height
+        size = (width * height + 7) // 8
+        if bits is None:
+            bits = bytearray(size)
+        elif len(bits) != size:
+            raise ValueError("a {}x{} map needs {} bytes of visited tiles, not {}".format(
+                width, height, size, len(bits)))
+        self.bits = bits
+
+    def tile_id(self, x, y):
+        """Returns the id of the cell at (x, y)."""
+        return y * self.width + x
+
+    def visit(self, x, y):
+        """Marks the cell at (x, y) as visited.
+
+        Returns: True if it hadn't been visited before"""
+        i = y * self.width + x
+        mask = 1 << (i & 7)
+        byte = self.bits[i >> 3]
+        if byte & mask:
+            return False
+        self.bits[i >> 3] = byte | mask
+        return True
+
+    def seen(self, x, y):
+        """Returns True if the cell at (x, y) has been visited."""
+        i = y * self.width + x
+        return bool(self.bits[i >> 3] & (1 << (i & 7)))
+
+    def __contains__(self, position):
+        return self.seen(*position)
+
+    def __len__(self):
+        """Returns the number of cells visited."""
+        return sum(bin(byte).count("1") for byte in self.bits)
+
+    def to_bytes(self):
+        """Returns the visited cells as bytes, for a save file."""
+        return bytes(self.bits)
+
+    @classmethod
+    def from_bytes(cls, width, height, data):
+        """Makes a VisitedTiles from the bytes returned by to_bytes."""
+        return cls(width, height, bytearray(data))
@@ -1,7 +1,18 @@
+import argparse
+import random
+import sys
+
 import world
 from player import Player
-from parser import parse
+from console import read_action
+import console
 import actions
+import instrumentation
+import metrics
+import overlay
+import profiling
+import realtime
+import timers
 
 # This file contains the main game loop and is the main loction from where the
 # parser is called.
@@ -21,77 +32,144 @@ defeat_text = """
         You lose... better luck next time!"""
 
 
-def play():
-    world.load_tiles()
+def play(clock=None):
+    """Plays a game, until the player wins or dies.
+    Args:
+        clock: a realtime.Clock to read the player's input with, in the
+            real-time mode. None for the normal game, where the input is read
+            with input() and each turn is one tick of the timer wheel."""
+    world.load() # only the first session loads the map
+    # the session's changes to the world are kept in its own overlay, so
+    # the tiles can be shared (see overlay.py)
+    session = overlay.Overlay()
+    overlay.activate(session)
     player = Player() # create an instance of the Player class
+    if clock is not None:
+        idle_enemy = realtime.IdleEnemy(player, clock=clock)
+    console.install_completion() # lets the player press tab to complete commands
+    metrics.sessions.inc()
 
     #These lines load the starting room and display its intro text
     room = world.tile_exists(player.location_x, player.location_y)
-    print(room.intro_text())
+    player.enter(room)
 
     leftover_input = None # initially None as the parser has not yet been called
 
-    while player.is_alive() and not player.victory:
-        implemented_action = True
-        room = world.tile_exists(player.location_x, player.location_y)
-
-        # Check again since the room could have changed the player's state
-        if player.is_alive() and not player.victory:
-
-            # the available_actions method returns three things:
-            # moves: a dictionary of noun:[valid verbs]
-            # available_actions: a list of instances of available action classes
-            # valid_adj: a dictionary of noun:[valid adectives]
-            moves, available_actions, valid_adj = room.available_actions(player)
-
-            if leftover_input == None:
-                # need new input - feed a new line of input to the parser
-                act, leftover_input = parse(input(), moves, valid_adj)
-                # the parser returns any leftover input (split by the keyword
-                # "and") or returns None
-
-            else:
-                # use leftover input as the new input for the parser
-                act, leftover_input = parse(leftover_input, moves, valid_adj)
-
-            if act != 0: # the parser returns 0 if the input was invalid
-                implemented_action = False # used for extra error handling
-                for action in available_actions:
-                    # if the input was valid, act = (verb, nouns)
-                    # where nouns can be None, a single noun, or a list of two nouns
-                    # eg, ("attack", ["dragon", "sword"])
-                    verb = act[0]
-                    noun = act[1]
-                    noun2 = None # the second object is initially set to None
-
-                    if noun is not None:
-                        if len(list(noun)) == 2:
-                            noun = act[1][0]
-                            noun2 = act[1][1]
-
-                    if verb in action.verbs and noun == action.noun:
-                        # if the parsed action matches an available action
-                        implemented_action = True
-                        if noun2 != None:
-                            if verb in need_weapon:
-                                # for example, you attack something with a weapon
-                                # so a weapon is needed
-                                action.kwargs["weapon"] = noun2
-
-                            elif verb in need_enemy:
-                                action.kwargs["enemy"] = noun2
-
-                        # implement the action in the player class
-                        player.do_action(action, **action.kwargs)
-                        break
-
-            if implemented_action == False:
-                # just in case an invalid action somehow passes the parser
-                # it will be caught here
-                if noun != None:
-                    print("You can't {} {}!".format(verb, noun))
+    try:
+        while player.is_alive() and not player.victory:
+            implemented_action = True
+            room = world.tile_exists(player.location_x, player.location_y)
+
+            # Check again since the room could have changed the player's state
+            if player.is_alive() and not player.victory:
+                # each phase of the turn is timed if instrumentation is turned on
+                # (see instrumentation.py). Otherwise these calls do nothing.
+                turn_started = instrumentation.start()
+                chosen = None # the action that is run this turn, if any
+                metrics.turns.inc()
+
+                # the available_actions method returns three things:
+                # moves: a dictionary of noun:[valid verbs]
+                # available_actions: a list of instances of available action classes
+                # valid_adj: a dictionary of noun:[valid adectives]
+                moves, available_actions, valid_adj = room.available_actions(player)
+                console.offer_completions((moves, available_actions, valid_adj))
+                instrumentation.stop("available_actions", turn_started, room)
+
+                if leftover_input == None:
+                    # need new input - feed a new line of input to the parser
+                    started = instrumentation.start()
+                    if clock is None:
+                        line = input()
+                    else:
+                        # the clock ticks while the player thinks, and the
+                        # enemy may attack in the meantime
+                        line = clock.read_line(lambda: not player.is_alive())
+                    instrumentation.stop("input", started, room)
+                    if line is None: # the player was killed while idle
+                        continue
+
+                    # waiting for the player doesn't count as part of the turn
+                    if turn_started is not None:
+                        turn_started += instrumentation.start() - started
+
+                    started = instrumentation.start()
+                    act, leftover_input = read_action(line, moves, valid_adj)
+                    instrumentation.stop("parse", started, room)
+                    # the parser returns any leftover input (split by the keyword
+                    # "and") or returns None
+
                 else:
-                    print("You can't do that.")
+                    # use leftover input as the new input for the parser
+                    started = instrumentation.start()
+                    act, leftover_input = read_action(leftover_input, moves, valid_adj)
+                    instrumentation.stop("parse", started, room)
+
+                if act != 0: # the parser returns 0 if the input was invalid
+                    implemented_action = False # used for extra error handling
+                    started = instrumentation.start()
+                    for action in available_actions:
+                        # if the input was valid, act = (verb, nouns)
+                        # where nouns can be None, a single noun, or a list of two nouns
+                        # eg, ("attack", ["dragon", "sword"])
+                        verb = act[0]
+                        noun = act[1]
+                        noun2 = None # the second object is initially set to None
+
+                        if noun is not None:
+                            if len(list(noun)) == 2:
+                                noun = act[1][0]
+                                noun2 = act[1][1]
+
+                        if verb in action.verbs and noun == action.noun:
+                            # if the parsed action matches an available action
+                            implemented_action = True
+                            # actions are shared templates (see actions.py), so
+                            # the second object is added to a copy of the
+                            # action's arguments for this call only
+                            arguments = None # the action's own arguments
+                            if noun2 != None:
+                                if verb in need_weapon:
+                                    # for example, you attack something with a weapon
+                                    # so a weapon is needed
+                                    arguments = dict(action.kwargs, weapon=noun2)
+
+                                elif verb in need_enemy:
+                                    arguments = dict(action.kwargs, enemy=noun2)
+
+                            chosen = action
+                            instrumentation.stop("dispatch", started, room, action)
+
+                            # implement the action in the player class
+                            started = instrumentation.start()
+                            player.do_action(action, arguments)
+                            instrumentation.stop("do_action", started, room, action)
+                            break
+
+                if implemented_action == False:
+                    # just in case an invalid action somehow passes the parser
+                    # it will be caught here
+                    if noun != None:
+                        print("You can't {} {}!".format(verb, noun))
+                    else:
+                        print("You can't do that.")
+
+                instrumentation.end_turn(turn_started, room, chosen)
+
+                if clock is None:
+                    # each turn is one tick of the timer wheel, which runs the
+                    # events that are due, like enemies respawning (see timers.py)
+                    timers.wheel.advance()
+                else:
+                    # the clock ticks the wheel; the enemy waits for the player
+                    idle_enemy.player_acted()
+
+    finally:
+        # the session's events (like respawns) must not run in another
+        # session, even if the game ended because the input ran out
+        timers.wheel.cancel_session(session)
+        overlay.activate(None)
+        metrics.sessions.dec()
 
     # once the loop breaks, the game has ended. Print the appropriate text:
     if player.victory:
@@ -101,4 +179,68 @@ def play():
         print(defeat_text)
 
 if __name__ == "__main__":
-    play()
+    arg_parser = argparse.ArgumentParser(description="A text based adventure game.")
+    arg_parser.add_argument("--timings", action="store_true",
+                            help="time each phase of every turn and print the timings "
+                            "when the game ends (or on SIGUSR1)")
+    arg_parser.add_argument("--metrics-file", metavar="PATH",
+                            help="write metrics in the Prometheus text format to PATH "
+                            "every 10 seconds and when the game ends")
+    arg_parser.add_argument("--metrics-port", metavar="PORT", type=int,
+                            help="serve metrics at http://127.0.0.1:PORT/metrics")
+    arg_parser.add_argument("--profile", metavar="FILE", nargs="?", const="",
+                            help="run the session under cProfile and print the time spent "
+                            "in each module; the raw profile is saved to FILE if given")
+    arg_parser.add_argument("--memprofile", action="store_true",
+                            help="trace memory and report the top allocating lines at "
+                            "each room entry and the start and end of each battle")
+    arg_parser.add_argument("--script", metavar="FILE",
+                            help="read the player's commands from FILE instead of the keyboard")
+    arg_parser.add_argument("--seed", type=int,
+                            help="seed the random numbers, so that a script plays the same way every time")
+    arg_parser.add_argument("--realtime", action="store_true",
+                            help="play in real time: enemies attack if you stay idle "
+                            "in a battle for more than a few seconds")
+    args = arg_parser.parse_args()
+
+    if args.seed is not None:
+        random.seed(args.seed)
+    if args.script:
+        sys.stdin = open(args.script)
+
+    if args.timings:
+        instrumentation.enable()
+    if args.metrics_file:
+        metrics.write_periodically(args.metrics_file)
+    if args.metrics_port:
+        metrics.serve(args.metrics_port)
+
+    if args.memprofile:
+        profiling.start_memory()
+
+    clock = None
+    if args.realtime:
+        clock = realtime.start()
+
+    try:
+        if args.profile is not None:
+            profiling.run_profiled(lambda: play(clock), args.profile)
+        else:
+            play(clock)
+
+    except EOFError:
+        # the script (or the player's input) ran out before the game ended
+        print("\nThere are no more commands. The game is over.")
+
+    except world.MapError as e:
+        # the map can't be played, so there is no game
+        print(e, file=sys.stderr)
+        sys.exit(1)
+
+    finally:
+        if args.memprofile:
+            profiling.stop_memory()
+        if args.timings:
+            instrumentation.dump()
+        if args.metrics_file:
+            metrics.write_file(args.metrics_file)
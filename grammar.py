@@ -0,0 +1,356 @@
+"""This is the file for the compiled room grammar.
+The parser is handed two dictionaries by the current room: the nouns and the
+verbs that can be applied to them, and the nouns and the adjectives that
+describe them. Everything the parser needs to know about those dictionaries
+(the set of verbs, the set of adjectives, the spelling index used to correct
+typos) is built once here and reused for as long as the room stays the same.
+"""
+
+# words that are too short to be corrected safely. "go" is one letter away
+# from "no", "to" and "so", so we would rather give the player an error than
+# guess wrong.
+min_correction_length = 3
+
+def edit_distance(a, b, limit=None):
+    """Returns the Damerau-Levenshtein distance between two words: the number
+    of single-letter insertions, deletions, substitutions and swaps of two
+    neighbouring letters needed to turn one word into the other. For example,
+    "atack" -> "attack" and "drit" -> "dirt" are both 1.
+
+    This is the unrestricted form of the distance, which (unlike the simpler
+    "optimal string alignment" form) is a true metric. The BK-tree depends on
+    that.
+
+    If a limit is given, any distance larger than the limit is returned as
+    limit + 1. Only the band of the table within limit of the diagonal is
+    worked out, and the work stops as soon as a whole row is over the limit,
+    so words that are far apart are rejected quickly."""
+    if limit is not None and abs(len(a) - len(b)) > limit:
+        return limit + 1 # every extra letter needs an insertion or deletion
+
+    # the row and column before the start of each word are filled with a
+    # distance larger than any real one, so that they are never chosen.
+    # Cells outside the band are left at that distance too
+    infinity = len(a) + len(b) + 1
+    band = infinity if limit is None else limit
+    d = [[infinity] * (len(b) + 2)]
+    for i in range(len(a) + 1):
+        d.append([infinity, i] + [infinity] * len(b))
+    for j in range(len(b) + 1):
+        d[1][j + 1] = j
+
+    last_row = {} # the last row in which each letter was seen in a
+    for i in range(1, len(a) + 1):
+        letter = a[i - 1]
+        above, row = d[i], d[i + 1]
+        last_col = 0 # the last column in this row where the letters matched
+        row_min = row[1]
+        for j in range(max(1, i - band), min(len(b), i + band) + 1):
+            k = last_row.get(b[j - 1], 0)
+            l = last_col
+            if letter == b[j - 1]:
+                best = above[j] # the letters match: no change
+                last_col = j
+            else:
+                best = above[j] + 1 # substitution
+            if row[j] + 1 < best:
+                best = row[j] + 1 # insertion
+            if above[j + 1] + 1 < best:
+                best = above[j + 1] + 1 # deletion
+            swap = d[k][l] + (i - k - 1) + 1 + (j - l - 1)
+            if swap < best:
+                best = swap
+            row[j + 1] = best
+            if best < row_min:
+                row_min = best
+        last_row[letter] = i
+        # no row has a smaller distance than the rows before it, so once a
+        # row is over the limit the distance is too
+        if row_min > band:
+            return band + 1
+
+    distance = d[len(a) + 1][len(b) + 1]
+    if limit is not None and distance > limit:
+        return limit + 1
+    return distance
+
+def max_distance(word):
+    """Returns how many typos we are willing to correct in a word. Longer
+    words can absorb more mistakes before they start looking like other
+    words."""
+    if len(word) < min_correction_length:
+        return 0
+    elif len(word) < 8:
+        return 1
+    else:
+        return 2
+
+class BKTree():
+    """A Burkhard-Keller tree: a metric index over a set of words.
+
+    Every node stores a word and its children are keyed by their edit distance
+    to that word. Because the edit distance obeys the triangle inequality, a
+    search for words within distance d of a query only has to visit the
+    children whose key is within d of the query's distance to the node. Most
+    of the tree is never looked at, so lookups stay fast as the vocabulary
+    grows."""
+    def __init__(self, words=()):
+        self.root = None # (word, {distance: child})
+        self.size = 0
+        for word in words:
+            self.add(word)
+
+    def add(self, word):
+        """Adds a word to the tree. Words already in the tree are ignored."""
+        if self.root is None:
+            self.root = (word, {})
+            self.size = 1
+            return
+
+        node = self.root
+        while True:
+            d = edit_distance(word, node[0])
+            if d == 0:
+                return # already in the tree
+            if d in node[1]:
+                node = node[1][d]
+            else:
+                node[1][d] = (word, {})
+                self.size += 1
+                return
+
+    def search(self, word, max_dist):
+        """Returns a list of (distance, word) pairs for every word in the tree
+        within max_dist of the given word, closest first."""
+        found = []
+        if self.root is None:
+            return found
+
+        candidates = [self.root]
+        while candidates:
+            node_word, children = candidates.pop()
+            # a distance above max_dist plus the largest child key rules out
+            # the node and all of its children, so nothing past that needs
+            # to be worked out exactly
+            limit = max_dist + max(children, default=0)
+            d = edit_distance(word, node_word, limit)
+            if d <= max_dist:
+                found.append((d, node_word))
+            if d > limit:
+                continue
+
+            # only children in the range [d - max_dist, d + max_dist] can
+            # possibly be close enough to the word
+            for child_d in children:
+                if d - max_dist <= child_d <= d + max_dist:
+                    candidates.append(children[child_d])
+
+        found.sort()
+        return found
+
+    def __len__(self):
+        return self.size
+
+def tokenize(phrase):
+    """Splits a noun or adjective into words the same way the parser splits
+    the player's input: anything that is not a letter or a space is dropped.
+    For example, "devious-looking" -> ["deviouslooking"] and
+    "suit of" -> ["suit", "of"]."""
+    return "".join(c for c in phrase if c.isalpha() or c == " ").lower().split()
+
+class PhraseMatcher():
+    """An Aho-Corasick automaton over words rather than letters.
+
+    The automaton is built from a set of phrases (multi-word nouns like
+    "healing potion" and adjectives like "suit of") and finds every one of them
+    in a single pass over the words of a sentence, no matter how many phrases
+    the room has. Each state remembers the longest phrase that ends there, and
+    each failure link points to the longest suffix of the words read so far
+    that is also the start of some phrase."""
+    def __init__(self, phrases):
+        """Args:
+            phrases: a dictionary mapping tuples of words to the phrase they
+                spell. For example, {("suit", "of"): "suit of"}"""
+        self.goto = [{}] # state -> {word: next state}
+        self.fail = [0]
+        self.output = [None] # state -> (number of words, phrase) or None
+
+        for words, phrase in phrases.items():
+            state = 0
+            for word in words:
+                if word not in self.goto[state]:
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append(None)
+                    self.goto[state][word] = len(self.goto) - 1
+                state = self.goto[state][word]
+            self.output[state] = (len(words), phrase)
+
+        # set the failure links breadth first, so that the link of every
+        # shorter prefix is ready before it is needed
+        queue = list(self.goto[0].values())
+        while queue:
+            state = queue.pop(0)
+            for word, child in self.goto[state].items():
+                queue.append(child)
+
+                f = self.fail[state]
+                while f and word not in self.goto[f]:
+                    f = self.fail[f]
+                self.fail[child] = self.goto[f].get(word, 0)
+
+                if self.output[child] is None:
+                    # a phrase that ends at the failure state also ends here
+                    self.output[child] = self.output[self.fail[child]]
+
+    def segment(self, words):
+        """Joins the words of every phrase found in the list into one word.
+        Where phrases overlap, the one that starts first (and then the longest)
+        wins. For example, with the phrase "suit of":
+        ["suit", "of", "armour"] -> ["suit of", "armour"]"""
+        matches = [] # (start, end, phrase)
+        state = 0
+        for i in range(len(words)):
+            while state and words[i] not in self.goto[state]:
+                state = self.fail[state]
+            state = self.goto[state].get(words[i], 0)
+
+            if self.output[state] is not None:
+                length, phrase = self.output[state]
+                matches.append((i + 1 - length, i + 1, phrase))
+
+        if len(matches) == 0:
+            return words
+
+        matches.sort(key=lambda m: (m[0], m[0] - m[1]))
+        segmented = []
+        position = 0
+        for start, end, phrase in matches:
+            if start >= position:
+                segmented.extend(words[position:start])
+                segmented.append(phrase)
+                position = end
+        segmented.extend(words[position:])
+
+        return segmented
+
+class RoomGrammar():
+    """Everything the parser needs to know about the current room.
+
+    Attributes:
+        avail_nouns: a dictionary of nouns and the verbs that can be applied to them
+        valid_adj: a dictionary of nouns and the adjectives that describe them
+        verbs: a set of all of the verbs that can be used in the room
+        adjectives: a set of all of the adjectives that can be used in the room
+        verb_index: a BK-tree over the verbs, used to correct typos in verbs
+        words: a set of every single word that appears in the nouns and
+            adjectives, as the parser would split them
+        phrases: a PhraseMatcher for the nouns and adjectives that are more
+            than one word long, or that the parser would spell differently
+        word_index: a BK-tree over the words, used to correct typos in the
+            objects of a sentence
+        verb_nouns: a dictionary mapping each verb to the list of nouns it can
+            be applied to (the reverse of avail_nouns), used to suggest what
+            the player can do with a verb"""
+    def __init__(self, avail_nouns, valid_adj):
+        self.avail_nouns = avail_nouns
+        self.valid_adj = valid_adj
+
+        # create a set of valid adjectives based on the given room
+        self.adjectives = set()
+        for n in valid_adj:
+            for a in valid_adj[n]:
+                if a is not None:
+                    self.adjectives.add(a)
+
+        # create a set of valid verbs based on the given room
+        self.verbs = set()
+        for n in avail_nouns:
+            for v in avail_nouns[n]:
+                self.verbs.add(v)
+
+        # these commands can be used in any location
+        self.verbs.add("help")
+        self.verbs.add("info")
+
+        # the reverse index, so that suggestions don't need to search every noun
+        self.verb_nouns = dict()
+        for n in avail_nouns:
+            if n is None:
+                continue
+            for v in avail_nouns[n]:
+                if v not in self.verb_nouns:
+                    self.verb_nouns[v] = [n]
+                elif n not in self.verb_nouns[v]:
+                    self.verb_nouns[v].append(n)
+
+        # split every noun and adjective into words. Anything that the player
+        # cannot type as a single word has to be matched as a phrase
+        self.words = set()
+        phrases = dict()
+        for phrase in self.adjectives.union(avail_nouns):
+            if phrase is None:
+                continue
+            words = tuple(tokenize(phrase))
+            self.words.update(words)
+            if len(words) > 0 and words != (phrase,):
+                phrases[words] = phrase
+        self.phrases = PhraseMatcher(phrases)
+
+        self.verb_index = BKTree(self.verbs)
+        self.word_index = BKTree(self.words)
+
+        # the tab-completion index is only built if something asks for it
+        # (see completion.completer)
+        self.completer = None
+
+    def nouns_for(self, verb):
+        """Returns the list of nouns that the verb can be applied to in this
+        room. The list is empty if the verb can't be used on anything."""
+        return self.verb_nouns.get(verb, [])
+
+    def correct(self, word, verb=False):
+        """Finds the words in the room that the given word was probably meant
+        to be.
+
+        Args:
+            word: a word that the parser did not recognize
+            verb: True if the word is in the verb position of the sentence
+
+        Returns: a list of the closest matching words. The list is empty if
+            nothing is close enough and has more than one entry if the word
+            is ambiguous (for example "hat" could be "bat" or "cat")."""
+        index = self.verb_index if verb else self.word_index
+        matches = index.search(word, max_distance(word))
+
+        if len(matches) == 0:
+            return []
+
+        best = matches[0][0]
+        return [w for d, w in matches if d == best]
+
+# compiled grammars for the rooms we have seen recently, keyed by the contents
+# of the dictionaries they were compiled from. Rooms rebuild their dictionaries
+# every turn, so we cannot key by the dictionaries themselves.
+_grammars = {}
+max_cached_grammars = 256
+
+def grammar_key(avail_nouns, valid_adj):
+    """Returns a hashable snapshot of the two dictionaries given to the parser."""
+    nouns = tuple((n, tuple(avail_nouns[n])) for n in avail_nouns)
+    adj = tuple((n, tuple(valid_adj[n])) for n in valid_adj)
+    return nouns, adj
+
+def compile_grammar(avail_nouns, valid_adj):
+    """Returns the RoomGrammar for the given dictionaries, compiling it only if
+    the room has changed since the last time we saw it."""
+    key = grammar_key(avail_nouns, valid_adj)
+    grammar = _grammars.get(key)
+
+    if grammar is None:
+        if len(_grammars) >= max_cached_grammars:
+            _grammars.clear()
+        grammar = RoomGrammar(avail_nouns, valid_adj)
+        _grammars[key] = grammar
+
+    return grammar
@@ -0,0 +1,239 @@
+"""Optional timing of the phases of each turn of the game loop.
+
+When instrumentation is turned on (see enable), game.play times each phase of
+every turn:
+    input: waiting for the player to type a command
+    available_actions: building the room's moves, actions and descriptors
+    parse: parsing the command
+    dispatch: finding the available action that matches the parsed command
+    do_action: running the action in the Player class
+    output: writing text to the screen (this time is also counted in whichever
+        phase did the writing)
+    turn: the whole turn, from the start of available_actions to the end
+
+Each timing is recorded in a histogram for the phase, and again in histograms
+tagged with the room's class (eg, tile=EnemyRoom) and, for the phases after
+parsing, with the name of the action's method (eg, action=attack). The
+histograms can be printed at any time with dump(), or by sending the process
+SIGUSR1 where signals are available.
+
+When instrumentation is off, each phase costs one function call that returns
+immediately.
+"""
+
+import math
+import signal
+import sys
+import threading
+from time import perf_counter
+
+enabled = False
+
+# the histograms, keyed by (phase, tag). The tag is None for the histogram of
+# every timing in the phase, or a string like "tile=GoblinRoom".
+_histograms = {}
+
+# held while the histograms are written or copied, since the metrics server
+# (see metrics.py) reads them from its own thread. It is re-entrant because
+# the SIGUSR1 handler can dump them in the middle of record()
+lock = threading.RLock()
+
+class Histogram():
+    """A histogram of durations, with buckets a quarter of a power of two
+    wide (so every bucket is about 19% wider than the one before it). This
+    keeps percentiles accurate to within a bucket whether a phase takes a
+    microsecond or several seconds, using a few dozen buckets at most.
+
+    Attributes:
+        buckets: a dictionary mapping bucket number to the number of timings
+        count: the number of timings
+        total: the sum of the timings, in seconds
+        max: the longest timing, in seconds"""
+    resolution = 4 # buckets per power of two
+
+    def __init__(self):
+        self.buckets = dict()
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds):
+        """Adds a timing to the histogram."""
+        micros = seconds * 1e6
+        if micros < 1:
+            bucket = 0
+        else:
+            bucket = int(math.log2(micros) * self.resolution) + 1
+
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def merge(self, other):
+        """Adds all of the timings in another histogram to this one."""
+        for bucket, n in other.buckets.items():
+            self.buckets[bucket] = self.buckets.get(bucket, 0) + n
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def copy(self):
+        """Returns a new histogram with the same timings."""
+        h = Histogram()
+        h.merge(self)
+        return h
+
+    def bucket_limit(self, bucket):
+        """Returns the upper limit of a bucket, in seconds."""
+        if bucket == 0:
+            return 1e-6
+        return 2 ** (bucket / self.resolution) * 1e-6
+
+    def percentile(self, p):
+        """Returns the duration (in seconds) that p percent of the timings
+        were shorter than, to within the width of a bucket."""
+        if self.count == 0:
+            return 0.0
+
+        wanted = self.count * p / 100
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= wanted:
+                return min(self.bucket_limit(bucket), self.max)
+        return self.max
+
+    def mean(self):
+        """Returns the average timing, in seconds."""
+        if self.count == 0:
+            return 0.0
+        return self.total / self.count
+
+def histogram(phase, tag=None):
+    """Returns the histogram for a phase and tag, creating it if needed."""
+    key = (phase, tag)
+    if key not in _histograms:
+        _histograms[key] = Histogram()
+    return _histograms[key]
+
+def histograms():
+    """Returns a dictionary of copies of all of the histograms, keyed by
+    (phase, tag). The copies are taken together under the lock, so they
+    don't change while they are read."""
+    with lock:
+        return {key: h.copy() for key, h in _histograms.items()}
+
+def reset():
+    """Throws away every timing recorded so far."""
+    with lock:
+        _histograms.clear()
+
+def start():
+    """Returns the time a phase started, or None if instrumentation is off.
+    Pass the result to stop when the phase is over."""
+    if enabled:
+        return perf_counter()
+    return None
+
+def stop(phase, started, tile=None, action=None):
+    """Records the time since started (as returned by start) for a phase.
+
+    Args:
+        phase: the name of the phase, eg, "parse"
+        started: the result of start(); nothing is recorded if it is None
+        tile: the room the player is in, if known
+        action: the action being run, if known"""
+    if started is None:
+        return
+    elapsed = perf_counter() - started
+    record(phase, elapsed, tile, action)
+
+def record(phase, elapsed, tile=None, action=None):
+    """Records a timing (in seconds) for a phase in all of its histograms."""
+    with lock:
+        histogram(phase).record(elapsed)
+        if tile is not None:
+            histogram(phase, "tile=" + type(tile).__name__).record(elapsed)
+        if action is not None:
+            histogram(phase, "action=" + action.method.__name__).record(elapsed)
+
+class TimedWriter():
+    """Wraps a file (normally sys.stdout) and adds up the time spent writing
+    to it, so that the output of a turn can be timed as its own phase."""
+    def __init__(self, stream):
+        self.stream = stream
+        self.elapsed = 0.0
+
+    def write(self, text):
+        started = perf_counter()
+        n = self.stream.write(text)
+        self.elapsed += perf_counter() - started
+        return n
+
+    def flush(self):
+        started = perf_counter()
+        self.stream.flush()
+        self.elapsed += perf_counter() - started
+
+    def take(self):
+        """Returns the time spent writing since the last call, and starts
+        counting again from zero."""
+        elapsed = self.elapsed
+        self.elapsed = 0.0
+        return elapsed
+
+    def __getattr__(self, name):
+        # anything else (fileno, encoding, isatty...) goes straight to the file
+        return getattr(self.stream, name)
+
+_writer = None
+
+def end_turn(started, tile=None, action=None):
+    """Records the output and the total time of a turn that started at
+    started (as returned by start)."""
+    if started is None:
+        return
+    if _writer is not None:
+        record("output", _writer.take(), tile, action)
+    stop("turn", started, tile, action)
+
+def dump(stream=None):
+    """Prints a table of every histogram: the number of timings, the mean,
+    the 50th, 90th and 99th percentiles and the maximum, in milliseconds."""
+    if stream is None:
+        stream = sys.stderr
+
+    stream.write("{:<20} {:<28} {:>8} {:>9} {:>9} {:>9} {:>9} {:>9}\n".format(
+        "phase", "tag", "count", "mean", "p50", "p90", "p99", "max"))
+
+    found = histograms()
+    for phase, tag in sorted(found, key=lambda k: (k[0], k[1] or "")):
+        h = found[(phase, tag)]
+        stream.write("{:<20} {:<28} {:>8} {:>9.3f} {:>9.3f} {:>9.3f} {:>9.3f} {:>9.3f}\n".format(
+            phase, tag or "-", h.count, h.mean() * 1000, h.percentile(50) * 1000,
+            h.percentile(90) * 1000, h.percentile(99) * 1000, h.max * 1000))
+
+def enable():
+    """Turns on instrumentation. Output to sys.stdout is timed from now on,
+    and (where signals are available) the histograms are printed to stderr
+    whenever the process receives SIGUSR1."""
+    global enabled, _writer
+    enabled = True
+
+    if _writer is None:
+        _writer = TimedWriter(sys.stdout)
+        sys.stdout = _writer
+
+    if hasattr(signal, "SIGUSR1"):
+        signal.signal(signal.SIGUSR1, lambda signum, frame: dump())
+
+def disable():
+    """Turns off instrumentation. The histograms recorded so far are kept."""
+    global enabled, _writer
+    enabled = False
+
+    if _writer is not None:
+        sys.stdout = _writer.stream
+        _writer = None
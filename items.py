@@ -1,9 +1,18 @@
 # adapted from http://letstalkdata.com/2014/08/how-to-write-a-text-adventure-in-python/
 from enum import Enum
+import json
+import os
+import overlay
+
+# The items themselves (the cup, the sword, the firorb...) are defined in
+# resources/items.json, and made from the classes below by the catalog at the
+# bottom of this file. Gold is the only item made directly.
 
 class Item():
     """The base class to be used for all items.
     Items have a name, description, and value."""
+    __slots__ = ("name", "description", "value")
+
     def __init__ (self, name, description, value):
         self.name = name
         self.description = description
@@ -17,6 +26,8 @@ class Item():
 class Gold(Item):
     """Gold, to be used as currency. The value of various items can be directly
     converted to an amount of gold."""
+    __slots__ = ("amt",)
+
     def __init__ (self, amt):
         self.amt = amt
         super().__init__(name="gold",
@@ -27,72 +38,43 @@ class Gold(Item):
 # The potion types used in the game.
 class Potion(Item):
     """The potion base class. Allows for a healing method."""
+    __slots__ = ("healing",)
+
     def __init__(self, name, description, value, healing):
         self.healing = healing
         super().__init__(name, description, value)
 
     def potion_types():
         """Returns a list of all potion_types"""
-        return [Cup(), Bottle(), Jug()]
-
-class Cup(Potion):
-    def __init__(self):
-        super().__init__(name="cup",
-                         description="A cup of healing potion. Heals 10 hp.",
-                         value=20,
-                         healing=10)
-
-class Bottle(Potion):
-    def __init__(self):
-        super().__init__(name="bottle",
-                         description="A bottle of healing potion. Heals 20 hp.",
-                         value=35,
-                         healing=20)
-
-class Jug(Potion):
-    def __init__(self):
-        super().__init__(name="jug",
-                         description="A jug of healing potion. Heals 40 hp.",
-                         value=60,
-                         healing=40)
+        return [catalog.make(entry["id"]) for entry in catalog.in_category("potion")]
 
 ##################################################################################################################
 # The orb types used in the game.
 class OrbContainer(Item):
-    """Containers for holding orbs, which can be of various sizes (capacities)."""
-    def __init__(self, name, description, value, capacity, orb_list=[]):
+    """Containers for holding orbs, which can be of various sizes (capacities).
+    The orbs in the container belong to the session (see overlay.py)."""
+    __slots__ = ("capacity", "_orb_list")
+
+    orb_list = overlay.SessionField(copy=True)
+
+    def __init__(self, name, description, value, capacity, orb_list=None):
         self.capacity = capacity  # the number of orbs that can be stored
+        if orb_list is None:
+            orb_list = []
         self.orb_list = orb_list  # a list of the orbs currently in the bag
         super().__init__(name, description, value)
 
-class Pouch(OrbContainer):
-    def __init__(self):
-        super().__init__(name="pouch",
-                         description="A small pouch. Should be enough to hold two orbs in battle.",
-                         value=0,
-                         capacity=2)
-
-class Case(OrbContainer):
-    def __init__(self):
-        super().__init__(name="case",
-                         description="""A distinguished case, somewhat larger than a pouch. Should be enough
-to hold three orbs in battle.""",
-                         value=30,
-                         capacity=3)
-
-class Pack(OrbContainer):
-    def __init__(self):
-        super().__init__(name="pack",
-                         description="""A large pack. Should be enough to hold four orbs in battle.""",
-                         value=50,
-                         capacity=4)
-
 class Orb(Item):
     """Orbs are mystical items that can be cast on a weapon by the player to
     change its damage type. Each type of orb has strengths and weaknesses
     against other orb types.
 
-    Enemies are also capable of casting orbs on themselves."""
+    Enemies are also capable of casting orbs on themselves.
+
+    Orbs never change, so there is only one of each kind (see
+    Catalog.shared)."""
+    __slots__ = ("damagemultiplier",)
+
     def __init__(self, name, description, value, damagemultiplier):
         self.damagemultiplier = damagemultiplier
         super().__init__(name, description, value)
@@ -100,15 +82,15 @@ class Orb(Item):
     def num_to_orb(num):
         """A dictionary mapping each orb type to a number. Used to randomly
         generate orbs."""
-        num_to_orb = {  1:Firorb(),
-                        2:Watorb(),
-                        3:Natorb(),
-                        4:Silvorb() }
-        return num_to_orb[num]
+        num_to_orb = {  1:"firorb",
+                        2:"watorb",
+                        3:"natorb",
+                        4:"silvorb" }
+        return catalog.shared(num_to_orb[num])
 
     def orb_types():
         """Returns a list of all orb types."""
-        return [Firorb(), Natorb(), Silvorb(), Watorb()]
+        return [catalog.shared(name) for name in ("firorb", "natorb", "silvorb", "watorb")]
 
     def best_combs(orb_name):
         combo = {"watorb": ["natorb", "watorb", "silvorb", "firorb"],
@@ -124,55 +106,18 @@ class Orb(Item):
                  "silvorb": ["silvorb"]}
         return combo[orb_name]
 
-class Firorb(Orb):
-    def __init__(self):
-        super().__init__(name="firorb",
-                        description="""A flaming ball of pure fire.
-Careful, it's hot!""",
-                        value=0,
-                        damagemultiplier={"firorb" : 1,
-                                           "watorb" : 0.5,
-                                           "natorb" : 2,
-                                           "silvorb": 0.75})
-
-class Watorb(Orb):
-    def __init__(self):
-        super().__init__(name="watorb",
-                        description="""A confined sphere of luminescent water.
-Try not to spill!""",
-                        value=0,
-                        damagemultiplier={"firorb" : 2,
-                                           "watorb" : 1,
-                                           "natorb" : 0.5,
-                                           "silvorb": 0.75})
-
-class Natorb(Orb):
-    def __init__(self):
-        super().__init__(name="natorb",
-                        description="""An irregular mass of nature.
-What is nature exactly? Nobody knows.""",
-                        value=0,
-                        damagemultiplier={"firorb" : 0.5,
-                                           "watorb" : 2,
-                                           "natorb" : 1,
-                                           "silvorb": 0.75})
-
-class Silvorb(Orb):
-    def __init__(self):
-        super().__init__(name="silvorb",
-                        description="""A perfect sphere of silver.""",
-                        value=0,
-                        damagemultiplier={"firorb" : 0.9,
-                                           "watorb" : 0.9,
-                                           "natorb" : 0.9,
-                                           "silvorb": 1.1})
 ##################################################################################################################
 class Weapon(Item):
     """Base weapon class
     Attributes:
         damagemax(int): maximum base damage a weapon can do
         damagmin(int): minimum base damage a weapon can do
-        orb: the orb on the weapon, represents its 'type' """
+        orb: the orb on the weapon, represents its 'type'. It belongs to the
+            session (see overlay.py)."""
+    __slots__ = ("damagemax", "damagemin", "_orb")
+
+    orb = overlay.SessionField()
+
     def __init__(self, name, description, value, damagemax, damagemin, orb=None):
         self.damagemax = damagemax
         self.damagemin = damagemin
@@ -186,45 +131,12 @@ class Weapon(Item):
     def damagerange(self):
         return self.damagemax, self.damagemin
 
-class Rock(Weapon):
-    def __init__(self):
-        super().__init__(name="rock", # needs to be lower case to be able to read from input
-                         description=
-                         """A fist-sized rock, suitable for bludgeoning.""",
-                         value=0,
-                         damagemax=5,
-                         damagemin=2)
-
-class Dagger(Weapon):
-    def __init__(self):
-        super().__init__(name="rock", # needs to be lower case to be able to read from input
-                         description=
-                         """A pointy dagger. Should be able to do some damage, at least.""",
-                         value=0,
-                         damagemax=8,
-                         damagemin=5)
-
-class Sword(Weapon):
-    def __init__(self):
-        super().__init__(name="sword",
-                         description="""A reliable sword encrusted with several
-large red gems. Looks valuable. And deadly.""",
-                         value=100,
-                         damagemax=15,
-                         damagemin=13)
-
-class Dagger(Weapon):
-    def __init__(self):
-        super().__init__(name="dagger",
-                         description="""A small dagger with some rust. It looks
-like it may break at any minute. Somewhat more dangerous than a rock.""",
-                         value=10,
-                         damagemax=9,
-                         damagemin=2)
 ##################################################################################################################
 # Note: There was not enough time to implement effects of armour
 class Armour(Item):
     """Base armour class. Doesn't actually affect damage in this version of the game."""
+    __slots__ = ("defense",)
+
     def __init__(self, name, description, value, defense):
         self.defense = defense
         super().__init__(name, description, value)
@@ -233,9 +145,85 @@ class Armour(Item):
         return "{}\n=====\n{}\nValue: {}\nDefense: {}".format(self.name,
                                     self.description, self.value, self.defense)
 
-class SuitofArmour(Armour):
-    def __init__(self):
-        super().__init__(name="armour",
-                         description="It fits you perfectly.",
-                         value=50,
-                         defense=5)
+##################################################################################################################
+# The catalog of items.
+class Catalog():
+    """The items defined in a data file (resources/items.json), indexed by
+    id, by name and by category.
+
+    Each item in the file has an id, a name, a category ("potion", "bag",
+    "orb", "weapon" or "armour", which picks the class it is made from), and
+    the arguments for that class (description, value, healing, capacity,
+    damagemultiplier, damagemax, damagemin or defense).
+
+    The file is only read the first time an item is asked for, and an item is
+    only made when the game needs one, so adding items to the file costs
+    nothing until they are used.
+
+    Attributes:
+        path: the data file
+        by_id: id: the item's entry in the file
+        by_name: name: the entries of the items with that name
+        by_category: category: the entries of the items in that category"""
+    classes = {"potion": Potion, "bag": OrbContainer, "orb": Orb, "weapon": Weapon, "armour": Armour}
+
+    def __init__(self, path):
+        self.path = path
+        self.by_id = None
+        self.by_name = None
+        self.by_category = None
+        self.prototypes = dict() # id: the one shared instance, for shared()
+
+    def load(self):
+        """Reads the data file and builds the indexes, if that hasn't been done."""
+        if self.by_id is not None:
+            return
+        with open(self.path) as f:
+            entries = json.load(f)
+
+        by_id, by_name, by_category = dict(), dict(), dict()
+        for entry in entries:
+            if entry["id"] in by_id:
+                raise ValueError("{}: there are two items with the id '{}'".format(self.path, entry["id"]))
+            if entry["category"] not in self.classes:
+                raise ValueError("{}: the item '{}' has an unknown category '{}'".format(
+                    self.path, entry["id"], entry["category"]))
+            by_id[entry["id"]] = entry
+            by_name.setdefault(entry["name"], []).append(entry)
+            by_category.setdefault(entry["category"], []).append(entry)
+        self.by_id, self.by_name, self.by_category = by_id, by_name, by_category
+
+    def entry(self, item_id):
+        """Returns the entry in the file of the item with the given id."""
+        self.load()
+        try:
+            return self.by_id[item_id]
+        except KeyError:
+            raise KeyError("there is no item with the id '{}' in {}".format(item_id, self.path)) from None
+
+    def named(self, name):
+        """Returns the entries of the items with the given name."""
+        self.load()
+        return self.by_name.get(name, [])
+
+    def in_category(self, category):
+        """Returns the entries of the items in the given category."""
+        self.load()
+        return self.by_category.get(category, [])
+
+    def make(self, item_id):
+        """Makes a new instance of an item. Items with state of their own (a
+        bag's orbs, a weapon's orb) must be made this way."""
+        entry = self.entry(item_id)
+        arguments = {k: v for k, v in entry.items() if k not in ("id", "category")}
+        return self.classes[entry["category"]](**arguments)
+
+    def shared(self, item_id):
+        """Returns the one instance of an item that never changes (an orb),
+        making it the first time it is asked for."""
+        item = self.prototypes.get(item_id)
+        if item is None:
+            item = self.prototypes[item_id] = self.make(item_id)
+        return item
+
+catalog = Catalog(os.path.join(os.path.dirname(os.path.abspath(__file__)), "resources", "items.json"))
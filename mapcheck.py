@@ -0,0 +1,186 @@
+"""Checks that a map can be played, when it is loaded.
+
+A map that loads without errors can still strand a player: a region of rooms
+that can't be reached from the start, a dragon that can't be reached at all,
+or story rooms in the wrong places (the pouch's room relies on the
+salamander's room being to its west, for example). world.load_tiles runs the
+checks below on every map it loads and raises world.MapError if any fail, so
+a broken map fails straight away instead of hours into a session.
+
+Rooms that touch (north, south, east or west) are joined with a union-find,
+which finds the connected regions of the map in close to linear time, even on
+maps with millions of cells. Rooms are compared by class name, so this module
+doesn't need to import tiles.py.
+"""
+
+# how many rooms to list when reporting a problem with many rooms
+max_listed = 5
+
+class UnionFind():
+    """A disjoint-set forest over the numbers 0 to n - 1.
+
+    Attributes:
+        parent: the parent of each number; roots are their own parent
+        size: the number of members of each root's set"""
+    def __init__(self, n):
+        self.parent = list(range(n))
+        self.size = [1] * n
+
+    def find(self, a):
+        """Returns the root of the set a belongs to."""
+        parent = self.parent
+        while parent[a] != a:
+            parent[a] = parent[parent[a]] # halve the path on the way up
+            a = parent[a]
+        return a
+
+    def union(self, a, b):
+        """Joins the sets a and b belong to."""
+        a = self.find(a)
+        b = self.find(b)
+        if a == b:
+            return
+        if self.size[a] < self.size[b]:
+            a, b = b, a
+        self.parent[b] = a # the smaller tree goes under the larger one
+        self.size[a] += self.size[b]
+
+def connected_regions(grid, width, height):
+    """Joins the rooms of a map that touch into connected regions.
+
+    Args:
+        grid: a dictionary mapping (x, y) to a tile or None
+        width, height: the size of the map
+
+    Returns: a function region_of(x, y) that returns a number naming the
+        region a room is in. Rooms in the same region get the same number."""
+    sets = UnionFind(width * height)
+    for (x, y), tile in grid.items():
+        if tile is None:
+            continue
+        # joining each room to the rooms east and south of it covers every
+        # pair of rooms that touch
+        if grid.get((x + 1, y)) is not None:
+            sets.union(y * width + x, y * width + x + 1)
+        if grid.get((x, y + 1)) is not None:
+            sets.union(y * width + x, (y + 1) * width + x)
+
+    return lambda x, y: sets.find(y * width + x)
+
+def name_at(grid, x, y):
+    """Returns the class name of the tile at (x, y), or None if there is none."""
+    tile = grid.get((x, y))
+    if tile is None:
+        return None
+    return type(tile).__name__
+
+def neighbours(grid, x, y):
+    """Returns a dictionary mapping direction to the class name of each room
+    next to (x, y)."""
+    found = dict()
+    for direction, (dx, dy) in (("north", (0, -1)), ("south", (0, 1)),
+                                ("east", (1, 0)), ("west", (-1, 0))):
+        name = name_at(grid, x + dx, y + dy)
+        if name is not None:
+            found[direction] = name
+    return found
+
+def positions(places):
+    """Formats a list of (x, y) for a message, listing only the first few."""
+    listed = ", ".join("({}, {})".format(x, y) for x, y in sorted(places)[:max_listed])
+    if len(places) > max_listed:
+        listed += " and {} more".format(len(places) - max_listed)
+    return listed
+
+# the rooms that have to be placed in a particular way
+placed_rooms = {"StartingLocation", "PouchRoom", "DragonRoom", "TownShop"}
+
+def find_rooms(grid, names):
+    """Returns a dictionary mapping each of the class names to the list of
+    (x, y) of the rooms of that class."""
+    found = {name: [] for name in names}
+    for position, tile in grid.items():
+        if tile is not None:
+            name = type(tile).__name__
+            if name in found:
+                found[name].append(position)
+    return found
+
+def check_placement(grid, name, x, y):
+    """Checks a room that has to be placed in a particular way.
+
+    Args:
+        grid: the map
+        name: the class name of the room, one of placed_rooms
+        x, y: where the room is
+
+    Returns: a list of problems, as strings"""
+    problems = []
+    around = neighbours(grid, x, y)
+
+    if name == "StartingLocation":
+        if around != {"west": "PouchRoom"}:
+            problems.append("the StartingLocation at ({}, {}) must have a PouchRoom to the west "
+                            "and no other rooms next to it".format(x, y))
+
+    elif name == "PouchRoom":
+        if around.get("west") != "SalamanderRoom":
+            problems.append("the PouchRoom at ({}, {}) must have a SalamanderRoom to the west".format(x, y))
+        if around.get("east") != "StartingLocation":
+            problems.append("the PouchRoom at ({}, {}) must have the StartingLocation to the east".format(x, y))
+        if "north" in around or "south" in around:
+            problems.append("the PouchRoom at ({}, {}) must not have rooms to the north or south".format(x, y))
+
+    elif name == "DragonRoom":
+        if list(around.values()) != ["ThresholdRoom"]:
+            problems.append("the DragonRoom at ({}, {}) must be a dead end, reached only "
+                            "through a ThresholdRoom".format(x, y))
+
+    elif name == "TownShop":
+        if around.get("east") != "TownSquare":
+            problems.append("the TownShop at ({}, {}) must have a TownSquare to the east".format(x, y))
+
+    return problems
+
+def check(grid, width, height):
+    """Checks that a map can be played.
+
+    Args:
+        grid: a dictionary mapping (x, y) to a tile (or None), like world._world
+        width, height: the size of the map
+
+    Returns: a list of problems, as strings. The map is fine if it is empty."""
+    problems = []
+
+    rooms = find_rooms(grid, placed_rooms)
+    starts = rooms["StartingLocation"]
+    dragons = rooms["DragonRoom"]
+
+    if len(starts) != 1:
+        problems.append("the map must have one StartingLocation, not {}".format(len(starts)))
+    if len(dragons) == 0:
+        problems.append("the map has no DragonRoom, so the game can't be won")
+
+    if len(starts) == 1:
+        region_of = connected_regions(grid, width, height)
+        start = region_of(*starts[0])
+
+        if dragons and all(region_of(x, y) != start for x, y in dragons):
+            problems.append("the DragonRoom can't be reached from the StartingLocation")
+
+        stranded = [] # the rooms that can't be reached
+        regions = set() # the regions they are in
+        for (x, y), tile in grid.items():
+            if tile is not None:
+                region = region_of(x, y)
+                if region != start:
+                    stranded.append((x, y))
+                    regions.add(region)
+        if stranded:
+            problems.append("{} room(s) in {} region(s) can't be reached from the StartingLocation: {}".format(
+                len(stranded), len(regions), positions(stranded)))
+
+    for name in sorted(rooms):
+        for x, y in sorted(rooms[name]):
+            problems.extend(check_placement(grid, name, x, y))
+    return problems
@@ -0,0 +1,165 @@
+"""Generates maps of any size in the format of resources/map.txt.
+
+The map is written one row at a time, from north to south, and only the row
+above the one being generated is kept in memory, so maps with millions of
+cells can be written without building them first.
+
+Every generated map keeps the placement rules of the story rooms:
+    -StartingLocation's only neighbour is the PouchRoom, to the west
+    -the PouchRoom has no neighbours to the north or south; the
+     SalamanderRoom is to its west
+    -the DragonRoom is a dead end, with the ThresholdRoom just before it
+    -a TownShop always has a TownSquare to its east (the square's text says
+     the shop is to the west)
+and every room can be reached from the StartingLocation.
+
+The layout is built like this:
+    -every road_spacing-th row and column is a road, so the roads make a
+     grid over the map. The first row ends with the SalamanderRoom, the
+     PouchRoom and the StartingLocation instead.
+    -every other cell is filled with a chance of density, but only if the
+     cell to its north or west is filled. Those cells were generated first
+     and can already be reached, so every cell of the map can be reached.
+    -the filled cells are roads, enemy rooms, loot rooms or shops, chosen
+     by their weights
+    -the last road is two rows from the bottom, and the ThresholdRoom and
+     the DragonRoom hang off it
+
+Usage:
+    python3 mapgen.py big_map.txt --width 2000 --height 2000 --seed 1
+"""
+
+import argparse
+import random
+import sys
+
+# the rooms for each kind of filled cell
+enemy_rooms = ["GoblinRoom"]
+loot_rooms = ["PlayersHouse", "FindSwordRoom"]
+
+# the relative chance of each kind of room, for the cells that are filled
+default_weights = {"road": 3, "enemy": 1, "loot": 1, "shop": 0.2}
+
+min_width = 5
+min_height = 4
+
+def generate_rows(width, height, density=0.5, road_spacing=8, weights=None, seed=None):
+    """Generates a map one row at a time.
+
+    Args:
+        width, height: the size of the map, in cells
+        density: the chance (0 to 1) that a cell that can be reached is filled
+        road_spacing: a road runs across the map every road_spacing rows and
+            down the map every road_spacing columns
+        weights: a dictionary mapping "road", "enemy", "loot" and "shop" to
+            the relative chance of each kind of room (see default_weights)
+        seed: the seed for the random numbers, so a map can be made again
+
+    Yields: each row, as a list of tile names ('' for an empty cell)"""
+    if width < min_width or height < min_height:
+        raise ValueError("maps must be at least {}x{}".format(min_width, min_height))
+    if road_spacing < 1:
+        raise ValueError("road_spacing must be at least 1")
+
+    rng = random.Random(seed)
+    if weights is None:
+        weights = default_weights
+    kinds = [k for k in ("road", "enemy", "loot", "shop") if weights.get(k, 0) > 0]
+    kind_weights = [weights[k] for k in kinds]
+
+    last_road = height - 3
+    # away from the first column's road and from under the StartingLocation
+    dragon_x = rng.randrange(2, width - 2)
+
+    # cells that must stay empty: the north and south neighbours of the
+    # PouchRoom and the StartingLocation, and either side of the DragonRoom
+    forbidden = {(width - 2, 1), (width - 1, 1),
+                 (dragon_x - 1, height - 1), (dragon_x + 1, height - 1)}
+
+    above = [True] * width # which cells of the row above are filled
+    for y in range(height):
+        row = [''] * width
+        road_row = y % road_spacing == 0 or y == last_road
+
+        if y == 0:
+            for x in range(width - 3):
+                row[x] = "Road"
+            row[width - 3:] = ["SalamanderRoom", "PouchRoom", "StartingLocation"]
+
+        elif road_row and y <= last_road:
+            for x in range(width):
+                if (x, y) not in forbidden:
+                    row[x] = "Road"
+
+        else:
+            x = 0
+            while x < width:
+                if (x, y) in forbidden:
+                    pass
+                elif x % road_spacing == 0 and y <= last_road:
+                    row[x] = "Road" # a road running north to south
+                elif y == height - 2 and x == dragon_x:
+                    row[x] = "ThresholdRoom"
+                elif y == height - 1 and x == dragon_x:
+                    row[x] = "DragonRoom"
+                elif not above[x] and (x == 0 or row[x - 1] == ''):
+                    pass # this cell couldn't be reached
+                elif rng.random() < density:
+                    kind = rng.choices(kinds, kind_weights)[0]
+                    if kind == "shop":
+                        if x + 1 < width and (x + 1, y) not in forbidden and \
+                                not (y >= height - 2 and x + 1 == dragon_x):
+                            # the square is east of the shop
+                            row[x] = "TownShop"
+                            row[x + 1] = "TownSquare"
+                            x += 1
+                        else:
+                            row[x] = "Road"
+                    elif kind == "enemy":
+                        row[x] = rng.choice(enemy_rooms)
+                    elif kind == "loot":
+                        row[x] = rng.choice(loot_rooms)
+                    else:
+                        row[x] = "Road"
+                x += 1
+
+        above = [cell != '' for cell in row]
+        yield row
+
+def write_map(f, width, height, **options):
+    """Writes a generated map to an open file. See generate_rows for the
+    options.
+
+    Returns: the number of rooms written"""
+    rooms = 0
+    for row in generate_rows(width, height, **options):
+        rooms += sum(1 for cell in row if cell != '')
+        f.write(",".join(row) + "\n")
+    return rooms
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Generate a map for the game.")
+    arg_parser.add_argument("output", help="the file to write the map to, or - for the screen")
+    arg_parser.add_argument("--width", type=int, default=100)
+    arg_parser.add_argument("--height", type=int, default=100)
+    arg_parser.add_argument("--density", type=float, default=0.5,
+                            help="the chance that a cell that can be reached is filled (default 0.5)")
+    arg_parser.add_argument("--road-spacing", type=int, default=8,
+                            help="a road runs across and down the map every this many cells (default 8)")
+    for kind in ("road", "enemy", "loot", "shop"):
+        arg_parser.add_argument("--{}-weight".format(kind), type=float, default=default_weights[kind],
+                                help="the relative chance of a {} room (default {})".format(kind, default_weights[kind]))
+    arg_parser.add_argument("--seed", type=int, help="the seed for the random numbers")
+    args = arg_parser.parse_args()
+
+    weights = {"road": args.road_weight, "enemy": args.enemy_weight,
+               "loot": args.loot_weight, "shop": args.shop_weight}
+    options = dict(density=args.density, road_spacing=args.road_spacing,
+                   weights=weights, seed=args.seed)
+
+    if args.output == "-":
+        write_map(sys.stdout, args.width, args.height, **options)
+    else:
+        with open(args.output, "w") as f:
+            rooms = write_map(f, args.width, args.height, **options)
+        print("Wrote a {}x{} map with {} rooms to {}".format(args.width, args.height, rooms, args.output))
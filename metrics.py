@@ -0,0 +1,192 @@
+"""Counters and gauges for game sessions, exported in the Prometheus text format.
+
+The metrics below are updated by the game as it runs (the game loop, the
+parser, the Player class and the ShopKeeper). They can be written to a file
+for a node exporter to pick up (write_file, write_periodically), or served
+over HTTP on the loopback interface for Prometheus to scrape (serve).
+
+Latency percentiles for each phase of a turn come from the histograms in
+instrumentation.py, so they are only filled in when instrumentation is on.
+"""
+
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import instrumentation
+
+def escape(value):
+    """Escapes a label value for the Prometheus text format."""
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+def format_labels(names, values):
+    """Returns the {name="value",...} part of a sample line."""
+    if len(names) == 0:
+        return ""
+    pairs = ['{}="{}"'.format(n, escape(v)) for n, v in zip(names, values)]
+    return "{" + ",".join(pairs) + "}"
+
+class Metric():
+    """The base class for counters and gauges.
+
+    Attributes:
+        name: the name of the metric, eg, "game_turns_total"
+        help: a description of the metric
+        labels: the names of the metric's labels, eg, ("enemy",)
+        values: a dictionary mapping tuples of label values to the value"""
+    kind = None
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.values = dict()
+        self.lock = threading.Lock()
+
+    def get(self, *labels):
+        """Returns the value for the given label values."""
+        return self.values.get(labels, 0)
+
+    def samples(self):
+        """Returns a list of (label values, value) pairs."""
+        with self.lock:
+            return sorted(self.values.items())
+
+    def render(self):
+        """Returns the metric in the Prometheus text format."""
+        lines = ["# HELP {} {}".format(self.name, self.help),
+                 "# TYPE {} {}".format(self.name, self.kind)]
+        samples = self.samples()
+        if len(samples) == 0 and len(self.labels) == 0:
+            samples = [((), 0)]
+        for labels, value in samples:
+            lines.append("{}{} {}".format(self.name, format_labels(self.labels, labels), value))
+        return "\n".join(lines)
+
+class Counter(Metric):
+    """A value that only goes up, like the number of turns played."""
+    kind = "counter"
+
+    def inc(self, *labels, amount=1):
+        """Adds amount to the counter for the given label values."""
+        with self.lock:
+            self.values[labels] = self.values.get(labels, 0) + amount
+
+class Gauge(Metric):
+    """A value that can go up and down, like the number of sessions running."""
+    kind = "gauge"
+
+    def set(self, value, *labels):
+        with self.lock:
+            self.values[labels] = value
+
+    def inc(self, *labels, amount=1):
+        with self.lock:
+            self.values[labels] = self.values.get(labels, 0) + amount
+
+    def dec(self, *labels, amount=1):
+        self.inc(*labels, amount=-amount)
+
+class Registry():
+    """A collection of metrics that are exported together."""
+    def __init__(self):
+        self.metrics = []
+
+    def counter(self, name, help, labels=()):
+        """Creates a counter and adds it to the registry."""
+        metric = Counter(name, help, labels)
+        self.metrics.append(metric)
+        return metric
+
+    def gauge(self, name, help, labels=()):
+        """Creates a gauge and adds it to the registry."""
+        metric = Gauge(name, help, labels)
+        self.metrics.append(metric)
+        return metric
+
+    def render(self):
+        """Returns every metric in the Prometheus text format, followed by the
+        per-phase latency percentiles from instrumentation."""
+        parts = [m.render() for m in self.metrics]
+        parts.append(render_latencies())
+        return "\n".join(parts) + "\n"
+
+def render_latencies():
+    """Returns the latency of each phase of a turn as a Prometheus summary."""
+    name = "game_phase_latency_seconds"
+    lines = ["# HELP {} Time spent in each phase of a turn.".format(name),
+             "# TYPE {} summary".format(name)]
+    # copies taken under instrumentation.lock, since the game thread goes on
+    # recording timings while they are formatted
+    found = instrumentation.histograms()
+
+    for phase, tag in sorted(k for k in found if k[1] is None):
+        h = found[(phase, tag)]
+        for q in (0.5, 0.9, 0.99):
+            lines.append('{}{{phase="{}",quantile="{}"}} {:.6f}'.format(name, escape(phase), q, h.percentile(q * 100)))
+        lines.append('{}_sum{{phase="{}"}} {:.6f}'.format(name, escape(phase), h.total))
+        lines.append('{}_count{{phase="{}"}} {}'.format(name, escape(phase), h.count))
+
+    return "\n".join(lines)
+
+registry = Registry()
+
+# the metrics updated by the game
+sessions = registry.gauge("game_sessions_active", "Game sessions currently running.")
+turns = registry.counter("game_turns_total", "Turns processed by the game loop.")
+actions = registry.counter("game_actions_total", "Actions run by players, by action method.", ["action"])
+parse_failures = registry.counter("game_parse_failures_total", "Commands the parser rejected, by diagnostic code.", ["category"])
+battles_started = registry.counter("game_battles_started_total", "Battles started, by enemy.", ["enemy"])
+battles_finished = registry.counter("game_battles_finished_total", "Battles finished, by enemy and outcome (won, lost or fled).", ["enemy", "outcome"])
+battles = registry.gauge("game_battles_active", "Battles currently in progress.")
+deaths = registry.counter("game_deaths_total", "Players killed.")
+victories = registry.counter("game_victories_total", "Games won.")
+shop_transactions = registry.counter("game_shop_transactions_total", "Items bought and sold in shops.", ["kind", "item"])
+
+def write_file(path):
+    """Writes every metric to a file. The file is replaced all at once, so
+    anything reading it never sees half of it."""
+    temp = path + ".tmp"
+    with open(temp, "w") as f:
+        f.write(registry.render())
+    os.replace(temp, path)
+
+def write_periodically(path, interval=10):
+    """Writes the metrics to a file every interval seconds, from a background
+    thread, for as long as the process runs."""
+    def loop():
+        while True:
+            write_file(path)
+            time.sleep(interval)
+
+    thread = threading.Thread(target=loop, name="metrics-writer", daemon=True)
+    thread.start()
+    return thread
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    """Answers GET /metrics with every metric."""
+    def do_GET(self):
+        if self.path != "/metrics":
+            self.send_error(404)
+            return
+        body = registry.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # scrapes shouldn't end up in the middle of the game's output
+        pass
+
+def serve(port, host="127.0.0.1"):
+    """Serves the metrics at http://host:port/metrics from a background
+    thread. Only the loopback interface is used unless told otherwise.
+
+    Returns: the HTTPServer, which can be stopped with its shutdown method"""
+    server = HTTPServer((host, port), MetricsHandler)
+    thread = threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True)
+    thread.start()
+    return server
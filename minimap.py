@@ -0,0 +1,84 @@
+"""The player's map of the area around them, for the "map" command.
+
+Only the rooms the player has visited are drawn (see fog.py), each with the
+character its tile gives it (MapTile.map_symbol): E for a live enemy, e for a
+dead one, $ for loot that hasn't been picked up, S for a shop and . for any
+other room. The player is drawn as @.
+
+Every row of the map is split into pieces chunk_width cells wide. A piece is
+drawn the first time it is shown and kept until a room in its row changes
+state (world.tile_changed), or a room in it is visited for the first time
+(Minimap.visited). Showing the map again only draws the pieces that changed,
+so it costs the same on a map with a million cells as on the standard map.
+"""
+
+import world
+
+# the number of cells in each cached piece of a row
+chunk_width = 16
+
+# how far the map reaches from the player, in each direction
+radius_x = 12
+radius_y = 6
+
+key = "@ you   E enemy   e dead enemy   $ loot   S shop   . room"
+
+class Minimap():
+    """The drawn pieces of one player's map.
+
+    Attributes:
+        seen: the rooms the player has visited, a fog.VisitedTiles
+        pieces: (y, x // chunk_width): (world.row_versions[y] when the piece
+            was drawn, the piece as a string)
+        version: the world.version the pieces were drawn for"""
+    def __init__(self, seen):
+        self.seen = seen
+        self.pieces = dict()
+        self.version = world.version
+
+    def visited(self, x, y):
+        """Records that the player has visited (x, y) for the first time."""
+        self.pieces.pop((y, x // chunk_width), None)
+
+    def piece(self, y, chunk):
+        """Returns piece number chunk of row y, drawing it if it has changed."""
+        row_version = world.row_versions.get(y, 0)
+        found = self.pieces.get((y, chunk))
+        if found is not None and found[0] == row_version:
+            return found[1]
+
+        cells = []
+        for x in range(chunk * chunk_width, (chunk + 1) * chunk_width):
+            tile = None
+            if 0 <= x < world.width and 0 <= y < world.height and self.seen.seen(x, y):
+                tile = world.tile_exists(x, y)
+            cells.append(" " if tile is None else tile.map_symbol())
+        text = "".join(cells)
+        self.pieces[(y, chunk)] = (row_version, text)
+        return text
+
+    def row(self, y, x0, x1):
+        """Returns the cells from x0 up to but not including x1 of row y."""
+        if y < 0 or y >= world.height:
+            return " " * (x1 - x0)
+        first, last = x0 // chunk_width, (x1 - 1) // chunk_width
+        text = "".join(self.piece(y, chunk) for chunk in range(first, last + 1))
+        start = x0 - first * chunk_width
+        return text[start:start + x1 - x0]
+
+    def render(self, x, y):
+        """Returns the lines of the map around (x, y), with a border."""
+        if self.version != world.version:
+            # the map has been loaded again or rooms replaced
+            self.pieces.clear()
+            self.version = world.version
+
+        x0, x1 = x - radius_x, x + radius_x + 1
+        lines = ["+" + "-" * (x1 - x0) + "+"]
+        for row_y in range(y - radius_y, y + radius_y + 1):
+            text = self.row(row_y, x0, x1)
+            if row_y == y:
+                text = text[:radius_x] + "@" + text[radius_x + 1:]
+            lines.append("|" + text + "|")
+        lines.append(lines[0])
+        return lines
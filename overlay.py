@@ -0,0 +1,96 @@
+"""Keeps the state of a game session apart from the content it plays on.
+
+The tiles, the enemies in them, the items lying around and the shopkeeper
+are made once, when the map is loaded, and can be shared by every session in
+the process. Most of what is in them never changes (names, descriptions,
+damage ranges, class behaviour). The few attributes that do change while a
+game is played (an enemy's hp, whether loot has been picked up...) are
+declared as SessionFields:
+
+    class LootRoom(MapTile):
+        picked_up = overlay.SessionField()
+
+Reading or setting a SessionField while an Overlay is active reads or sets
+that session's value, kept in the overlay's dictionary. An object's own
+value (set when it was made, before any session started) is the starting
+value for every session, and is never changed by a session. So a session
+costs one dictionary entry for each field it has changed, instead of a copy
+of the whole world.
+
+With no overlay active (eg, in the benchmarks), SessionFields behave like
+ordinary attributes.
+
+The object's own value of a field called name is kept in the attribute
+_name, so classes with __slots__ must list "_name" in them.
+"""
+
+import copy
+
+current = None # the overlay of the session being played, if any
+
+class Overlay():
+    """The values of the SessionFields one session has changed.
+
+    Attributes:
+        values: (id of the object, field name): value
+        objects: id: object, for every object in values. Keeping the objects
+            here means their ids can't be reused by new objects while the
+            session lasts."""
+    def __init__(self):
+        self.values = dict()
+        self.objects = dict()
+
+    def __len__(self):
+        return len(self.values)
+
+    def set(self, obj, name, value):
+        self.values[(id(obj), name)] = value
+        self.objects[id(obj)] = obj
+
+def activate(session):
+    """Makes an overlay (or None) the current one.
+
+    Returns: the overlay that was current before"""
+    global current
+    previous = current
+    current = session
+    return previous
+
+class SessionField():
+    """An attribute whose value belongs to the current session.
+
+    Args:
+        copy: make a copy of the starting value for the session the first
+            time it is read. Needed for lists, sets and dictionaries that are
+            changed in place (eg, enemy.orb_list.append(orb)), so that the
+            changes don't reach the shared starting value."""
+    def __init__(self, copy=False):
+        self.copy = copy
+        self.name = None
+        self.own = None # the attribute holding the object's own value
+
+    def __set_name__(self, owner, name):
+        self.name = name
+        self.own = "_" + name
+
+    def __get__(self, obj, owner=None):
+        if obj is None:
+            return self
+        if current is not None:
+            found = current.values.get((id(obj), self.name), self)
+            if found is not self:
+                return found
+        try:
+            value = getattr(obj, self.own)
+        except AttributeError:
+            raise AttributeError("'{}' object has no attribute '{}'".format(type(obj).__name__, self.name))
+        if self.copy and current is not None:
+            value = copy.copy(value)
+            current.set(obj, self.name, value)
+        return value
+
+    def __set__(self, obj, value):
+        if current is None:
+            setattr(obj, self.own, value)
+        else:
+            current.set(obj, self.name, value)
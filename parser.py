@@ -14,6 +14,11 @@ parse input from the user into something the game can understand.
 
 # sentences can be connected using the word "and"
 
+from collections import namedtuple
+from grammar import compile_grammar
+import diagnostics
+import metrics
+
 preposition = {"at", "to", "on", "inside", "around", "up", "me", "with", "from"}
 articles = {"the", "a", "an"}
 
@@ -51,6 +56,33 @@ verb_to_prep = {"go":{"to", "inside", "outside"},
 # Note that in our "language" directions like north, south, and out are
 # considered nouns because the action "go" can be applied to them.
 
+# words that already mean something to the parser, even though they are not
+# part of any room. These are never "corrected" into something else.
+flavour_words = {"why", "awe", "thanks", "cool", "sorry", "hi", "hello",
+                "how", "are", "you", "thank", "bye", "goodbye"}
+directions = {"north", "south", "east", "west"}
+
+class ParseResult(namedtuple("ParseResult", ["action", "leftover", "diagnostics"])):
+    """The result of parsing one line of input. Nothing is printed while
+    parsing; the diagnostics are left for the front end to show (or not).
+
+    Attributes:
+        action: (verb, noun) if the input was valid, else None
+        leftover: any input after the first "and", or None
+        diagnostics: a list of the Diagnostics (see diagnostics.py) found while
+            parsing, for example a typo that was corrected or the reason the
+            input was invalid"""
+    __slots__ = ()
+
+    @property
+    def error(self):
+        """The diagnostic that made the input invalid, or None. There can be
+        no action and no error (for "help", or a blank line)."""
+        for d in self.diagnostics:
+            if d.is_error:
+                return d
+        return None
+
 def only_letters(line):
     """Removes punctuation, numbers, and any other non-letter characters from
     the line of input. Keep spaces constant."""
@@ -71,85 +103,98 @@ def flavour_text(line, verbs, verb):
         line: a list of words
         verbs: a list of given verbs
         verb: the extracted verb
+
+    Returns: a Flavour or NotHere diagnostic, or None if there is no response
         """
 
     if len(line) == 1:
-        # print some flavour text in response to certain phrases
+        # some flavour text in response to certain phrases
         if line[0] == "why":
-            print("Because.")
+            return diagnostics.Flavour("Because.")
         elif line[0] == "awe":
-            print("I'm sorry, I don't make the rules.")
+            return diagnostics.Flavour("I'm sorry, I don't make the rules.")
         elif line[0] == "thanks":
-            print("You're welcome.")
+            return diagnostics.Flavour("You're welcome.")
         elif line[0] == "cool":
-            print("I'm glad you think so.")
+            return diagnostics.Flavour("I'm glad you think so.")
         elif line[0] == "sorry":
-            print("That's okay. I suppose I can forgive you.")
+            return diagnostics.Flavour("That's okay. I suppose I can forgive you.")
         elif line[0] == "hi" or line[0] == "hello":
-            print("Greetings.")
+            return diagnostics.Flavour("Greetings.")
+        elif line[0] == "bye" or line[0] == "goodbye":
+            return diagnostics.Flavour("Farewell... but where would you go?")
         else:
-            return False
+            return None
 
     elif " ".join(line) == "how are you":
-        print("I am fine, thanks.")
+        return diagnostics.Flavour("I am fine, thanks.")
 
     elif " ".join(line) == "thank you":
-        print("You are welcome.")
+        return diagnostics.Flavour("You are welcome.")
 
     elif verb not in verbs:
-        print("You try to {}, but you can't do that here.".format(" ".join(line)))
-    else:
-        return False
-    return True
+        return diagnostics.NotHere(" ".join(line))
 
-def print_help():
-    """If the help command is called, print the following text."""
+    return None
 
-    print("""
-        These commands are accepted in any location and at any time:
-        HELP, HELP ME - prints this list
-        INFO - for information about the game itself
-        LOOK, LOOK AT ___ - to look around the area or at an object
-        VIEW/LOOK (AT) INVENTORY - prints a list of the items you have
-            on your person
-        CHOOSE WEAPON - lets you choose or change your current weapon
+def help_diagnostic():
+    """If the help command is called, returns the help diagnostic. Its text
+    is in diagnostics.help_text."""
+    return diagnostics.Help()
 
-        In addition to the above commands, the following commands can also
-        be used in battle:
+def info_diagnostic():
+    """Returns the diagnostic holding the information about the game."""
+    return diagnostics.Info()
 
-        ATTACK ENEMY: initiates combat or begins a new round of combat
-            Note: you can also specify a weapon by typing "attack enemy with
-                weapon", where "weapon" is the weapon you wish to use.
+def correct_typos(line, grammar):
+    """Corrects misspelled words in the first sentence of the line by matching
+    them against the words that make sense in the current room. For example,
+    "atack salamnder" becomes "attack salamander".
 
-        VIEW ORBS: Lets you view a list of the orbs you have summoned up to the
-            current point.
+    Only the words before the first "and" are corrected, since the rest of the
+    line may be parsed in a different room. Words the parser already knows
+    (any word of the room's grammar, and words like "thanks" or "bye") are
+    never corrected into something else.
 
-        CAST ORBNAME: Lets you cast a specific orb on your chosen weapon.
+    Args:
+        line: a list of words
+        grammar: the RoomGrammar for the current room
 
-        FLEE: Allowing you to flee from battle. A direction (east, west, north,
-            or south) can also be specified.
+    Returns: (corrected, options)
+        corrected: the corrected list of words, or None if a word could have
+            been meant as more than one thing
+        options: the words that the ambiguous word could have been, or None"""
+    corrected = list(line)
 
-        If you have purchased healing potions (cup, jug, bottle) from the shop:
-        USE POTIONNAME: For example, "use bottle". Lets you use a potion to heal
-            yourself.
-        USE POTIONNAME ON ENEMY: For example, "use bottle on dragon". Lets you
-            heal the enemy, if you decide for some reason that you want to do
-            that.
-        """)
+    for i in range(len(line)):
+        word = line[i]
+        if word == "and":
+            break
 
-def print_information():
-    """Prints information about the game."""
+        if word in flavour_words or word in directions:
+            continue
 
-    print("""
-        *** WELCOME TO OUR TEXT BASED ADVENTURE GAME ***
-        This is a simple text based adventure game with a
-        reasonably intelligent parser.
+        if i == 0:
+            # the first word in the sentence is the verb. A word the room
+            # knows as a noun is left alone too: it isn't a misspelled verb
+            if word in grammar.verbs or word in grammar.words:
+                continue
+            options = grammar.correct(word, verb=True)
 
-        Creators: Logan McDonald and Veronica Salm
+        else:
+            if (word in grammar.words or word in grammar.verbs
+                    or word in preposition or word in articles):
+                continue
+            options = grammar.correct(word)
 
-        Type "help" or "help me" to view a list of basic commands.
-    """)
+        if len(options) == 1:
+            corrected[i] = options[0]
 
+        elif len(options) > 1:
+            # too close to call
+            return None, options
+
+    return corrected, None
 
 def is_valid_prep(v, p):
     """Checks if a preposition is valid with a given verb.
@@ -197,60 +242,45 @@ def composite_action(verb, nouns, prep):
         prep: the stored preposition
 
     returns:
-        True if the composite action is valid, else False"""
+        None if the composite action is valid, else a diagnostic describing
+        the problem"""
 
     if nouns == None:
-        print("You need a target for your '{}' action!".format(verb))
-        return False
+        return diagnostics.MissingTarget(verb)
 
     if prep == None:
-        return True
+        return None
 
     if type(nouns) == str: # not enough nouns! Need a second noun to apply the first noun to
         # this catches cases like "use dragon" or "attack sword"
-        print("What do you want to {} {} {}?".format(verb, nouns, prep))
-        return False
+        return diagnostics.MissingObject(verb, nouns, prep)
 
     if nouns[0] == nouns[1]:
         # example: "use dragon on dragon" should not be valid_adj
-        print("You cannot {} {} {} {}!".format(verb, nouns[0], prep, nouns[1]))
-        return False
+        return diagnostics.SameObject(verb, nouns[0], prep)
     else:
-        return True
+        return None
 
-def parse(line, avail_nouns, valid_adj):
-    """Parses a line of input from the user into something the game can understand.
+def parse_line(line, grammar):
+    """Parses a line of input from the user into something the game can
+    understand, without printing anything.
 
     Args:
         line: a single line of user-generated input
-        avail_nouns: a dictionary of nouns in a given room and the actions that can be applied to them.
-            These will be passed in from the location in question. For example, we might have:
-            avail_nouns = {"bread":["eat", "look"], "house":["go", "look"], "dog":["pet", "look"]}
-        valid_adj: Like avail_nouns, a dictionary of the nouns in the room and any adjectives that can
-            be applied to them. For example:
-            valid_adj = {"bread":["brown"], "house":["small", "white"], "dog":["fierce", ]}
-
-    Returns:
-        0, None: if the input is invalid
-        or
-        (verb, noun), leftover_input: A tuple of the verb and the noun to apply it to, along with any
-        leftover input (which will be fed back into the parser once it has been determined that the first
-        action is valid)
+        grammar: the compiled RoomGrammar of the current room (see
+            grammar.compile_grammar)
+
+    Returns: a ParseResult. If the input is valid, its action is
+        (verb, noun): A tuple of the verb and the noun to apply it to
+        and its leftover is any leftover input (which will be fed back into
+        the parser once it has been determined that the first action is valid).
+        If the error is a MissingDirection diagnostic, the action is
+        (verb, None) and the player should be asked for a direction.
     """
-    # create a set of valid adjectives based on the given room
-    adjectives = set()
-    for n in valid_adj:
-        for a in valid_adj[n]:
-            adjectives.add(a)
-    # create a set of valid verbs based on the given room
-    verbs = set()
-    for n in avail_nouns:
-        for v in avail_nouns[n]:
-            verbs.add(v)
-
-    # these commands can be used in any location
-    verbs.add("help")
-    verbs.add("info")
+    avail_nouns = grammar.avail_nouns
+    valid_adj = grammar.valid_adj
+    adjectives = grammar.adjectives
+    verbs = grammar.verbs
 
     # format the line by removing all numbers and punctuation
     # and converting it to a list, splitting by whitespace
@@ -265,9 +295,36 @@ def parse(line, avail_nouns, valid_adj):
     objects = dict() # a dictionary of actions and the nouns they are applied to
 
     leftover_input = None
+    found = [] # the diagnostics found along the way
 
     if len(line) == 0: # if the command is empty
-        return 0, None
+        return ParseResult(None, None, [diagnostics.Empty()])
+
+    # fix any typos, so that the player doesn't have to retype the command
+    corrected, options = correct_typos(line, grammar)
+    if corrected is None:
+        # give the player some help. Anything after "and" is still run
+        leftover = None
+        if "and" in line:
+            leftover = " ".join(line[line.index("and") + 1:])
+        return ParseResult(None, leftover, [diagnostics.AmbiguousWord(" ".join(line), options)])
+
+    if corrected != line:
+        line = corrected
+        clause = line[:line.index("and")] if "and" in line else line
+        found.append(diagnostics.Corrected(" ".join(clause)))
+
+    def failed(error):
+        """Returns the result of a parse that failed with the given diagnostic."""
+        found.append(error)
+        return ParseResult(None, leftover_input, found)
+
+    # join multi-word nouns and adjectives (like "suit of") into single words
+    # so that the rest of the parser can treat them like any other word. The
+    # verb is always the first word, and anything after "and" belongs to the
+    # next action, which may be parsed in a different room.
+    end = line.index("and") if "and" in line else len(line)
+    line = line[:1] + grammar.phrases.segment(line[1:end]) + line[end:]
 
     # the first word in the sentence is considered to be a verb
     verb = line[0]
@@ -280,12 +337,10 @@ def parse(line, avail_nouns, valid_adj):
                 prep = is_valid_prep(verb, line[i])
 
                 if prep == 0:
-                    print("You can't {} {}!".format(verb, line[i]))
-                    return 0, leftover_input
+                    return failed(diagnostics.BadPreposition(verb, line[i]))
 
             else:
-                print("It's not possible to {}!".format(" ".join(line)))
-                return 0, leftover_input
+                return failed(diagnostics.Nonsense(" ".join(line)))
 
         elif line[i] in avail_nouns:
             if objects[verb] == None:
@@ -295,19 +350,11 @@ def parse(line, avail_nouns, valid_adj):
                 if verb not in avail_nouns[noun]:
                     # if the verb is invalid, give the player some help
                     # tell them what they can do with the given noun
-                    if len(avail_nouns[noun]) < 3:
-                        print("You can't {}! You can only {} {}.".format(" ".join(line), " or ".join(avail_nouns[noun]), noun))
-                    else:
-                        print("You can't {}! You can only {} or {} {}.".format(" ".join(line),
-                                ", ".join(avail_nouns[noun][0:-1]),
-                                avail_nouns[noun][-1],
-                                noun))
-                    return 0, leftover_input
+                    return failed(diagnostics.WrongVerb(" ".join(line), noun, avail_nouns[noun]))
 
                 for a in adj: # cycle through stored adjectives
                     if not is_valid_adj(a, noun, valid_adj): # if any are not valid
-                        print("The {} is not {}!".format(" ".join(adj), noun))
-                        return 0, leftover_input
+                        return failed(diagnostics.BadAdjective(adj, noun))
                 # reset in case there is another noun with new adjectives
                 # (ie, use blue orb on red sword))
                 # adj = []
@@ -315,26 +362,23 @@ def parse(line, avail_nouns, valid_adj):
 
             elif verb in actions_on or verb in actions_with:
                 # actions_on and actions_with are two global lists
-                if len(objects[verb].split()) == 1:
+                if type(objects[verb]) == str:
                     # there can only be one object attached to the verb!
                     new_noun = line[i]
 
                     if verb not in avail_nouns[noun]:
-                        print("That action doesn't work with that object.")
-                        return 0, leftover_input
+                        return failed(diagnostics.WrongVerb(" ".join(line), noun))
 
                     for a in adj:
                         if not is_valid_adj(a, line[i], valid_adj): # if all the adjectives are valid, continue
-                            # if any are invalid, return 0
-                            print("There is no {} {}!".format(" ".join(adj), line[i]))
-                            return 0, leftover_input
+                            # if any are invalid, the input is invalid
+                            return failed(diagnostics.BadAdjective(adj, line[i], second=True))
 
                     adj = [] # reset adjectives
                     objects[verb] = [noun, new_noun]
                     noun = new_noun
             else:
-                print("Your sentence doesn't make sense.")
-                return 0, leftover_input
+                return failed(diagnostics.Nonsense())
 
         elif line[i] == "and": # this is the start of a new action
             # this lets us parse more complicated sentences
@@ -349,7 +393,7 @@ def parse(line, avail_nouns, valid_adj):
                 objects[verb] = None
 
             else:
-                print("Your sentence doesn't make sense.")
+                found.append(diagnostics.Confusing())
 
         elif line[i] in articles:
             # check if the article is in the accepted list of articles
@@ -361,89 +405,127 @@ def parse(line, avail_nouns, valid_adj):
                 article = line[i]
 
             else:
-                print("I don't understand '{} {}'".format(article, line[i]))
-                return 0, leftover_input
+                return failed(diagnostics.BadArticle(article, line[i]))
 
         elif line[i] in adjectives:
             adj.append(line[i])
         else:
             if verb == "look":
-                print("I don't see anything like that.")
-                return 0, leftover_input
+                return failed(diagnostics.NotSeen())
 
-            if flavour_text(line, verbs, verb) == True:
-                return 0, leftover_input
+            response = flavour_text(line, verbs, verb)
+            if response is not None:
+                return failed(response)
 
             if line[0] not in verbs:
-                print("That is not a valid action.")
-                return 0, leftover_input
+                return failed(diagnostics.UnknownVerb())
 
             if verb == "go" or verb == "move" or verb == "travel":
                 # if the noun is not in valid nouns, give the user some help
-                directions = {"north", "south", "east", "west"}
-
                 if line[i] in directions:
                     # if the user tries to go a direction where there is no tile
-                    print("There is nothing to the {}.".format(line[i]))
+                    return failed(diagnostics.NoTile(line[i]))
 
                 else:
-                    print("You can't go to the {}. Try going north, south, east, or west instead.".format(line[i]))
-
-                return 0, leftover_input
+                    return failed(diagnostics.BadDirection(line[i]))
 
             else:
-                print("You can't do that.")
-                return 0, leftover_input
+                # tell the player what the verb can be used on instead
+                return failed(diagnostics.NotPossible(verb, grammar.nouns_for(verb)))
 
     if verb in actions_with or verb in actions_on:
         # if the verb is "use" or some variant of "attack"
         # check if it is a valid composite action (action with more
         # than one noun)
-        if composite_action(verb, objects[verb], prep) == False:
-            return 0, leftover_input
+        error = composite_action(verb, objects[verb], prep)
+        if error is not None:
+            return failed(error)
 
-    if flavour_text(line, verbs, verb) == True:
-        return 0, leftover_input
+    response = flavour_text(line, verbs, verb)
+    if response is not None:
+        return failed(response)
 
     # set of verbs that can exist by themselves
-    noun_can_be_none = {"look", "leave", "stop", "flee", "run", "escape", "shop"}
+    noun_can_be_none = {"look", "leave", "stop", "flee", "run", "escape", "shop", "map"}
 
     # check if the action is complete
     # some actions, like "look" can have no noun attached, but others need
     # to specify a noun
     if objects[verb] == None: # if there is no extracted noun
         if verb == "go" or verb == "move" or verb == "travel":
-            # if the verb specifies movement, prompt the user to choose a direction
-            direction = input(("Where do you want to {}? Please choose a direction: ".format(verb))).split()
-            if len(direction) == 1 and direction[0] in avail_nouns:
-                objects[verb] = direction[0]
-            else:
-                print("You can't go '{}'.".format(" ".join(direction)))
-                return 0, leftover_input
+            # if the verb specifies movement, the user must choose a direction.
+            # The verb is kept so that the direction can be filled in
+            found.append(diagnostics.MissingDirection(verb))
+            return ParseResult((verb, None), leftover_input, found)
 
         elif verb == "help":
-            print_help() # print the help text
-            return 0, leftover_input
+            return failed(help_diagnostic())
 
         elif verb == "info":
-            print_information() # print the game information
-            return 0, leftover_input
+            return failed(info_diagnostic())
 
         elif verb not in noun_can_be_none:
             if verb in verbs: # if the verb is valid for something else in the room
-                print("I don't understand. You need to specify something to {}.".format(verb))
+                return failed(diagnostics.MissingNoun(verb, grammar.nouns_for(verb)))
 
             else: # if the verb is unrecognized, it could be anything
-                print("That is not a valid action.")
+                return failed(diagnostics.UnknownVerb())
+
+    return ParseResult((verb, objects[verb]), leftover_input, found)
+
+def parse_many(lines, grammar):
+    """Parses a list of commands against one room. Used to replay transcripts
+    and bot traffic in bulk.
+
+    Only the first action of each line is parsed: anything after "and" is
+    returned as the leftover of that line's result, since in the game it would
+    be parsed in whatever room the first action leads to.
+
+    Args:
+        lines: a list of lines of input
+        grammar: the compiled RoomGrammar of the room (see
+            grammar.compile_grammar)
+
+    Returns: a list of ParseResults, one for each line"""
+    results = [parse_line(line, grammar) for line in lines]
+    for result in results:
+        count_failure(result)
+    return results
+
+def count_failure(result):
+    """Counts a failed parse in the metrics, by the code of its error."""
+    error = result.error
+    if error is not None:
+        metrics.parse_failures.inc(error.code)
+
+def parse(line, avail_nouns, valid_adj):
+    """Parses a line of input from the user into something the game can understand.
 
-            return 0, leftover_input
+    Args:
+        line: a single line of user-generated input
+        avail_nouns: a dictionary of nouns in a given room and the actions that can be applied to them.
+            These will be passed in from the location in question. For example, we might have:
+            avail_nouns = {"bread":["eat", "look"], "house":["go", "look"], "dog":["pet", "look"]}
+        valid_adj: Like avail_nouns, a dictionary of the nouns in the room and any adjectives that can
+            be applied to them. For example:
+            valid_adj = {"bread":["brown"], "house":["small", "white"], "dog":["fierce", ]}
 
-    return (verb, objects[verb]), leftover_input
+    Returns: a ParseResult (see parse_line). The front end decides what to do
+        with its diagnostics; console.read_action prints them.
+    """
+    # the sets of valid verbs and adjectives (and the spelling index) are
+    # only rebuilt when the room changes
+    grammar = compile_grammar(avail_nouns, valid_adj)
+    result = parse_line(line, grammar)
+    count_failure(result)
+    return result
 
 if __name__ == "__main__":
     while True:
         avail_nouns = {"dragon":["use", "attack"], "orb":["use"], "sword":["attack"]}
         valid_adj = {"dragon":["purple"], "orb":["blue", "green"]}
-        action = parse(input(), avail_nouns, valid_adj)
-        if action != 0:
-            print(action)
+        result = parse(input(), avail_nouns, valid_adj)
+        for d in result.diagnostics:
+            print(d)
+        if result.action is not None:
+            print(result.action)
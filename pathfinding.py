@@ -0,0 +1,132 @@
+"""Finds the way to landmarks (the shop, the town, the castle...) for the
+"travel to <landmark>" command.
+
+A room is a landmark if its class has a landmark name (see MapTile.landmark in
+tiles.py). For each landmark name, a breadth-first search from every room with
+that name, over the rooms of the map, gives a distance field: for every room
+that can reach one of them, the number of steps to the nearest one and the
+direction of the first step. Following the directions from any room leads to
+the nearest landmark of that name by the shortest route.
+
+The fields only depend on which rooms are where, so each is built the first
+time it is needed and kept until the map changes (world.version goes up when
+tiles are loaded or replaced). Whether the player can actually take a step
+right now (a pouch not yet picked up, an enemy in the way) is checked while
+travelling, with the rooms' can_leave method.
+"""
+
+from collections import deque
+
+import tilegrid
+import world
+
+# the change in (x, y) for a step in each direction
+steps = {"north": (0, -1), "south": (0, 1), "east": (1, 0), "west": (-1, 0)}
+opposite = {"north": "south", "south": "north", "east": "west", "west": "east"}
+
+_fields = {} # landmark name: {(x, y): (distance, direction of the first step)}
+_landmarks = None # the landmark names on the map
+_version = None # the world.version the cached fields were built for
+
+def invalidate():
+    """Throws away every cached field."""
+    global _landmarks, _version
+    _fields.clear()
+    _landmarks = None
+    _version = None
+
+def check_version():
+    """Throws away the cached fields if the map has changed since they were built."""
+    global _version
+    if _version != world.version:
+        invalidate()
+        _version = world.version
+
+def landmarks():
+    """Returns the set of landmark names of the rooms on the map."""
+    global _landmarks
+    check_version()
+    if _landmarks is None:
+        _landmarks = set()
+        if tilegrid.available and world.grid is not None:
+            # only the kinds of rooms on the map need to be looked at
+            tiles = __import__('tiles')
+            for name in tilegrid.names_present():
+                if getattr(tiles, name).landmark is not None:
+                    _landmarks.add(getattr(tiles, name).landmark)
+        else:
+            for tile in world._world.values():
+                if tile.landmark is not None:
+                    _landmarks.add(tile.landmark)
+    return _landmarks
+
+def distance_field(landmark):
+    """Returns the distance field for a landmark name, building it if needed.
+
+    Returns: a dictionary mapping the (x, y) of every room that can reach the
+        landmark to (the number of steps to it, the direction of the first
+        step). The landmark rooms themselves map to (0, None)."""
+    check_version()
+    field = _fields.get(landmark)
+    if field is not None:
+        return field
+
+    field = dict()
+    queue = deque()
+    for position, tile in world._world.items():
+        if tile is not None and tile.landmark == landmark:
+            field[position] = (0, None)
+            queue.append(position)
+
+    # search outward from the landmarks. A room found from a neighbour gets
+    # there by stepping back toward that neighbour.
+    while queue:
+        x, y = queue.popleft()
+        distance = field[(x, y)][0]
+        for direction, (dx, dy) in steps.items():
+            neighbour = (x + dx, y + dy)
+            if neighbour not in field and world._world.get(neighbour) is not None:
+                field[neighbour] = (distance + 1, opposite[direction])
+                queue.append(neighbour)
+
+    _fields[landmark] = field
+    return field
+
+def first_step(landmark, x, y):
+    """Returns the direction of the first step from (x, y) toward the nearest
+    landmark of the given name, or None if there is no way there (or the
+    player is already there)."""
+    found = distance_field(landmark).get((x, y))
+    if found is None:
+        return None
+    return found[1]
+
+def route(landmark, x, y):
+    """Returns the list of directions to follow from (x, y) to the nearest
+    landmark of the given name, or None if there is no way there."""
+    field = distance_field(landmark)
+    if (x, y) not in field:
+        return None
+
+    directions = []
+    distance, direction = field[(x, y)]
+    while direction is not None:
+        directions.append(direction)
+        dx, dy = steps[direction]
+        x, y = x + dx, y + dy
+        distance, direction = field[(x, y)]
+    return directions
+
+def describe(directions):
+    """Describes a list of directions in words, eg, "3 steps north, then 1
+    step west"."""
+    parts = []
+    i = 0
+    while i < len(directions):
+        j = i
+        while j < len(directions) and directions[j] == directions[i]:
+            j += 1
+        n = j - i
+        parts.append("{} step{} {}".format(n, "" if n == 1 else "s", directions[i]))
+        i = j
+    return ", then ".join(parts)
@@ -1,9 +1,53 @@
+import inspect
 import items, world
+import fog
+import minimap
 import random
+import metrics
+import pathfinding
+import profiling
 
 # Contains the player class.
 # Methods within the player class are used to execute all actions in the game.
 
+# The dispatch table for Player.do_action: for each class of action (from
+# actions.py), the Player method that carries it out and the names of the
+# arguments it is called with, in order. Each class is registered the first
+# time an action of that class is made.
+dispatch = dict() # action class: (method, argument names)
+
+def register(action_class, method, kwargs):
+    """Adds a class of action to the dispatch table, checking that the
+    method can be called with the action's arguments. This happens when the
+    action is made, so a mistake in actions.py shows up when the room offers
+    the action rather than when the player tries it.
+
+    Args:
+        action_class: the class of the action
+        method: the method of the Player class that carries it out
+        kwargs: the keyword arguments the action passes to the method
+
+    Returns: the names of the arguments, in the order the method takes them"""
+    if getattr(Player, method.__name__, None) is not method:
+        raise TypeError("{} must be carried out by a method of Player, not {!r}".format(
+            action_class.__name__, method))
+
+    parameters = list(inspect.signature(method).parameters.values())[1:] # not self
+    names = tuple(p.name for p in parameters if p.name in kwargs)
+    unknown = set(kwargs) - set(p.name for p in parameters)
+    missing = [p.name for p in parameters if p.default is p.empty and p.name not in kwargs]
+    if unknown or missing:
+        raise TypeError("{} can't call Player.{}: {}".format(action_class.__name__, method.__name__,
+                        "unexpected argument(s) {}".format(sorted(unknown)) if unknown
+                        else "missing argument(s) {}".format(missing)))
+
+    found = dispatch.get(action_class)
+    if found is not None and found != (method, names):
+        raise TypeError("every {} must call Player.{} with the arguments {}".format(
+            action_class.__name__, found[0].__name__, found[1]))
+    dispatch[action_class] = (method, names)
+    return names
+
 class Player():
     def __init__(self):
         """Player class to represent the player as they travel through the game.
@@ -17,8 +61,12 @@ class Player():
             -bestbag: equipped orb container
             -prev_tile: where the player came from
             -max_hp: the player's max possible
+            -visited: the rooms the player has been to (see fog.py)
+            -minimap: the player's map, drawn by the map command
+            -known_landmarks: the landmarks (eg, "shop") the player has been
+                to, and so can travel to
         """
-        self.inventory = [items.Gold(15), items.Rock()]
+        self.inventory = [items.Gold(15), items.catalog.make("rock")]
         self.hp = 100
         self.location_x, self.location_y = world.starting_position
         self.victory = False
@@ -26,6 +74,9 @@ class Player():
         self.bestbag = None
         self.prev_tile = None
         self.max_hp = 100
+        self.visited = fog.VisitedTiles(world.width, world.height)
+        self.minimap = minimap.Minimap(self.visited)
+        self.known_landmarks = set()
 
     def available_weapons(self):
         """Returns a list of weapons in the player's inventory"""
@@ -81,7 +132,31 @@ class Player():
         """
         self.location_x += dx
         self.location_y += dy
-        print(world.tile_exists(self.location_x, self.location_y).intro_text())
+        tile = world.tile_exists(self.location_x, self.location_y)
+        if profiling.memory_enabled:
+            profiling.snapshot("entered {}".format(type(tile).__name__))
+        self.enter(tile)
+
+    def enter(self, tile):
+        """Shows the intro text of the tile the player has just entered, then
+        marks it as visited (the text can depend on whether it was visited)."""
+        print(tile.intro_text(self))
+        self.visit(tile.x, tile.y)
+
+    def visit(self, x, y):
+        """Marks the room at (x, y) as visited."""
+        if self.visited.visit(x, y):
+            self.minimap.visited(x, y)
+            landmark = world.tile_exists(x, y).landmark
+            if landmark is not None:
+                self.known_landmarks.add(landmark)
+
+    def show_map(self):
+        """Prints the map of the area around the player."""
+        print()
+        for line in self.minimap.render(self.location_x, self.location_y):
+            print(line)
+        print(minimap.key)
 
     def move_north(self):
         """Moves the player north and sets the prev_tile to south"""
@@ -103,6 +178,48 @@ class Player():
         self.move(dx=-1, dy=0)
         self.prev_tile = "east"
 
+    def travel(self, landmark):
+        """Moves the player along the shortest route to the nearest landmark
+        of the given kind, all in one go. Travelling stops early when the
+        player enters a room with an enemy, or can't go any further. The
+        rooms passed through on the way are marked as visited, but their
+        intro text isn't shown: only the room the player stops in is
+        entered (and described) as if the player had walked in.
+        Args:
+            landmark (str): the name of the landmark, eg, "shop"
+        """
+        route = pathfinding.route(landmark, self.location_x, self.location_y)
+        if not route:
+            print("You can't find a way to the {}.".format(landmark))
+            return
+
+        # work out how far the player gets before anything stops them
+        taken = []
+        x, y = self.location_x, self.location_y
+        for direction in route:
+            if not world.tile_exists(x, y).can_leave(direction, self):
+                break
+            taken.append(direction)
+            dx, dy = pathfinding.steps[direction]
+            x, y = x + dx, y + dy
+            if world.tile_exists(x, y).stops_travel:
+                break
+
+        if len(taken) == 0:
+            print("You can't go that way right now.")
+            return
+
+        print("You travel {} toward the {}.".format(pathfinding.describe(taken), landmark))
+
+        # pass through the rooms on the way without stopping, then enter the
+        # last one as if the player had walked in
+        for direction in taken[:-1]:
+            dx, dy = pathfinding.steps[direction]
+            self.location_x += dx
+            self.location_y += dy
+            self.visit(self.location_x, self.location_y)
+        getattr(self, "move_" + taken[-1])()
+
     def add_loot(self, tile, item):
         """Adds the loot from a tile (required to be a LootRoom) to the player's
            inventory
@@ -111,6 +228,7 @@ class Player():
             -item: an instance of Item class to add to the player's inventory"""
         self.inventory.append(item)
         tile.picked_up = True
+        world.tile_changed(tile.x, tile.y)
         print(tile.picked_up_text())
 
     def choose_weapon(self):
@@ -211,7 +329,7 @@ class Player():
         else:
             if tile.enemy.name == enemy: # the enemy in the room must match the enemy name
                 enemy = tile.enemy
-                max_enemy_hp = enemy.enemy_hp(enemy.name)
+                max_enemy_hp = enemy.max_hp
 
                 if enemy.hp > max_enemy_hp - potion.healing: # if enemy is healed beyond full health
                     print("For some reason, you use potion on {}. It is healed for {} HP and is now at max health!".format(enemy.name,
@@ -409,6 +527,12 @@ class Player():
                 if it matches the name of any of the players weapons.
         """
         print(">>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>")
+        if enemy.orb == None: # the enemy has no orb until the first round of a battle
+            metrics.battles_started.inc(enemy.name)
+            metrics.battles.inc()
+            if profiling.memory_enabled:
+                profiling.snapshot("battle with {} started".format(enemy.name))
+
         self.choose_best_bag()
 
         if weapon is not None: # if a weapon is provided, assign to the equipped weapon
@@ -444,6 +568,7 @@ class Player():
 
         if not enemy.is_alive(): # battle is over, enemy is dead
             print("You killed {}!".format(enemy.name))
+            tile.enemy_killed(self)
 
             # reset orb parameters
             enemy.orb = None
@@ -460,22 +585,63 @@ class Player():
                 gold = self.available_gold()
                 gold.value = gold.value + enemy.gold_dropped
 
+            metrics.battles_finished.inc(enemy.name, "won")
+            metrics.battles.dec()
+            if profiling.memory_enabled:
+                profiling.snapshot("battle with {} won".format(enemy.name))
+
             #victory is achieved if the dragon has been killed
             tile.victory = True
             if enemy.name == "dragon":
                 self.victory = True
+                metrics.victories.inc()
         else: # enemy is alive
             print("{} HP is {}.".format(enemy.name, enemy.hp))
-            enemy_damage = self.enemy_damage(enemy)
-
-            print("{} does {} damage.".format(enemy.name, enemy_damage))
+            self.enemy_hits(enemy)
             if self.hp > 0: #enemy and player are still alive, continue battle by summoning new orbs
                 print("You have {} HP remaining.\n".format(self.hp))
                 self.enemy_orb_summon(enemy)
                 self.orb_summon()
-            else: #player has died
-                print("You have 0 HP. Your quest is over...")
-                self.victory = False
+
+    def enemy_hits(self, enemy):
+        """The enemy's half of a battle round: it does its damage to the
+        player, and the battle is lost if the player dies.
+        Args:
+            -enemy: an instance of the Enemy class; the enemy in the current
+                    location
+        """
+        enemy_damage = self.enemy_damage(enemy)
+
+        print("{} does {} damage.".format(enemy.name, enemy_damage))
+        if self.hp <= 0: #player has died
+            print("You have 0 HP. Your quest is over...")
+            self.victory = False
+            metrics.battles_finished.inc(enemy.name, "lost")
+            metrics.battles.dec()
+            metrics.deaths.inc()
+            if profiling.memory_enabled:
+                profiling.snapshot("battle with {} lost".format(enemy.name))
+
+    def enemy_turn(self, enemy):
+        """In the real-time mode (see realtime.py), the enemy doesn't wait for
+        the player: if the player stays idle during a battle, the enemy
+        attacks anyway.
+        Args:
+            -enemy: an instance of the Enemy class; the enemy in the current
+                    location
+        """
+        if not self.in_battle(enemy):
+            return
+        print("\n{} attacks while you hesitate!".format(enemy.name))
+        self.enemy_hits(enemy)
+        if self.hp > 0:
+            print("You have {} HP remaining.\n".format(self.hp))
+
+    def in_battle(self, enemy):
+        """Returns whether a battle with the enemy is going on: both sides are
+        alive and have cast their orbs."""
+        return (self.is_alive() and enemy.is_alive() and enemy.orb is not None
+                and self.weapon is not None and self.weapon.orb is not None)
 
     def look(self, tile, item):
         """Calls the Look method in the given tile. This prints flavour text
@@ -490,6 +656,12 @@ class Player():
                     location
             -direction (str): the direction in which to move the player
         """
+        if enemy.orb != None: # a battle was in progress
+            metrics.battles_finished.inc(enemy.name, "fled")
+            metrics.battles.dec()
+            if profiling.memory_enabled:
+                profiling.snapshot("fled from {}".format(enemy.name))
+
         enemy.orb = None
         enemy.orb_list = []
         if self.weapon:
@@ -510,14 +682,19 @@ class Player():
         """Runs the shop method in the ShopKeeper class"""
         tile.NPC.shop(self, tile)
 
-    def do_action(self, action, **kwargs):
-        """Execute a given action."""
-        # get the attributes of the given action
-        action_method = getattr(self, action.method.__name__)
-        if action_method:
-            # Call it using **kwargs to be able
-            # to use variable lengths of arguments.
-            # This method allows us to call all possible functions from
-            # the same location without knowing in advance which one we
-            # are calling.
-            action_method(**kwargs)
+    def do_action(self, action, arguments=None):
+        """Execute a given action.
+
+        Args:
+            action: an action from actions.py
+            arguments: the arguments to call the action's method with, if
+                they aren't the action's own (action.kwargs)"""
+        # the method and the order of its arguments were worked out when the
+        # action's class was registered (see register), so the method is
+        # called directly, without looking it up by name
+        method, names = dispatch[type(action)]
+        metrics.actions.inc(method.__name__)
+        if arguments is None:
+            method(self, *action.args)
+        else:
+            method(self, *[arguments[name] for name in names])
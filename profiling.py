@@ -0,0 +1,150 @@
+"""Profiling modes for a game session.
+
+CPU profiling (--profile) runs the whole session under cProfile, then prints
+where the time went, grouped by the game's modules (parser, tiles, player,
+NPCs, items, ...) with the most expensive functions of each.
+
+Memory profiling (--memprofile) traces allocations with tracemalloc and takes
+a snapshot whenever a battle starts or ends and whenever the player enters a
+room. Each snapshot is compared to the one before it, and the lines that
+allocated the most in between are reported when the session ends.
+
+Both are turned on per session from the command line in game.py, so they can
+be used on a real session without changing any code. When memory profiling is
+off, each snapshot point costs a single check.
+"""
+
+import cProfile
+import os
+import pstats
+import sys
+import tracemalloc
+
+# the modules that make up the game: the .py files in the game's folder, so
+# new modules are grouped without being listed here. Everything else (the
+# standard library, the interpreter) is grouped together as "other".
+game_folder = os.path.dirname(os.path.abspath(__file__))
+game_modules = {os.path.splitext(name)[0] for name in os.listdir(game_folder)
+                if name.endswith(".py")}
+
+memory_enabled = False
+top_lines = 5 # the number of lines to report for each snapshot
+
+_previous = None # the last snapshot taken
+_reports = [] # (label, [the top lines since the previous snapshot])
+
+def module_of(filename):
+    """Returns the name of the game module a file belongs to, or "other"."""
+    name = os.path.splitext(os.path.basename(filename))[0]
+    if name in game_modules and os.path.dirname(os.path.abspath(filename)) == game_folder:
+        return name
+    return "other"
+
+def group_by_module(stats):
+    """Adds up the time spent in the functions of each module.
+
+    Args:
+        stats: a pstats.Stats
+
+    Returns: a dictionary mapping module name to
+        (calls, own time, [(own time, calls, function name)])"""
+    modules = dict()
+    for (filename, line, function), (cc, nc, tottime, cumtime, callers) in stats.stats.items():
+        module = module_of(filename)
+        calls, total, functions = modules.get(module, (0, 0.0, []))
+        functions.append((tottime, nc, "{}:{}".format(function, line)))
+        modules[module] = (calls + nc, total + tottime, functions)
+    return modules
+
+def report_profile(stats, stream=None, functions=5):
+    """Prints the time spent in each module, most expensive first, along with
+    the most expensive functions in each of the game's modules."""
+    if stream is None:
+        stream = sys.stderr
+
+    modules = group_by_module(stats)
+    grand_total = sum(m[1] for m in modules.values()) or 1.0
+
+    stream.write("\n{:<14} {:>10} {:>12} {:>7}\n".format("module", "calls", "own time (s)", "%"))
+    for module in sorted(modules, key=lambda m: -modules[m][1]):
+        calls, total, found = modules[module]
+        stream.write("{:<14} {:>10} {:>12.4f} {:>6.1f}%\n".format(module, calls, total, 100 * total / grand_total))
+
+        if module != "other":
+            found.sort(reverse=True)
+            for tottime, nc, function in found[:functions]:
+                stream.write("    {:<36} {:>8} {:>12.4f}\n".format(function, nc, tottime))
+
+def run_profiled(play, output=None, stream=None):
+    """Runs a game session under cProfile and prints the report.
+
+    Args:
+        play: the function that runs the session
+        output: a file to save the raw profile to, for pstats or snakeviz"""
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        play()
+    finally:
+        profiler.disable()
+        stats = pstats.Stats(profiler)
+        if output:
+            stats.dump_stats(output)
+        report_profile(stats, stream)
+
+def start_memory():
+    """Starts tracing allocations. Snapshots are taken from now on."""
+    global memory_enabled
+    tracemalloc.start()
+    memory_enabled = True
+    snapshot("start of session")
+
+def snapshot(label):
+    """Takes a snapshot of the memory allocated so far, and keeps the lines
+    that allocated the most since the previous snapshot.
+
+    Args:
+        label: what just happened, eg, "entered GoblinRoom"
+    """
+    global _previous
+    if not memory_enabled:
+        return
+
+    current = tracemalloc.take_snapshot().filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    ))
+
+    if _previous is None:
+        top = current.statistics("lineno")[:top_lines]
+    else:
+        top = current.compare_to(_previous, "lineno")[:top_lines]
+
+    # only the top lines are kept, so the snapshots don't pile up
+    _reports.append((label, [str(stat) for stat in top]))
+    _previous = current
+
+def report_memory(stream=None):
+    """Prints the top allocating lines between each pair of snapshots, and
+    the current and peak memory traced."""
+    if stream is None:
+        stream = sys.stderr
+
+    for label, lines in _reports:
+        stream.write("\n[{}]\n".format(label))
+        for line in lines:
+            stream.write("    {}\n".format(line))
+
+    if tracemalloc.is_tracing():
+        current, peak = tracemalloc.get_traced_memory()
+        stream.write("\ntraced memory: {:.1f} KiB now, {:.1f} KiB peak\n".format(current / 1024, peak / 1024))
+
+def stop_memory(stream=None):
+    """Takes a final snapshot, prints the report and stops tracing."""
+    global memory_enabled, _previous
+    snapshot("end of session")
+    report_memory(stream)
+    memory_enabled = False
+    _previous = None
+    _reports.clear()
+    tracemalloc.stop()
@@ -0,0 +1,158 @@
+"""The real-time mode (python3 game.py --realtime).
+
+In the normal game nothing happens until the player types a command: the
+timer wheel (see timers.py) moves on one tick a turn, and an enemy only
+fights back as part of Player.attack. In the real-time mode the wheel ticks
+with the clock instead, several times a second, and the player's input is
+read with asyncio so that the ticks go on while the game waits for it. If
+the player stays idle in the middle of a battle, the enemy attacks anyway.
+
+Each battle waits for its enemy's turn with a single event on the wheel,
+which is cancelled and scheduled again whenever the player acts. Ticks are
+shared by every session in the process: on each tick, the enemy turns that
+are due in all of them are run in one pass (TimerWheel.advance), so a
+thousand battles cost one pass a tick rather than a thousand sleeping tasks.
+"""
+
+import asyncio
+import sys
+import threading
+import time
+
+import tiles
+import timers
+import world
+
+tick_seconds = 0.25 # the length of a tick
+turn_seconds = 2 # how long a turn lasts, for the delays given in turns
+idle_turns = 2 # how many turns the player can stay idle before the enemy attacks
+
+class Clock():
+    """Ticks a timer wheel in real time, and reads the player's input in
+    between ticks.
+
+    Attributes:
+        wheel: the TimerWheel it ticks
+        started: when the clock was made (time.monotonic)
+        first_tick: wheel.now when the clock was made
+        loop: the asyncio event loop the input is read in
+        pending: a future for the line being read, or None"""
+    def __init__(self, wheel=None):
+        if wheel is None:
+            wheel = timers.wheel
+        self.wheel = wheel
+        self.started = time.monotonic()
+        self.first_tick = wheel.now
+        self.loop = asyncio.new_event_loop()
+        self.pending = None
+
+    def catch_up(self):
+        """Ticks the wheel once for each tick that has passed, running the
+        events that are due. A slow pass doesn't lose any ticks: the next
+        call catches up."""
+        ticks = int((time.monotonic() - self.started) / tick_seconds)
+        behind = self.first_tick + ticks - self.wheel.now
+        if behind > 0:
+            self.wheel.advance(behind)
+
+    def until_next_tick(self):
+        """Returns the seconds left until the next tick."""
+        elapsed = time.monotonic() - self.started
+        return tick_seconds - elapsed % tick_seconds
+
+    def start_reading(self):
+        """Starts reading a line from sys.stdin. The line is read in a thread
+        of its own, so a read that is never finished (the game ended while
+        the player was typing) doesn't stop the game from exiting.
+
+        Returns: a future for the line"""
+        future = self.loop.create_future()
+
+        def read():
+            line = sys.stdin.readline()
+            self.loop.call_soon_threadsafe(future.set_result, line)
+
+        threading.Thread(target=read, daemon=True).start()
+        return future
+
+    async def next_line(self, stop):
+        """Waits for a line of input, ticking the wheel while it waits.
+
+        Args:
+            stop: a function called after each tick; the wait ends early if
+                it returns True (eg, the player has been killed)
+
+        Returns: the line without its newline, or None if the wait was
+            stopped. The line is still read if the wait was stopped, and is
+            returned by the next call."""
+        if self.pending is None:
+            self.pending = self.start_reading()
+        while True:
+            self.catch_up()
+            if stop():
+                return None
+            try:
+                line = await asyncio.wait_for(asyncio.shield(self.pending), self.until_next_tick())
+            except asyncio.TimeoutError:
+                continue
+            self.pending = None
+            if line == "":
+                raise EOFError
+            return line.rstrip("\n")
+
+    def read_line(self, stop):
+        """Returns the next line of input, as next_line does, for the game
+        loop (which isn't a coroutine)."""
+        return self.loop.run_until_complete(self.next_line(stop))
+
+class IdleEnemy():
+    """Makes the enemy in the player's room attack if the player stays idle
+    during a battle.
+
+    Attributes:
+        player: the Player
+        wheel: the TimerWheel the enemy's turns are scheduled on
+        clock: the Clock that ticks the wheel, or None if something else
+            ticks it
+        timer: the Timer for the enemy's next turn, or None"""
+    def __init__(self, player, wheel=None, clock=None):
+        if wheel is None:
+            wheel = timers.wheel if clock is None else clock.wheel
+        self.player = player
+        self.wheel = wheel
+        self.clock = clock
+        self.timer = None
+
+    def player_acted(self):
+        """Called after each of the player's commands. Puts off the enemy's
+        turn, if the player is in a battle."""
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        # the clock doesn't tick while the player answers a prompt that
+        # input() asks for (like "Cast which orb"), so the wheel can be
+        # behind: the enemy's turn is counted from the real time
+        if self.clock is not None:
+            self.clock.catch_up()
+        self.wait()
+
+    def wait(self):
+        """Schedules the enemy's next turn, if the player is in a battle."""
+        room = world.tile_exists(self.player.location_x, self.player.location_y)
+        if isinstance(room, tiles.EnemyRoom) and self.player.in_battle(room.enemy):
+            self.timer = self.wheel.schedule(idle_turns * timers.ticks_per_turn, self.enemy_acts, room)
+
+    def enemy_acts(self, room):
+        """The player has been idle for too long: the enemy attacks, and
+        attacks again if the player stays idle."""
+        self.timer = None
+        if (self.player.location_x, self.player.location_y) == (room.x, room.y):
+            self.player.enemy_turn(room.enemy)
+        self.wait()
+
+def start():
+    """Turns on the real-time mode.
+
+    Returns: the Clock for the game loop to read input with"""
+    timers.ticks_per_turn = max(1, round(turn_seconds / tick_seconds))
+    return Clock()
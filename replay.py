@@ -0,0 +1,256 @@
+"""Replays recorded transcripts of commands through the game, as a benchmark
+and as a check that the game still plays the same way.
+
+A transcript (transcripts/*.txt) has one command per line, exactly as the
+player typed it, including the answers to questions like "Choose a weapon:"
+and the empty lines typed to continue shopping. Lines starting with "#" are
+comments, and a "# seed: N" comment gives the seed for the random numbers, so
+that every battle goes the same way each time the transcript is played.
+
+Each transcript is played in a new Python process, so that nothing left over
+from one game (the shop's stock, the enemies' orbs) can leak into the next.
+For each transcript, the replay reports:
+    turns/s: the turns of the game loop played per second
+    the 50th and 99th percentile latency of each phase of a turn (see
+        instrumentation.py)
+    the peak memory used by the process (where the resource module exists)
+and compares everything the game printed to the golden transcript
+(transcripts/*.golden). The replay exits with status 1 if any output differs.
+
+Usage:
+    python3 replay.py                 replay every transcript
+    python3 replay.py long_battle     replay some of them
+    python3 replay.py --repeat 5      play each one 5 times, report the median
+    python3 replay.py --update        rewrite the golden transcripts
+"""
+
+import argparse
+import difflib
+import io
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+
+try:
+    import resource
+except ImportError:
+    # resource is only available on Unix; peak memory isn't reported without it
+    resource = None
+
+here = os.path.dirname(os.path.abspath(__file__))
+transcript_dir = os.path.join(here, "transcripts")
+
+# the game prints a few objects as they are (eg, the orbs an enemy has in
+# battle), and their addresses change every time
+address = re.compile(r" at 0x[0-9a-fA-F]+>")
+
+# the phases reported for each transcript, in order
+phases = ["turn", "available_actions", "parse", "dispatch", "do_action", "output"]
+
+def read_transcript(path):
+    """Reads a transcript.
+
+    Returns: (seed, commands) where seed is None if the transcript doesn't
+        give one, and commands is a list of lines"""
+    seed = None
+    commands = []
+    with open(path) as f:
+        for line in f.read().splitlines():
+            if line.startswith("#"):
+                comment = line[1:].strip()
+                if comment.startswith("seed:"):
+                    seed = int(comment[len("seed:"):])
+                continue
+            commands.append(line)
+    return seed, commands
+
+class EchoingInput():
+    """Feeds the commands of a transcript to input(), writing each one to the
+    output after it is read, the same way a terminal shows what was typed."""
+    def __init__(self, commands):
+        self.commands = list(commands)
+        self.position = 0
+
+    def readline(self):
+        if self.position == len(self.commands):
+            return "" # input() raises EOFError
+        line = self.commands[self.position]
+        self.position += 1
+        sys.stdout.write(line + "\n")
+        return line + "\n"
+
+def peak_memory():
+    """Returns the peak memory used by this process in KiB, or None."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        peak = peak // 1024 # bytes on macOS, KiB everywhere else
+    return peak
+
+def run_one(path):
+    """Plays a transcript in this process and returns the results as a
+    dictionary. This is what the child process does."""
+    os.chdir(here) # world.py opens the map relative to the working directory
+    sys.path.insert(0, here)
+
+    import random
+    import game
+    import instrumentation
+    import metrics
+
+    seed, commands = read_transcript(path)
+    random.seed(seed)
+
+    output = io.StringIO()
+    real_stdin, real_stdout = sys.stdin, sys.stdout
+    sys.stdin = EchoingInput(commands)
+    sys.stdout = output
+    instrumentation.enable() # wraps sys.stdout, so the output is timed too
+
+    started = time.perf_counter()
+    try:
+        game.play()
+    except EOFError:
+        print("\nThere are no more commands. The game is over.")
+    elapsed = time.perf_counter() - started
+
+    instrumentation.disable()
+    sys.stdin, sys.stdout = real_stdin, real_stdout
+
+    latency = dict()
+    found = instrumentation.histograms()
+    for phase in phases:
+        if (phase, None) in found:
+            h = found[(phase, None)]
+            latency[phase] = [h.percentile(50), h.percentile(99)]
+
+    return {"output": address.sub(" at 0x...>", output.getvalue()),
+            "turns": metrics.turns.get(),
+            "elapsed": elapsed,
+            "latency": latency,
+            "peak_memory": peak_memory()}
+
+def run_child(path):
+    """Plays a transcript in a new Python process and returns its results."""
+    env = dict(os.environ)
+    # the order of sets of strings (like the orbs a player can choose from)
+    # depends on the hash seed, so it is fixed too
+    env["PYTHONHASHSEED"] = "0"
+    child = subprocess.run([sys.executable, os.path.abspath(__file__), "--run-one", path],
+                           stdout=subprocess.PIPE, env=env, check=True)
+    return json.loads(child.stdout.decode("utf-8"))
+
+def median_run(runs):
+    """Returns the run that took the median time."""
+    by_time = sorted(runs, key=lambda r: r["elapsed"])
+    return by_time[len(by_time) // 2]
+
+def golden_path(path):
+    return os.path.splitext(path)[0] + ".golden"
+
+def compare(path, output, update=False, stream=None):
+    """Compares the output of a transcript to its golden transcript, printing
+    the differences if there are any. With update, the golden transcript is
+    rewritten instead.
+
+    Returns: True if the output matched (or the golden transcript was rewritten)"""
+    if stream is None:
+        stream = sys.stdout
+    golden = golden_path(path)
+
+    if update:
+        with open(golden, "w") as f:
+            f.write(output)
+        return True
+
+    if not os.path.exists(golden):
+        stream.write("    no golden transcript; run with --update to create {}\n".format(golden))
+        return False
+
+    with open(golden) as f:
+        expected = f.read()
+    if expected == output:
+        return True
+
+    diff = difflib.unified_diff(expected.splitlines(), output.splitlines(),
+                                golden, "replay", lineterm="")
+    for line in list(diff)[:40]:
+        stream.write("    {}\n".format(line))
+    return False
+
+def replay(paths, repeat=1, update=False, stream=None):
+    """Replays each transcript repeat times and prints a report.
+
+    Returns: True if the output of every transcript matched its golden transcript"""
+    if stream is None:
+        stream = sys.stdout
+
+    stream.write("{:<20} {:>6} {:>10} {:>11} {:>8}  {}\n".format(
+        "transcript", "turns", "turns/s", "peak (KiB)", "output", "latency p50/p99 (ms)"))
+
+    all_matched = True
+    for path in paths:
+        runs = [run_child(path) for i in range(repeat)]
+        # the run with the median time is reported
+        result = median_run(runs)
+
+        matched = compare(path, result["output"], update)
+        for other in runs:
+            # every run should print the same thing
+            matched = matched and other["output"] == result["output"]
+        all_matched = all_matched and matched
+
+        if update:
+            status = "updated"
+        elif matched:
+            status = "ok"
+        else:
+            status = "DIFFERS"
+
+        turns_per_second = result["turns"] / result["elapsed"] if result["elapsed"] > 0 else 0.0
+        peak = result["peak_memory"] if result["peak_memory"] is not None else "-"
+        latency = " ".join("{}={:.3f}/{:.3f}".format(phase, p50 * 1000, p99 * 1000)
+                           for phase, (p50, p99) in sorted(result["latency"].items(), key=lambda i: phases.index(i[0])))
+        name = os.path.splitext(os.path.basename(path))[0]
+        stream.write("{:<20} {:>6} {:>10.1f} {:>11} {:>8}  {}\n".format(
+            name, result["turns"], turns_per_second, peak, status, latency))
+
+    return all_matched
+
+def find_transcripts(names):
+    """Returns the paths of the named transcripts, or of all of them."""
+    if not names:
+        return sorted(os.path.join(transcript_dir, f) for f in os.listdir(transcript_dir)
+                      if f.endswith(".txt"))
+
+    paths = []
+    for name in names:
+        if os.path.exists(name):
+            paths.append(os.path.abspath(name))
+        else:
+            paths.append(os.path.join(transcript_dir, name + ".txt"))
+    return paths
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Replay transcripts of commands through the game.")
+    arg_parser.add_argument("transcripts", nargs="*",
+                            help="the transcripts to replay (names in transcripts/ or paths); all of them by default")
+    arg_parser.add_argument("--repeat", type=int, default=1,
+                            help="play each transcript this many times and report the median run")
+    arg_parser.add_argument("--update", action="store_true",
+                            help="rewrite the golden transcripts with the output of this replay")
+    arg_parser.add_argument("--run-one", metavar="PATH", help=argparse.SUPPRESS)
+    args = arg_parser.parse_args()
+
+    if args.run_one:
+        # the child process: play one transcript and report back as JSON
+        result = run_one(args.run_one)
+        sys.stdout.write(json.dumps(result))
+        sys.exit(0)
+
+    if not replay(find_transcripts(args.transcripts), args.repeat, args.update):
+        sys.exit(1)
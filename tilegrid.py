@@ -0,0 +1,137 @@
+"""Bulk queries over the whole map, using the grid of tile types.
+
+world.load_tiles keeps, alongside the tile objects, a numpy array with the
+type of the tile in every cell (world.grid, an index into world.tile_names).
+Questions about the whole map, or a large part of it, are answered here with
+array operations instead of Python loops over every cell:
+    -which cells hold enemy rooms (or any other kind of room)
+    -which neighbours every cell has
+    -how many rooms of each kind there are in an area
+    -the characters of a minimap of an area
+
+The grid holds no game state, so it can be saved once (save) and mapped
+read-only into any number of worker processes (attach), which then share one
+copy of it in memory.
+
+numpy is optional. Without it, available is False and world.grid is None;
+anything using this module should check available first.
+"""
+
+import json
+import os
+
+import world
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+available = numpy is not None
+
+# the bit set in neighbour_masks for a neighbour in each direction
+north, south, east, west = 1, 2, 4, 8
+
+def names_present():
+    """Returns the names of the kinds of rooms on the map."""
+    return [world.tile_names[i] for i in numpy.unique(world.grid) if i != 0]
+
+def kinds(base_class):
+    """Returns the names of the kinds of rooms on the map that are the given
+    class from tiles.py or a subclass of it, eg, kinds(tiles.EnemyRoom)."""
+    tiles = __import__('tiles')
+    return [name for name in names_present() if issubclass(getattr(tiles, name), base_class)]
+
+def type_ids(names):
+    """Returns the ids in the grid of the given room names (the ones that
+    are on the map)."""
+    return [world.type_ids[n] for n in names if n in world.type_ids]
+
+def mask_of(names):
+    """Returns a grid of booleans, True where the cell holds one of the named
+    kinds of rooms."""
+    return numpy.isin(world.grid, type_ids(names))
+
+def cells_of(names):
+    """Returns the (x, y) of every cell holding one of the named kinds of
+    rooms, row by row."""
+    ys, xs = numpy.nonzero(mask_of(names))
+    return list(zip(xs.tolist(), ys.tolist()))
+
+def neighbour_masks():
+    """Returns a grid with the neighbours of every room: the sum of north,
+    south, east and west for each direction with a room. Empty cells are 0."""
+    filled = world.grid != 0
+    masks = numpy.zeros(world.grid.shape, dtype=numpy.uint8)
+    masks[1:, :] |= numpy.where(filled[:-1, :], north, 0).astype(numpy.uint8)
+    masks[:-1, :] |= numpy.where(filled[1:, :], south, 0).astype(numpy.uint8)
+    masks[:, :-1] |= numpy.where(filled[:, 1:], east, 0).astype(numpy.uint8)
+    masks[:, 1:] |= numpy.where(filled[:, :-1], west, 0).astype(numpy.uint8)
+    masks[~filled] = 0
+    return masks
+
+def area(x0=0, y0=0, x1=None, y1=None):
+    """Returns the part of the grid from (x0, y0) up to but not including
+    (x1, y1), clipped to the map."""
+    if x1 is None:
+        x1 = world.width
+    if y1 is None:
+        y1 = world.height
+    return world.grid[max(y0, 0):max(y1, 0), max(x0, 0):max(x1, 0)]
+
+def counts(x0=0, y0=0, x1=None, y1=None):
+    """Returns a dictionary mapping room name to the number of rooms of that
+    kind in an area of the map (the whole map by default)."""
+    found = numpy.bincount(area(x0, y0, x1, y1).ravel(), minlength=len(world.tile_names))
+    return {world.tile_names[i]: int(n) for i, n in enumerate(found) if i != 0 and n > 0}
+
+def symbol_table(symbols, default="#", empty=" "):
+    """Returns an array mapping each tile id to a character.
+
+    Args:
+        symbols: a dictionary mapping room names to characters
+        default: the character for any other kind of room
+        empty: the character for an empty cell"""
+    table = [empty] + [symbols.get(name, default) for name in world.tile_names[1:]]
+    return numpy.array(table, dtype="<U1")
+
+def render(x0, y0, x1, y1, symbols, default="#", empty=" ", shown=None):
+    """Returns the rows of a minimap of an area, as strings.
+
+    Args:
+        x0, y0, x1, y1: the area, as for area(). Cells off the map are blank.
+        symbols, default, empty: see symbol_table
+        shown: a grid of booleans the size of the map; cells that are False
+            are drawn as empty (eg, the cells the player hasn't visited)"""
+    table = symbol_table(symbols, default, empty)
+    ids = numpy.zeros((y1 - y0, x1 - x0), dtype=world.grid.dtype)
+
+    # copy the part of the area that is on the map
+    top, left = max(y0, 0), max(x0, 0)
+    part = area(x0, y0, x1, y1)
+    if shown is not None:
+        part = numpy.where(shown[top:top + part.shape[0], left:left + part.shape[1]], part, 0)
+    ids[top - y0:top - y0 + part.shape[0], left - x0:left - x0 + part.shape[1]] = part
+
+    return ["".join(row) for row in table[ids].tolist()]
+
+def names_path(path):
+    """Returns the path of the file holding the room names of a saved grid."""
+    return os.path.splitext(path)[0] + ".names.json"
+
+def save(path):
+    """Saves the grid to a .npy file, and the room names beside it, so that
+    other processes can attach to it."""
+    numpy.save(path, world.grid)
+    with open(names_path(path), "w") as f:
+        json.dump(world.tile_names, f)
+
+def attach(path):
+    """Maps a saved grid into this process, read-only. The grid is shared
+    with every other process that attaches to it; the tile objects are not
+    loaded."""
+    world.grid = numpy.load(path, mmap_mode="r")
+    world.height, world.width = world.grid.shape
+    with open(names_path(path)) as f:
+        world.tile_names = json.load(f)
+    world.type_ids = {name: i for i, name in enumerate(world.tile_names)}
@@ -2,20 +2,44 @@
 
 import items, enemies, actions, world, NPCs
 import player
+import pathfinding
+import overlay
+import timers
+
+# one of each kind of orb, for the cast actions. Orbs never change, so the
+# same ones (and the same actions) can be offered in every battle.
+orbs = items.Orb.orb_types()
 
 class MapTile:
     """An abstract base class to base all other
     tiles on. We will never actually call MapTile
-    directly."""
-    def __init__(self, x, y, visited = False, look_at = {}):
+    directly.
+
+    Class attributes:
+        landmark: the name the player can travel to this room by, eg, "shop"
+            for "travel to shop", or None if it isn't a landmark
+        stops_travel: True if travelling should stop when entering this room
+        symbol: the character for this room on the player's map
+
+    The attributes that change as the game is played are SessionFields (see
+    overlay.py), so every session has its own values for them.
+    """
+    __slots__ = ("x", "y", "_look_at")
+
+    landmark = None
+    stops_travel = False
+    symbol = "."
+    look_at = overlay.SessionField()
+
+    def __init__(self, x, y, look_at = {}):
         self.x = x
         self.y = y
-        self.visited = visited
         self.look_at = look_at
 
-    def intro_text(self):
+    def intro_text(self, player):
         """The introductory text to display whenever the
-        player enters a tile."""
+        player enters a tile. Which rooms the player has been to is kept by
+        the player (player.visited), since the tiles are shared."""
         raise NotImplementedError()
 
     def update(self, moves, avail_actions, action):
@@ -66,34 +90,57 @@ class MapTile:
 
         # determine the possible moves to other tiles (ie, move west)
         if world.tile_exists(self.x + 1, self.y):
-            moves, avail_actions = self.update(moves, avail_actions, actions.MoveEast())
+            moves, avail_actions = self.update(moves, avail_actions, actions.template(actions.MoveEast))
 
         if world.tile_exists(self.x - 1, self.y):
-            moves, avail_actions = self.update(moves, avail_actions, actions.MoveWest())
+            moves, avail_actions = self.update(moves, avail_actions, actions.template(actions.MoveWest))
 
         if world.tile_exists(self.x, self.y - 1):
-            moves, avail_actions = self.update(moves, avail_actions, actions.MoveNorth())
+            moves, avail_actions = self.update(moves, avail_actions, actions.template(actions.MoveNorth))
 
         if world.tile_exists(self.x, self.y + 1):
-            moves, avail_actions = self.update(moves, avail_actions, actions.MoveSouth())
+            moves, avail_actions = self.update(moves, avail_actions, actions.template(actions.MoveSouth))
 
         # look at inventory
-        moves, avail_actions = self.update(moves, avail_actions, actions.ViewInventory())
+        moves, avail_actions = self.update(moves, avail_actions, actions.template(actions.ViewInventory))
+
+        # look at the map, with "view map" or just "map"
+        moves, avail_actions = self.update(moves, avail_actions, actions.template(actions.ViewMap))
+        moves, avail_actions = self.update(moves, avail_actions, actions.template(actions.ViewMap, noun=None))
 
         for potion in player.available_potions():
-            moves, avail_actions = self.update(moves, avail_actions, actions.UsePotion(potion=potion, tile=self, enemy=None))
+            moves, avail_actions = self.update(moves, avail_actions, actions.template(actions.UsePotion, potion=potion, tile=self, enemy=None))
 
         # choose or change weapon
-        moves, avail_actions = self.update(moves, avail_actions, actions.ChangeWeapon())
+        moves, avail_actions = self.update(moves, avail_actions, actions.template(actions.ChangeWeapon))
+
+        moves, avail_actions = self.update(moves, avail_actions, actions.template(actions.Look, noun=None, tile=self))
 
-        moves, avail_actions = self.update(moves, avail_actions, actions.Look(noun=None, tile=self))
+        # travel to any landmark the player has been to that can be reached
+        # from here. Places the player hasn't found yet aren't offered (or
+        # suggested, or completed)
+        for landmark in player.known_landmarks:
+            direction = pathfinding.first_step(landmark, self.x, self.y)
+            if direction is not None and self.can_leave(direction, player):
+                moves, avail_actions = self.update(moves, avail_actions, actions.template(actions.Travel, landmark))
 
         for item in self.look_at:
-            moves, avail_actions = self.update(moves, avail_actions, actions.Look(noun=item, tile=self))
+            moves, avail_actions = self.update(moves, avail_actions, actions.template(actions.Look, noun=item, tile=self))
             descriptors[item] = self.look_at[item]
 
         return moves, avail_actions, descriptors
 
+    def can_leave(self, direction, player):
+        """Returns True if the player can leave this room in the given
+        direction right now (assuming there is a room there)."""
+        return True
+
+    def map_symbol(self):
+        """Returns the character for this room on the player's map. Rooms
+        whose character depends on their state must call world.tile_changed
+        when that state changes, so the map is redrawn."""
+        return self.symbol
+
     def available_actions(self, player):
         """Returns all of the available actions in a room.
         See generic_moves for parameter descriptions."""
@@ -110,15 +157,18 @@ class MapTile:
 class StartingLocation(MapTile):
     """ The default starting location for the game. All other map tile locations
         are in reference to this room."""
+    __slots__ = ()
+
+    landmark = "clearing"
+
     def __init__(self, x, y):
         super().__init__(x, y)
 
-    def intro_text(self):
+    def intro_text(self, player):
         # set the items in the room that are available to look at
         # along with any descriptors
         self.look_at = {"crevice":[None], "cliffs":["high"], "clearing":[None], "hole":[None]}
-        if self.visited == False:
-            self.visited = True
+        if not player.visited.seen(self.x, self.y):
             return """
             You find yourself in the middle of a clearing, with high cliffs on
             all sides.
@@ -155,10 +205,12 @@ class StartingLocation(MapTile):
 
 class ThresholdRoom(MapTile):
     """ Room to be placed just before the final boss."""
+    __slots__ = ()
+
     def __init__(self,x,y):
         super().__init__(x,y)
 
-    def intro_text(self):
+    def intro_text(self, player):
         self.look_at = {"room":["empty"]}
         return """
             The final boss room lies ahead. Proceed with caution."""
@@ -174,6 +226,8 @@ class ThresholdRoom(MapTile):
 class Road(MapTile):
     """ Room connector class. Can be used to connect two rooms together,
         but not necessary"""
+    __slots__ = ()
+
     def __init__(self, x, y):
         super().__init__(x, y)
 
@@ -183,20 +237,20 @@ class Road(MapTile):
         moves = [] # a list of directions, eg, east
 
         if world.tile_exists(self.x + 1, self.y):
-            direction, verbs = actions.MoveEast().add_actions()
+            direction, verbs = actions.template(actions.MoveEast).add_actions()
             moves.append(direction)
         if world.tile_exists(self.x - 1, self.y):
-            direction, verbs = actions.MoveWest().add_actions()
+            direction, verbs = actions.template(actions.MoveWest).add_actions()
             moves.append(direction)
         if world.tile_exists(self.x, self.y - 1):
-            direction, verbs = actions.MoveNorth().add_actions()
+            direction, verbs = actions.template(actions.MoveNorth).add_actions()
             moves.append(direction)
         if world.tile_exists(self.x, self.y + 1):
-            direction, verbs = actions.MoveSouth().add_actions()
+            direction, verbs = actions.template(actions.MoveSouth).add_actions()
             moves.append(direction)
         return moves
 
-    def intro_text(self):
+    def intro_text(self, player):
         """Prints the available directions to travel along the road."""
         self.look_at = {"road":["dusty"]}
         directions = self.directions_to_travel() # gets possible directions
@@ -222,6 +276,9 @@ class LootRoom(MapTile):
             -picked_up(bool): whether or not an item has been picked_up
             -item: an instance of an item class, the actual item
     """
+    __slots__ = ("_picked_up", "item")
+
+    picked_up = overlay.SessionField()
 
     def __init__(self, x, y, item, picked_up=False):
         self.picked_up = picked_up
@@ -236,19 +293,36 @@ class LootRoom(MapTile):
             if self.item.name == "pouch":
                 moves.pop("west")
 
-            moves, avail_actions = self.update(moves, avail_actions, actions.PickUp(item=self.item, tile=self))
+            moves, avail_actions = self.update(moves, avail_actions, actions.template(actions.PickUp, item=self.item, tile=self))
 
         return moves, avail_actions, descriptors
 
+    def can_leave(self, direction, player):
+        """The way west from the pouch's room only opens once the pouch has
+        been picked up."""
+        if direction == "west" and self.picked_up == False and self.item.name == "pouch":
+            return False
+        return True
+
+    def map_symbol(self):
+        """Loot that hasn't been picked up is marked with a $."""
+        if self.picked_up == False:
+            return "$"
+        return self.symbol
+
     def picked_up_text(self):
         raise NotImplementedError
 
 class PlayersHouse(LootRoom):
     """ Room containing the suit of armour. """
+    __slots__ = ()
+
+    landmark = "house"
+
     def __init__(self, x, y):
-        super().__init__(x, y, items.SuitofArmour())
+        super().__init__(x, y, items.catalog.make("armour"))
 
-    def intro_text(self):
+    def intro_text(self, player):
         if self.picked_up == False:
             self.look_at = {"armour":["suit of"], "house":[None], "rug":["nice", "little"]}
             return """
@@ -293,11 +367,12 @@ class PouchRoom(LootRoom):
                   only outgoing rooms being the StartingLocation to the right
                   (east) and the SalamanderRoom to left (west).
     """
+    __slots__ = ()
 
     def __init__(self, x, y):
-        super().__init__(x, y, items.Pouch())
+        super().__init__(x, y, items.catalog.make("pouch"))
 
-    def intro_text(self):
+    def intro_text(self, player):
         if self.picked_up == False:
             self.look_at = {"pouch":["small"], "dirt":["disturbed"], "clearing":["empty"]}
             return """
@@ -346,10 +421,12 @@ class PouchRoom(LootRoom):
 class FindSwordRoom(LootRoom):
     """ Defines the room containing the sword. Swords may also be bought from
     shop."""
+    __slots__ = ()
+
     def __init__(self, x, y):
-        super().__init__(x, y, items.Sword())
+        super().__init__(x, y, items.catalog.make("sword"))
 
-    def intro_text(self):
+    def intro_text(self, player):
         if self.picked_up == False:
             self.look_at = {"chest":["large"], "sword":["ruby-encrusted"]}
         else:
@@ -395,12 +472,44 @@ class FindSwordRoom(LootRoom):
             There is nothing else in the room.""")
 
 class EnemyRoom(MapTile):
-    """The basic enemy room class."""
+    """The basic enemy room class.
+    Attributes:
+        respawn_delay: the number of turns after the enemy is killed before it
+            respawns (see timers.py), or None if it stays dead
+        respawned: True if the enemy has respawned since the player was last
+            told about it"""
+    __slots__ = ("enemy", "_victory", "_respawned")
+
+    stops_travel = True
+    respawn_delay = None
+    victory = overlay.SessionField()
+    respawned = overlay.SessionField()
+
     def __init__(self, x, y, enemy):
         self.enemy = enemy
         self.victory = False
+        self.respawned = False
         super().__init__(x, y)
 
+    def enemy_killed(self, player):
+        """Called when the player kills the enemy. Schedules its respawn.
+        Args:
+            player: the player who killed it"""
+        world.tile_changed(self.x, self.y)
+        if self.respawn_delay is not None:
+            timers.wheel.schedule(self.respawn_delay * timers.ticks_per_turn, self.respawn, player)
+
+    def respawn(self, player):
+        """Brings the enemy back. Run by the timer wheel. The enemy waits
+        until the player has left the room, so that it can't appear around
+        the player (and close the exits) without the battle starting."""
+        if (player.location_x, player.location_y) == (self.x, self.y):
+            timers.wheel.schedule(timers.ticks_per_turn, self.respawn, player)
+            return
+        self.enemy.respawn()
+        self.respawned = True
+        world.tile_changed(self.x, self.y)
+
     def available_actions(self, player):
         """Returns all of the available actions in a room containing an enemy"""
         moves, avail_actions, descriptors = self.generic_moves(player)
@@ -412,26 +521,26 @@ class EnemyRoom(MapTile):
                     moves.pop(direction)
 
             moves, avail_actions = self.update(moves, avail_actions,
-                actions.Flee(noun=player.prev_tile, enemy=self.enemy, direction=player.prev_tile))
+                actions.template(actions.Flee, noun=player.prev_tile, enemy=self.enemy, direction=player.prev_tile))
 
             moves, avail_actions = self.update(moves, avail_actions,
-                actions.Flee(noun=None, enemy=self.enemy, direction=player.prev_tile))
+                actions.template(actions.Flee, noun=None, enemy=self.enemy, direction=player.prev_tile))
 
             moves, avail_actions = self.update(moves, avail_actions,
-                actions.Flee(noun=self.enemy.name, enemy=self.enemy, direction=player.prev_tile))
+                actions.template(actions.Flee, noun=self.enemy.name, enemy=self.enemy, direction=player.prev_tile))
 
-            moves, avail_actions = self.update(moves, avail_actions, actions.ViewOrbs())
+            moves, avail_actions = self.update(moves, avail_actions, actions.template(actions.ViewOrbs))
 
             for potion in player.available_potions():
-                moves, avail_actions = self.update(moves, avail_actions, actions.UsePotion(potion=potion, tile=self, enemy=self.enemy))
+                moves, avail_actions = self.update(moves, avail_actions, actions.template(actions.UsePotion, potion=potion, tile=self, enemy=self.enemy))
 
-            for orb in items.Orb.orb_types():
-                moves, avail_actions = self.update(moves, avail_actions, actions.Cast(orb=orb))
+            for orb in orbs:
+                moves, avail_actions = self.update(moves, avail_actions, actions.template(actions.Cast, orb=orb))
 
             moves, avail_actions = self.update(moves, avail_actions,
-                        actions.Attack(enemy=self.enemy, tile=self, weapon=None))
+                        actions.template(actions.Attack, enemy=self.enemy, tile=self, weapon=None))
 
-            a = actions.Attack(enemy=self.enemy, tile=self, weapon=None)
+            a = actions.template(actions.Attack, enemy=self.enemy, tile=self, weapon=None)
             noun, verbs = a.add_actions()
 
             weapons = player.available_weapons()
@@ -440,20 +549,33 @@ class EnemyRoom(MapTile):
 
         return moves, avail_actions, descriptors
 
+    def can_leave(self, direction, player):
+        """The player can't travel on while the enemy is alive (but can flee)."""
+        return not self.enemy.is_alive()
+
+    def map_symbol(self):
+        """E for a live enemy, e for one the player has killed."""
+        if self.enemy.is_alive():
+            return "E"
+        return "e"
+
 class SalamanderRoom(EnemyRoom):
     """ Defines the battle tutorial room.
         Placement: Must be placed to the left (west) of the PouchRoom.
     """
+    __slots__ = ()
+
+    respawn_delay = 5
+
     def __init__(self, x, y):
-        super().__init__(x, y, enemies.Salamander())
+        super().__init__(x, y, enemies.spawn("salamander"))
 
-    def intro_text(self):
+    def intro_text(self, player):
         self.look_at = {"salamander":["small"]}
-        if not self.enemy.is_alive():
+        if self.respawned:
             print("""
             The salamander has returned.""")
-            enemy_hp = self.enemy.enemy_hp(self.enemy.name)
-            self.enemy.hp = enemy_hp
+            self.respawned = False
 
         return """
             BATTLE TUTORIAL:
@@ -499,13 +621,17 @@ class SalamanderRoom(EnemyRoom):
             There is nothing else in the room. Defeat the salamander to continue.""")
             else:
                 print("""
-            You have defeated the salamander. He will respawn if you return.""")
+            You have defeated the salamander. He will be back before long.""")
 
 class DragonRoom(EnemyRoom):
+    __slots__ = ()
+
+    landmark = "castle"
+
     def __init__(self, x, y):
-        super().__init__(x, y, enemies.Dragon())
+        super().__init__(x, y, enemies.spawn("dragon"))
 
-    def intro_text(self):
+    def intro_text(self, player):
         self.look_at = {"dragon":["menacing"]}
         if self.enemy.is_alive():
             return """
@@ -530,14 +656,15 @@ class DragonRoom(EnemyRoom):
             there's no way out!""")
 
 class GoblinRoom(EnemyRoom):
-    def __init__(self, x, y):
-        super().__init__(x, y, enemies.Goblin())
+    __slots__ = ()
 
-    def intro_text(self):
-        if not self.enemy.is_alive():
-            enemy_hp = self.enemy.enemy_hp(self.enemy.name)
-            self.enemy.hp = enemy_hp
+    respawn_delay = 20
 
+    def __init__(self, x, y):
+        super().__init__(x, y, enemies.spawn("goblin"))
+
+    def intro_text(self, player):
+        self.respawned = False
         if self.enemy.is_alive():
             self.look_at = {"goblin":["devious", "devious-looking"], "dagger":[None]}
             return """
@@ -562,11 +689,16 @@ class GoblinRoom(EnemyRoom):
             You don't see anything in the room to help you.""")
 
 class TownSquare(MapTile):
+    __slots__ = ("_looked_at_shop",)
+
+    landmark = "town"
+    looked_at_shop = overlay.SessionField()
+
     def __init__(self, x, y, looked_at_shop=False):
         super().__init__(x, y)
         self.looked_at_shop = looked_at_shop
 
-    def intro_text(self):
+    def intro_text(self, player):
         if self.looked_at_shop == True:
             self.look_at = {"shop":["small"], "road":["narrow"],
                     "door":[None],"sign":["open"], "items":["travelling"],
@@ -628,6 +760,8 @@ class TownSquare(MapTile):
         none are particularly fancy.""")
 
 class NPCRoom(MapTile):
+    __slots__ = ("NPC",)
+
     def __init__(self, x, y, NPC):
         super().__init__(x, y)
         self.NPC = NPC
@@ -638,10 +772,15 @@ class NPCRoom(MapTile):
         return moves, avail_actions, descriptors
 
 class TownShop(NPCRoom):
+    __slots__ = ()
+
+    landmark = "shop"
+    symbol = "S"
+
     def __init__(self, x, y):
         super().__init__(x, y, NPC=NPCs.ShopKeeper())
 
-    def intro_text(self):
+    def intro_text(self, player):
         self.look_at = {"shopkeeper":[None], "counter":[None]}
         return """
         You arrive at the town's single shop. It's not very impressive.
@@ -656,7 +795,7 @@ class TownShop(NPCRoom):
         moves, avail_actions, descriptors = self.generic_moves(player)
 
 
-        moves, avail_actions = self.update(moves, avail_actions, actions.Shop(self))
+        moves, avail_actions = self.update(moves, avail_actions, actions.template(actions.Shop, self))
         return moves, avail_actions, descriptors
 
     def Look(self, item=None):
@@ -672,10 +811,12 @@ class TownShop(NPCRoom):
             something that could come in handy.""")
 
 class Building(NPCRoom):
+    __slots__ = ()
+
     def __init__(self, x, y):
         super().__init__(x, y, NPC=NPCs.TownsPerson())
 
-    def intro_text(self):
+    def intro_text(self, player):
         return """
         You enter one of several buildings in the town. There is someone
         inside.
@@ -0,0 +1,159 @@
+"""Timed world events: enemies respawning, and anything else that should
+happen some number of ticks from now.
+
+Events are kept in a hierarchical timer wheel. The first wheel has a slot
+for each of the next 64 ticks; each wheel after it has slots 64 times as
+wide (64 ticks, 4096 ticks, ...). An event goes into the slot of the first
+wheel that reaches far enough, and when a slot of a wider wheel comes round
+its events are spread over the narrower wheels below it. So scheduling and
+cancelling an event are O(1), and each tick only looks at the events that are
+due, however many thousands of enemy rooms are waiting to respawn.
+
+The game loop drives the wheel by calling advance(): in the normal game a
+tick is one turn, and in the real-time mode it is a fraction of a second.
+An event scheduled during a session (see overlay.py) runs in that session,
+so one wheel can serve every session in the process. When a session ends,
+its events are cancelled with cancel_session, so they can't run after it
+(and don't keep its player alive).
+"""
+
+import overlay
+
+bits = 6 # each wheel has 2 ** bits slots
+slots = 1 << bits
+mask = slots - 1
+levels = 4 # so events can be up to 64 ** 4 (about 16.7 million) ticks away
+
+# how many ticks make a turn. Delays in the game (like respawn_delay in
+# tiles.py) are given in turns; the real-time mode (see realtime.py) ticks
+# several times a turn
+ticks_per_turn = 1
+
+class Timer():
+    """An event waiting in a TimerWheel.
+
+    Attributes:
+        expires: the tick the event happens on
+        callback, args: the function to call, and its arguments
+        session: the overlay that was current when the event was scheduled
+        cancelled: True if the event has been cancelled"""
+    __slots__ = ("expires", "callback", "args", "session", "cancelled", "wheel")
+
+    def __init__(self, wheel, expires, callback, args):
+        self.wheel = wheel
+        self.expires = expires
+        self.callback = callback
+        self.args = args
+        self.session = overlay.current
+        self.cancelled = False
+
+    def cancel(self):
+        """Stops the event from happening. It is dropped from the wheel when
+        its slot comes round, so cancelling is O(1)."""
+        if not self.cancelled:
+            self.cancelled = True
+            self.wheel.forget(self)
+
+class TimerWheel():
+    """A hierarchical timer wheel.
+
+    Attributes:
+        now: the current tick
+        wheels: for each level, a list of slots, each a list of Timers
+        pending: the number of events that haven't happened or been cancelled
+        sessions: overlay: the set of Timers scheduled during that session
+            that haven't happened or been cancelled"""
+    def __init__(self):
+        self.now = 0
+        self.wheels = [[[] for i in range(slots)] for level in range(levels)]
+        self.pending = 0
+        self.sessions = dict()
+
+    def __len__(self):
+        return self.pending
+
+    def schedule(self, delay, callback, *args):
+        """Calls callback(*args) delay ticks from now (at least 1).
+
+        Returns: the Timer, which can be cancelled"""
+        timer = Timer(self, self.now + max(delay, 1), callback, args)
+        self.insert(timer)
+        self.pending += 1
+        if timer.session is not None:
+            self.sessions.setdefault(timer.session, set()).add(timer)
+        return timer
+
+    def forget(self, timer):
+        """Stops counting a timer that has happened or been cancelled."""
+        self.pending -= 1
+        if timer.session is not None:
+            waiting = self.sessions.get(timer.session)
+            if waiting is not None:
+                waiting.discard(timer)
+                if not waiting:
+                    del self.sessions[timer.session]
+
+    def cancel_session(self, session):
+        """Cancels every event that was scheduled during a session, for when
+        the session ends."""
+        for timer in list(self.sessions.get(session, ())):
+            timer.cancel()
+
+    def insert(self, timer):
+        """Puts a timer in the slot of the narrowest wheel that reaches it."""
+        expires = timer.expires
+        ticks = expires - self.now
+        for level in range(levels):
+            if ticks < 1 << (bits * (level + 1)) or level == levels - 1:
+                # an event further away than the widest wheel reaches goes in
+                # its last slot, and is put back when that slot comes round
+                if ticks >= 1 << (bits * levels):
+                    expires = self.now + (1 << (bits * levels)) - 1
+                self.wheels[level][(expires >> (bits * level)) & mask].append(timer)
+                return
+
+    def cascade(self, level):
+        """Spreads the events in the current slot of a wheel over the
+        narrower wheels, once the narrower wheel below it has gone round."""
+        index = (self.now >> (bits * level)) & mask
+        if index == 0 and level + 1 < levels:
+            self.cascade(level + 1)
+        timers = self.wheels[level][index]
+        self.wheels[level][index] = []
+        for timer in timers:
+            if not timer.cancelled:
+                self.insert(timer)
+
+    def advance(self, ticks=1):
+        """Moves the wheel on by some ticks, running every event that is due.
+
+        Returns: the number of events that ran"""
+        ran = 0
+        for i in range(ticks):
+            self.now += 1
+            index = self.now & mask
+            if index == 0:
+                self.cascade(1)
+
+            due = self.wheels[0][index]
+            if not due:
+                continue
+            self.wheels[0][index] = []
+            for timer in due:
+                if timer.cancelled:
+                    continue
+                if timer.expires != self.now:
+                    self.insert(timer) # further than the wheels reach
+                    continue
+                timer.cancelled = True # it has happened, so it can't be cancelled
+                self.forget(timer)
+                ran += 1
+                previous = overlay.activate(timer.session)
+                try:
+                    timer.callback(*timer.args)
+                finally:
+                    overlay.activate(previous)
+        return ran
+
+# the wheel the game's events are scheduled on
+wheel = TimerWheel()
@@ -1,19 +1,137 @@
-_world = {}
+import os
+
+import mapcheck
+
+try:
+    import numpy
+except ImportError:
+    # numpy is optional. Without it there is no grid of tile types, and the
+    # bulk queries in tilegrid.py aren't available.
+    numpy = None
+
+_world = {} # (x, y): tile, for the cells that have a tile
 starting_position = (0, 0)
+width = 0
+height = 0
+
+# a grid (a numpy array, height by width) of the type of the tile in each
+# cell, as an index into tile_names. 0 is an empty cell. See tilegrid.py.
+grid = None
+tile_names = ['']
+type_ids = {'': 0} # tile name: its index in tile_names
+max_types = 255 # the most kinds of tiles the grid (of uint8) can tell apart
+
+loaded_path = None # the map file the tiles were loaded from (see load)
+
+version = 0 # goes up whenever tiles are loaded or replaced, so anything
+# worked out from the map (like the distance fields in pathfinding.py) can
+# tell when it is out of date
+
+row_versions = {} # y: a number that goes up whenever a tile in row y
+# changes state (an enemy is killed, loot is picked up...). See tile_changed.
+
+class MapError(Exception):
+    """Raised when a map can't be loaded or can't be played.
+
+    Attributes:
+        path: the map file
+        problems: a list of what is wrong with it"""
+    def __init__(self, path, problems):
+        self.path = path
+        self.problems = problems
+        super().__init__("{} can't be played:\n    {}".format(path, "\n    ".join(problems)))
 
-def load_tiles():
-    """Parses a file that describes the world space into the _world object"""
-    with open('resources/map.txt', 'r') as f:
+def load_tiles(path='resources/map.txt', validate=True):
+    """Parses a file that describes the world space into the _world object
+        path: the map file to load
+        validate: check that the map can be played (see mapcheck.py), and
+            raise a MapError if it can't
+    """
+    global starting_position, width, height, grid, tile_names, type_ids
+    with open(path, 'r') as f:
         rows = f.readlines()
+    _world.clear()
+    row_versions.clear()
+    tiles = __import__('tiles')
     x_max = len(rows[0].split(',')) # Assumes all rows contain the same number of commas
+    width, height = x_max, len(rows)
+    tile_names = ['']
+    type_ids = {'': 0}
+    grid = None if numpy is None else numpy.zeros((height, width), dtype=numpy.uint8)
+
     for y in range(len(rows)):
         cols = rows[y].split(',')
+        if len(cols) != x_max:
+            raise MapError(path, ["row {} has {} cells, but the first row has {}".format(y, len(cols), x_max)])
+        ids = [0] * x_max # the type of each tile in the row
         for x in range(x_max):
             tile_name = cols[x].replace('\n', '') # Windows users may need to replace '\r\n'
+            if tile_name == '':
+                continue # empty cells aren't stored
             if tile_name == 'StartingLocation':
-                global starting_position
                 starting_position = (x, y)
-            _world[(x, y)] = None if tile_name == '' else getattr(__import__('tiles'), tile_name)(x, y)
+            found = type_ids.get(tile_name)
+            if found is None:
+                if not hasattr(tiles, tile_name):
+                    raise MapError(path, ["there is no room called '{}' (at ({}, {}))".format(tile_name, x, y)])
+                found = type_id(tile_name, path)
+            ids[x] = found
+            _world[(x, y)] = getattr(tiles, tile_name)(x, y)
+        if grid is not None:
+            grid[y] = ids
+    changed()
+
+    if validate:
+        problems = mapcheck.check(_world, x_max, len(rows))
+        if problems:
+            raise MapError(path, problems)
+    global loaded_path
+    loaded_path = os.path.abspath(path)
+
+def load(path='resources/map.txt'):
+    """Loads the map, unless it is already loaded. The tiles are shared by
+    every session in the process (see overlay.py), so a new session
+    doesn't load them again, which would replace the tiles under the
+    sessions already playing.
+        path: the map file to load"""
+    if not _world or loaded_path != os.path.abspath(path):
+        load_tiles(path)
+
+def changed():
+    """Records that the map has changed."""
+    global version
+    version += 1
+
+def tile_changed(x, y):
+    """Records that the state of the tile at (x, y) has changed in a way the
+    player can see on the map (see minimap.py)."""
+    row_versions[y] = row_versions.get(y, 0) + 1
+
+def type_id(name, path=None):
+    """Returns the index of a tile name in tile_names, adding it if it is
+    new.
+        path: the map file, for the MapError raised if the grid can't tell
+            any more kinds of tiles apart"""
+    found = type_ids.get(name)
+    if found is None:
+        if len(tile_names) > max_types:
+            raise MapError(path or loaded_path, ["there are more than {} kinds of rooms (adding '{}')".format(max_types, name)])
+        found = type_ids[name] = len(tile_names)
+        tile_names.append(name)
+    return found
+
+def set_tile(x, y, tile):
+    """Places a tile (or None, for no tile) at the given coordinates, which
+    must be on the map."""
+    if tile is None:
+        _world.pop((x, y), None)
+    else:
+        _world[(x, y)] = tile
+
+    if grid is not None:
+        grid[y, x] = type_id('' if tile is None else type(tile).__name__)
+    tile_changed(x, y)
+    changed()
 
 def tile_exists(x, y):
     """Returns the tile at the given coordinates or None if there is no tile.